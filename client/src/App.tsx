@@ -172,18 +172,49 @@ export default function App() {
 
       console.log('Sending Payload:', JSON.stringify(payload, null, 2))
 
-      const response = await fetch('http://127.0.0.1:8000/analyze', {
+      // NDJSON stream: show parsed/ranked/dosed output as soon as it is ready,
+      // then swap in the final result once the explanation has been generated.
+      const response = await fetch('http://127.0.0.1:8000/analyze/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(payload)
       })
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         const errData = await response.json()
         throw new Error(errData.detail?.[0]?.msg || 'Analysis request failed.')
       }
-      const data = await response.json()
-      setResult(data)
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      const partial: any = {}
+      let buffer = ''
+
+      const handleEvent = (evt: any) => {
+        if (evt.event === 'error') {
+          throw new Error(evt.detail || 'Analysis request failed.')
+        }
+        if (evt.event === 'result') {
+          setResult(evt.data)
+          return
+        }
+        Object.assign(partial, evt.data)
+        if (partial.status && partial.recommendation) {
+          setResult({ ...partial, ranked_options: partial.ranked_options ?? [] })
+        }
+      }
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() ?? ''
+        for (const line of lines) {
+          if (line.trim()) handleEvent(JSON.parse(line))
+        }
+      }
+      if (buffer.trim()) handleEvent(JSON.parse(buffer))
     } catch (err: any) {
       setError(err.message || 'An unexpected error occurred.')
     } finally {
@@ -0,0 +1,335 @@
+# agent/backfill.py
+"""
+Offline bulk scoring of archived culture reports (no HTTP, no LLM).
+
+Run from server/:
+    python -m agent.backfill reports.jsonl --out results.jsonl
+    python -m agent.backfill archive/ --out results/ --format parquet --workers 8
+    python -m agent.backfill reports.csv --out results.jsonl --patient '{"age_years": 60}'
+
+Inputs (any mix):
+- JSONL: one CultureReportRequest-like object per line ("id" optional)
+- CSV:   a report_text column, optional id, PatientInfo fields as columns
+- directory: *.txt (raw report text) and *.json (request objects), sorted by name
+--patient supplies defaults for PatientInfo fields a record doesn't carry.
+
+Each chunk of --chunk-size reports runs through agent.batch.run_batch
+(extract -> validate -> rank -> dose -> respond, as /analyze/batch) in a
+worker process. Results are written as chunks complete:
+- jsonl:   appended to --out; --out.progress records each finished chunk and
+           the file offset after it
+- parquet: --out is a directory of part-NNNNNN.parquet files, one per chunk
+Re-running the same command resumes: finished chunks are skipped and a
+partially written tail is truncated. --restart discards previous output.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+Record = Tuple[str, Dict[str, Any]]  # (id, CultureReportRequest-like dict)
+
+PATIENT_FIELDS = (
+    "age_years", "sex", "syndrome", "severity", "egfr_ml_min", "renal_bucket",
+    "beta_lactam_allergy", "other_allergies", "pregnancy", "hepatic_impairment", "interactions",
+)
+_CSV_BOOL_FIELDS = {"beta_lactam_allergy", "pregnancy", "hepatic_impairment"}
+_CSV_LIST_FIELDS = {"other_allergies", "interactions"}
+
+# Output columns (also the Parquet schema, see _parquet_schema)
+COLUMNS = (
+    "id", "status", "specimen", "organisms", "ranked_drugs", "ranked_scores",
+    "primary_drug", "primary_route", "primary_dose", "primary_frequency", "primary_duration",
+    "alternatives", "missing_info", "error",
+)
+
+
+# ---------------------------
+# Input
+# ---------------------------
+
+def _csv_value(field: str, value: str) -> Any:
+    if field in _CSV_BOOL_FIELDS:
+        return value.strip().lower() in ("1", "true", "yes", "y")
+    if field in _CSV_LIST_FIELDS:
+        return [v.strip() for v in value.split(";") if v.strip()]
+    return value
+
+
+def _read_jsonl(path: Path) -> Iterator[Record]:
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if line.strip():
+                obj = json.loads(line)
+                yield str(obj.pop("id", f"{path.name}:{n}")), obj
+
+
+def _read_csv(path: Path) -> Iterator[Record]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for n, row in enumerate(csv.DictReader(f), 1):
+            patient = {k: _csv_value(k, v) for k, v in row.items() if k in PATIENT_FIELDS and v not in (None, "")}
+            yield row.get("id") or f"{path.name}:{n}", {"report_text": row.get("report_text", ""), "patient": patient}
+
+
+def _read_dir(path: Path) -> Iterator[Record]:
+    for f in sorted(path.iterdir()):
+        if f.suffix == ".txt":
+            yield f.name, {"report_text": f.read_text(encoding="utf-8")}
+        elif f.suffix == ".json":
+            obj = json.loads(f.read_text(encoding="utf-8"))
+            obj = obj.get("request", obj)  # tests/cases/*.json wrap the request
+            yield str(obj.pop("id", f.name)), obj
+
+
+def read_records(inputs: Iterable[Path]) -> Iterator[Record]:
+    for path in inputs:
+        if path.is_dir():
+            yield from _read_dir(path)
+        elif path.suffix == ".csv":
+            yield from _read_csv(path)
+        else:
+            yield from _read_jsonl(path)
+
+
+def chunked(records: Iterator[Record], size: int) -> Iterator[Tuple[int, List[Record]]]:
+    for index in itertools.count():
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield index, chunk
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+
+def _init_worker() -> None:
+    # Load once per process (no-op if inherited from the parent via fork)
+    from services import dosing, ranker
+
+    ranker._load_model()
+    ranker.refresh_antibiogram()
+    dosing._load_dosing_table()
+
+
+def _row(rid: str, out=None, error: Optional[str] = None) -> Dict[str, Any]:
+    row: Dict[str, Any] = dict.fromkeys(COLUMNS)
+    row.update(id=rid, organisms=[], ranked_drugs=[], ranked_scores=[], alternatives=[], missing_info=[])
+    if error is not None:
+        row.update(status="error", error=error)
+        return row
+
+    parsed, rec = out["parsed_report"], out["recommendation"]
+    ranked = out.get("ranked_options", [])
+    row.update(
+        status=getattr(out["status"], "value", out["status"]),
+        specimen=parsed.specimen.value,
+        organisms=[o.organism for o in parsed.organisms],
+        ranked_drugs=[o.drug for o in ranked],
+        ranked_scores=[o.score for o in ranked],
+        alternatives=[a.drug for a in rec.alternatives],
+        missing_info=list(rec.missing_info),
+    )
+    if rec.primary is not None:
+        p = rec.primary
+        row.update(
+            primary_drug=p.drug, primary_route=p.route, primary_dose=p.dose,
+            primary_frequency=p.frequency, primary_duration=p.duration,
+        )
+    return row
+
+
+def score_chunk(records: List[Record], patient_defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Score one chunk; invalid records become status="error" rows instead of
+    failing the chunk. Rows come back in input order.
+    """
+    from pydantic import ValidationError
+
+    from agent.batch import run_batch
+    from api.schemas import CultureReportRequest
+
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    payloads, slots = [], []
+    for i, (rid, obj) in enumerate(records):
+        try:
+            obj = {**obj, "patient": {**patient_defaults, **(obj.get("patient") or {})}}
+            payloads.append(CultureReportRequest(**obj))
+            slots.append(i)
+        except (ValidationError, TypeError) as e:
+            rows[i] = _row(rid, error=f"invalid request: {e}".splitlines()[0])
+
+    for i, out in zip(slots, run_batch(payloads)):
+        rows[i] = _row(records[i][0], out)
+    return rows
+
+
+# ---------------------------
+# Output
+# ---------------------------
+
+class _JsonlSink:
+    def __init__(self, path: Path, restart: bool):
+        self.path = path
+        self.progress_path = path.with_name(path.name + ".progress")
+        if restart:
+            for p in (path, self.progress_path):
+                p.unlink(missing_ok=True)
+
+        self.done: Set[int] = set()
+        offset = 0
+        if self.progress_path.exists():
+            for line in self.progress_path.read_text(encoding="utf-8").splitlines():
+                if line.strip():
+                    entry = json.loads(line)
+                    self.done.add(entry["chunk"])
+                    offset = max(offset, entry["offset"])
+
+        self._out = open(path, "ab")
+        self._out.truncate(offset)  # drop rows of a chunk that was being written at the crash
+        self._out.seek(offset)
+        self._progress = open(self.progress_path, "a", encoding="utf-8")
+
+    def write(self, index: int, rows: List[Dict[str, Any]]) -> None:
+        self._out.write(b"".join((json.dumps(r) + "\n").encode("utf-8") for r in rows))
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        self._progress.write(json.dumps({"chunk": index, "offset": self._out.tell()}) + "\n")
+        self._progress.flush()
+
+    def close(self) -> None:
+        self._out.close()
+        self._progress.close()
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    text_list = pa.list_(pa.string())
+    types = {
+        "organisms": text_list, "ranked_drugs": text_list, "ranked_scores": pa.list_(pa.float64()),
+        "alternatives": text_list, "missing_info": text_list,
+    }
+    return pa.schema([(c, types.get(c, pa.string())) for c in COLUMNS])
+
+
+class _ParquetSink:
+    def __init__(self, path: Path, restart: bool):
+        import pyarrow.parquet as pq  # optional dependency, only for --format parquet
+
+        self._pq = pq
+        self._schema = _parquet_schema()
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        for f in path.glob("*.tmp"):
+            f.unlink()
+        if restart:
+            for f in path.glob("part-*.parquet"):
+                f.unlink()
+        self.done = {int(f.stem.split("-")[1]) for f in path.glob("part-*.parquet")}
+
+    def write(self, index: int, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow as pa
+
+        table = pa.Table.from_pylist(rows, schema=self._schema)
+        final = self.path / f"part-{index:06d}.parquet"
+        tmp = final.with_suffix(".tmp")
+        self._pq.write_table(table, tmp)
+        os.replace(tmp, final)  # a part exists only once complete
+
+    def close(self) -> None:
+        pass
+
+
+# ---------------------------
+# Driver
+# ---------------------------
+
+def run(
+    inputs: List[Path],
+    out: Path,
+    fmt: str = "jsonl",
+    workers: Optional[int] = None,
+    chunk_size: int = 500,
+    patient_defaults: Optional[Dict[str, Any]] = None,
+    restart: bool = False,
+    progress_every_s: float = 2.0,
+) -> Dict[str, Any]:
+    sink = _ParquetSink(out, restart) if fmt == "parquet" else _JsonlSink(out, restart)
+    workers = workers or os.cpu_count() or 1
+    patient_defaults = patient_defaults or {}
+    _init_worker()  # with the fork start method, workers inherit the loaded tables
+
+    started = time.monotonic()
+    next_report = started + progress_every_s
+    stats = {"reports": 0, "errors": 0, "chunks": 0, "skipped_chunks": len(sink.done)}
+
+    def report(final: bool = False) -> None:
+        elapsed = time.monotonic() - started
+        rate = stats["reports"] / elapsed if elapsed else 0.0
+        print(
+            f"{'done' if final else 'progress'}: {stats['reports']} reports "
+            f"({stats['errors']} errors) in {elapsed:.1f}s, {rate:.0f}/s; "
+            f"{stats['skipped_chunks']} chunks already done",
+            file=sys.stderr,
+        )
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = {}
+            chunks = ((i, c) for i, c in chunked(read_records(inputs), chunk_size) if i not in sink.done)
+
+            for index, chunk in itertools.chain(chunks, [(None, None)]):
+                # Bounded in-flight work keeps memory flat on huge archives
+                while pending and (index is None or len(pending) >= 2 * workers):
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        rows = fut.result()
+                        sink.write(pending.pop(fut), rows)
+                        stats["chunks"] += 1
+                        stats["reports"] += len(rows)
+                        stats["errors"] += sum(r["status"] == "error" for r in rows)
+                    if time.monotonic() >= next_report:
+                        report()
+                        next_report = time.monotonic() + progress_every_s
+                if index is not None:
+                    pending[pool.submit(score_chunk, chunk, patient_defaults)] = index
+    finally:
+        sink.close()
+
+    report(final=True)
+    stats["elapsed_s"] = round(time.monotonic() - started, 3)
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="+", type=Path, help="JSONL/CSV files or directories")
+    ap.add_argument("--out", required=True, type=Path)
+    ap.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    ap.add_argument("--workers", type=int, default=None, help="default: all cores")
+    ap.add_argument("--chunk-size", type=int, default=500)
+    ap.add_argument("--patient", default="{}", help="JSON object of PatientInfo defaults")
+    ap.add_argument("--restart", action="store_true", help="discard previous output instead of resuming")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    stats = run(
+        args.inputs, args.out, args.format, args.workers, args.chunk_size,
+        json.loads(args.patient), args.restart,
+    )
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
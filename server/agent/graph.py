@@ -2,9 +2,13 @@
 from __future__ import annotations
 
 import os
+import time
+from typing import Any, Callable, Optional
+from langchain_core.runnables import Runnable, RunnableConfig
 from langgraph.graph import StateGraph, END
 
 from api.settings import GROQ_API_KEY
+from services.metrics import NODE_LATENCY
 
 from agent.state import GraphState
 from agent.nodes.extract import extract_node
@@ -12,7 +16,6 @@ from agent.nodes.validate import validate_node
 from agent.nodes.rank import rank_node
 from agent.nodes.dose import dose_node
 from agent.nodes.respond import respond_node
-from agent.nodes.explain import explain_node
 
 
 def _should_end_after_validate(state: GraphState) -> str:
@@ -20,23 +23,72 @@ def _should_end_after_validate(state: GraphState) -> str:
     return "continue" if status is None else "end"
 
 
-def build_graph():
-    g = StateGraph(GraphState)
+class _Node(Runnable):
+    """
+    Node usable from both GRAPH.invoke and GRAPH.ainvoke, timed into
+    aura_node_latency_seconds{node=...}.
+    Deterministic nodes are sub-millisecond CPU work, so under ainvoke they run
+    inline on the event loop instead of hopping to a worker thread.
+    Kept as a bare Runnable: RunnableLambda's per-call config/callback handling
+    costs more than the nodes themselves.
+    """
+
+    def __init__(self, name: str, func: Callable, afunc: Optional[Callable] = None):
+        self.name = name
+        self.func = func
+        self.afunc = afunc
+
+    def invoke(self, input: GraphState, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            return self.func(input)
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - started, node=self.name)
+
+    async def ainvoke(self, input: GraphState, config: Optional[RunnableConfig] = None, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            if self.afunc is not None:
+                return await self.afunc(input)
+            return self.func(input)
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - started, node=self.name)
+
+
+def _add_node(g: StateGraph, name: str, func: Callable, afunc: Optional[Callable] = None) -> None:
+    g.add_node(name, _Node(name, func, afunc))
 
-    g.add_node("extract", extract_node)
-    g.add_node("validate", validate_node)
-    g.add_node("rank", rank_node)
-    g.add_node("dose", dose_node)
-    g.add_node("respond", respond_node)
 
+def explain_enabled() -> bool:
     # If pytest is running OR Groq key missing -> skip explain node
     in_pytest = bool(os.getenv("PYTEST_CURRENT_TEST"))
     has_groq_key = bool(GROQ_API_KEY)
+    return (not in_pytest) and has_groq_key
 
-    use_explain = (not in_pytest) and has_groq_key
+
+def build_graph(use_explain: Optional[bool] = None, checkpointer: Any = None):
+    """
+    use_explain=None decides from the environment (see explain_enabled);
+    True/False forces the explain node in or out (benchmarks, tests).
+    checkpointer is only for the session graph (agent/sessions.py); the
+    request-path GRAPH runs without one.
+    """
+    g = StateGraph(GraphState)
+
+    _add_node(g, "extract", extract_node)
+    _add_node(g, "validate", validate_node)
+    _add_node(g, "rank", rank_node)
+    _add_node(g, "dose", dose_node)
+    _add_node(g, "respond", respond_node)
+
+    if use_explain is None:
+        use_explain = explain_enabled()
 
     if use_explain:
-        g.add_node("explain", explain_node)
+        # Imported here so deployments without explain never load the LLM stack
+        from agent.nodes.explain import explain_node, aexplain_node
+
+        _add_node(g, "explain", explain_node, aexplain_node)
 
     g.set_entry_point("extract")
     g.add_edge("extract", "validate")
@@ -59,4 +111,4 @@ def build_graph():
         g.add_edge("dose", "respond")
 
     g.add_edge("respond", END)
-    return g.compile()
+    return g.compile(checkpointer=checkpointer)
@@ -1,16 +1,38 @@
 # agent/nodes/explain.py
 from __future__ import annotations
-from typing import Dict, Any
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, List, Optional
 
 from agent.state import GraphState
-from langchain_groq import ChatGroq
 from api.schemas import RecommendationPackage
+from api.settings import EXPLAIN_TIMEOUT_S
+from services.explain_cache import EXPLANATION_CACHE, explanation_key
+from services.metrics import EXPLAIN_CACHE, LLM_ERRORS, LLM_LATENCY
 
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",  # Groq hosted Llama 3.1 8B
-    temperature=0.2,
-)
+EXPLAIN_MODEL = "llama-3.1-8b-instant"  # Groq hosted Llama 3.1 8B
+
+# Built on first use (or at startup warm-up), not at import time;
+# langchain_groq is only imported when explain is actually enabled.
+llm = None
+
+# Runs the sync node's LLM call so it can be abandoned at EXPLAIN_TIMEOUT_S
+_SYNC_CALLS = ThreadPoolExecutor(max_workers=4, thread_name_prefix="explain")
+
+
+def get_llm():
+    global llm
+    if llm is None:
+        from langchain_groq import ChatGroq
+
+        llm = ChatGroq(
+            model=EXPLAIN_MODEL,
+            temperature=0.2,
+            timeout=EXPLAIN_TIMEOUT_S,  # also ends calls the nodes stopped waiting for
+        )
+    return llm
 
 EXPLANATION_SYSTEM_PROMPT = """You are a medical expert specializing in antibiotic recommendations and resistance patterns.
 Provide a clear, evidence-based explanation of the recommended antibiotic regimen, including:
@@ -21,13 +43,14 @@ Provide a clear, evidence-based explanation of the recommended antibiotic regime
 
 Keep the explanation concise and clinically focused."""
 
-def explain_node(state: GraphState) -> Dict[str, Any]:
+
+def _explanation_input(state: GraphState) -> Optional[str]:
     rec: RecommendationPackage | None = state.get("recommendation")
     parsed = state.get("parsed_report")
     ranked = state.get("ranked_options", [])
 
     if rec is None or rec.primary is None or parsed is None:
-        return {}  # nothing to explain
+        return None  # nothing to explain
 
     # Build structured input for the LLM
     explanation_input = f"""
@@ -47,16 +70,114 @@ Alternatives:
 Susceptibility summary:
 {', '.join([f"{r.drug}: {r.sir_summary}" for r in ranked])}
 """
+    return explanation_input
+
 
-    response = llm.invoke([
+def _messages(explanation_input: str) -> List[Dict[str, str]]:
+    return [
         {"role": "system", "content": EXPLANATION_SYSTEM_PROMPT},
         {"role": "user", "content": explanation_input},
-    ])
+    ]
 
+
+def _cache_key(explanation_input: str) -> str:
+    return explanation_key(EXPLAIN_MODEL, EXPLANATION_SYSTEM_PROMPT, explanation_input)
+
+
+def _response_text(response) -> str:
     explanation_text = response.content if isinstance(response.content, str) else response.content[0]
-    explanation_text = explanation_text.strip() if isinstance(explanation_text, str) else str(explanation_text).strip()
+    return explanation_text.strip() if isinstance(explanation_text, str) else str(explanation_text).strip()
+
+
+def _apply_explanation(state: GraphState, explanation_text: str, cached: bool) -> Dict[str, Any]:
+    rec: RecommendationPackage = state["recommendation"]
 
     # Append explanation safely
     rec.rationale.append(explanation_text)
 
-    return {"recommendation": rec}
+    payload = state.get("payload")
+    debug = state.get("debug", {})
+    if payload is not None and payload.debug:
+        debug["explain"] = {"cache": "hit" if cached else "miss"}
+
+    return {"recommendation": rec, "debug": debug}
+
+
+def _cached(key: str) -> Optional[str]:
+    cached = EXPLANATION_CACHE.get(key)
+    EXPLAIN_CACHE.inc(result="miss" if cached is None else "hit")
+    return cached
+
+
+def _skipped(state: GraphState, reason: str, started: float) -> Dict[str, Any]:
+    """
+    Explanation is optional: keep the deterministic recommendation as-is.
+    """
+    LLM_LATENCY.observe(time.perf_counter() - started)
+    LLM_ERRORS.inc(reason="timeout" if reason == "timeout" else "error")
+    payload = state.get("payload")
+    debug = state.get("debug", {})
+    if payload is not None and payload.debug:
+        debug["explain"] = {
+            "skipped": reason,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    return {"debug": debug, "degraded": True}
+
+
+def explain_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Sync explain for GRAPH.invoke, bounded by EXPLAIN_TIMEOUT_S like aexplain_node.
+    """
+    explanation_input = _explanation_input(state)
+    if explanation_input is None:
+        return {}
+
+    key = _cache_key(explanation_input)
+    cached = _cached(key)
+    if cached is not None:
+        return _apply_explanation(state, cached, cached=True)
+
+    started = time.perf_counter()
+    try:
+        call = _SYNC_CALLS.submit(get_llm().invoke, _messages(explanation_input))
+        response = call.result(timeout=EXPLAIN_TIMEOUT_S)
+    except FutureTimeout:
+        # Still queued behind busy workers: drop it rather than call the LLM for nobody
+        call.cancel()
+        return _skipped(state, "timeout", started)
+    except Exception as e:
+        return _skipped(state, f"error: {type(e).__name__}", started)
+
+    LLM_LATENCY.observe(time.perf_counter() - started)
+    explanation_text = _response_text(response)
+    EXPLANATION_CACHE.set(key, explanation_text)
+    return _apply_explanation(state, explanation_text, cached=False)
+
+
+async def aexplain_node(state: GraphState) -> Dict[str, Any]:
+    """
+    Async explain for GRAPH.ainvoke: the LLM call is bounded by EXPLAIN_TIMEOUT_S,
+    so tail latency never depends on the provider.
+    """
+    explanation_input = _explanation_input(state)
+    if explanation_input is None:
+        return {}
+
+    key = _cache_key(explanation_input)
+    cached = _cached(key)
+    if cached is not None:
+        return _apply_explanation(state, cached, cached=True)
+
+    started = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(get_llm().ainvoke(_messages(explanation_input)), timeout=EXPLAIN_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        return _skipped(state, "timeout", started)
+    except Exception as e:
+        return _skipped(state, f"error: {type(e).__name__}", started)
+
+    LLM_LATENCY.observe(time.perf_counter() - started)
+    explanation_text = _response_text(response)
+    EXPLANATION_CACHE.set(key, explanation_text)
+    return _apply_explanation(state, explanation_text, cached=False)
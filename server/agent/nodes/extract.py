@@ -1,17 +1,21 @@
 # agent/nodes/extract.py
 from __future__ import annotations
+import logging
 from typing import Dict, Any
 
 from agent.state import GraphState
 from services.parser import parse_report
 
+logger = logging.getLogger(__name__)
 
 def extract_node(state: GraphState) -> Dict[str, Any]:
     payload = state.get("payload")
     if not payload:
         return {"parsed_report": None, "debug": {}}
     
-    print("\n[EXTRACT NODE] first 300 chars:\n", repr(payload.report_text[:300]))
+    # Report text is PHI: log its shape only, never its content
+    logger.debug("extract: report_text %d chars, %d lines",
+                 len(payload.report_text), payload.report_text.count("\n") + 1)
 
     debug = state.get("debug", {})
     if payload.debug:
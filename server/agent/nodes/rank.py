@@ -1,29 +1,40 @@
 # agent/nodes/rank.py
 from __future__ import annotations
-from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from agent.state import GraphState
-from services.ranker import rank_options
+from services.ranker import current_model, rank_options
+from services.records import OptionRecord
+from services.shadow import SHADOW
 
 
 
-def rank_node(state: GraphState) -> Dict[str, Any]:
-    payload = state.get("payload")
-    parsed = state.get("parsed_report")
-    
-    if payload is None or parsed is None:
-        return {}  # Early exit if missing required data
+def rank_update(state: GraphState, ranked: List[OptionRecord]) -> Dict[str, Any]:
+    """
+    State update for a finished ranking (shared with the batch runner).
+    """
+    payload = state["payload"]
+    SHADOW.submit(state["parsed_report"], payload.patient, ranked)  # sampled; compared in the background
 
-    ranked = rank_options(parsed, payload.patient)
-    
-    # after ranked = rank_options(...)
     debug = state.get("debug", {})
     if payload.debug:
+        active = current_model()  # in memory; swapped by the model watcher
         debug["rank"] = {
             "ranked_drugs": [r.drug for r in ranked],
             "top_score": ranked[0].score if ranked else None,
-            "ranker_used": "ml" if (Path("ml/model.joblib").exists()) else "rules"
+            "ranker_used": "ml" if active.model is not None else "rules",
+            "model_version": active.info.get("version"),
         }
     
-    return {"ranked_options": ranked, "debug": debug}
\ No newline at end of file
+    return {"ranked_options": ranked, "debug": debug}
+
+
+def rank_node(state: GraphState) -> Dict[str, Any]:
+    payload = state.get("payload")
+    parsed = state.get("parsed_report")
+    
+    if payload is None or parsed is None:
+        return {}  # Early exit if missing required data
+
+    ranked = rank_options(parsed, payload.patient)
+    return rank_update(state, ranked)
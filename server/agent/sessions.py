@@ -0,0 +1,150 @@
+# agent/sessions.py
+from __future__ import annotations
+
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Command
+
+from agent.graph import build_graph
+from agent.state import GraphState
+from api.schemas import AnalyzeStatus, CultureReportRequest, PatientInfo
+from api.settings import SESSION_DB, SESSION_MAX, SESSION_TTL_S
+from services.records import refreeze
+
+# Types stored in session checkpoints (GraphState values)
+_CHECKPOINT_TYPES = [
+    ("api.schemas", name)
+    for name in (
+        "CultureReportRequest", "PatientInfo", "Severity", "RenalBucket", "SpecimenType", "SIR",
+        "AnalyzeStatus", "Regimen", "RecommendationPackage",
+    )
+] + [
+    ("services.records", name)
+    for name in ("ReportRecord", "OrganismRecord", "ASTRecord", "OptionRecord")
+]
+
+
+class Sessions:
+    """
+    Resumable needs_more_info analyses.
+
+    /analyze runs the checkpoint-free GRAPH. Only when it stops at
+    needs_more_info is one checkpoint written, as if extract had just run
+    (payload + parsed report). continue_() merges the new patient fields into
+    the payload and resumes that thread at validate, so the report is never
+    re-sent or re-parsed.
+
+    Tokens are LangGraph thread ids. A session expires SESSION_TTL_S after
+    its last checkpoint; this process also keeps at most SESSION_MAX of its
+    own sessions, deleting the oldest.
+    """
+
+    def __init__(self, db_path: str = "", maxsize: int = 10_000, ttl_s: float = 3600.0):
+        self.db_path = db_path
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._graph = None
+        self._init_lock = asyncio.Lock()
+        self._owned: "OrderedDict[str, float]" = OrderedDict()  # token -> monotonic time opened
+
+    async def _get_graph(self):
+        # Built on first use: the SQLite saver needs a running event loop
+        if self._graph is None:
+            async with self._init_lock:
+                if self._graph is None:
+                    self._graph = build_graph(checkpointer=await self._checkpointer())
+        return self._graph
+
+    async def _checkpointer(self):
+        serde = JsonPlusSerializer(allowed_msgpack_modules=_CHECKPOINT_TYPES)
+        if not self.db_path:
+            from langgraph.checkpoint.memory import InMemorySaver
+
+            return InMemorySaver(serde=serde)
+
+        import aiosqlite
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        saver = AsyncSqliteSaver(await aiosqlite.connect(self.db_path), serde=serde)
+        await saver.setup()
+        return saver
+
+    async def close(self) -> None:
+        if self._graph is not None and self.db_path:
+            await self._graph.checkpointer.conn.close()
+        self._graph = None
+
+    @staticmethod
+    def _config(token: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": token}}
+
+    async def open(self, out: GraphState) -> str:
+        """
+        Checkpoint a finished needs_more_info run; returns its resume token.
+        """
+        graph = await self._get_graph()
+        token = secrets.token_urlsafe(16)
+        values = {"payload": out["payload"], "parsed_report": out["parsed_report"], "debug": {}}
+        await graph.aupdate_state(self._config(token), values, as_node="extract")
+
+        self._owned[token] = time.monotonic()
+        await self._evict(graph)
+        return token
+
+    async def _evict(self, graph) -> None:
+        cutoff = time.monotonic() - self.ttl_s
+        while self._owned:
+            token, opened = next(iter(self._owned.items()))
+            if len(self._owned) <= self.maxsize and opened > cutoff:
+                break
+            del self._owned[token]
+            await graph.checkpointer.adelete_thread(token)
+
+    async def continue_(self, token: str, patient_update: Dict[str, Any]) -> Optional[GraphState]:
+        """
+        Resume a session at validate with the updated patient info.
+        The session ends (its token is deleted) once the run gets past
+        needs_more_info. Returns None if the token is unknown or expired. Raises
+        pydantic.ValidationError if the merged PatientInfo is invalid.
+        """
+        graph = await self._get_graph()
+        config = self._config(token)
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values or snapshot.created_at is None:
+            return None
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(snapshot.created_at)
+        if age.total_seconds() > self.ttl_s:
+            await graph.checkpointer.adelete_thread(token)
+            self._owned.pop(token, None)
+            return None
+
+        payload: CultureReportRequest = snapshot.values["payload"]
+        patient = PatientInfo(**{**payload.patient.model_dump(), **patient_update})
+        values = {
+            "payload": payload.model_copy(update={"patient": patient}),
+            "parsed_report": refreeze(snapshot.values["parsed_report"]),
+            # Outputs of an earlier continue must not leak into this run
+            "ranked_options": [],
+            "missing_info": [],
+            "debug": {},
+            "degraded": False,
+        }
+        self._owned[token] = time.monotonic()
+        self._owned.move_to_end(token)
+
+        # Apply the update and resume at validate in one step. Only the
+        # final state is persisted, and only while more info is still needed.
+        out = await graph.ainvoke(Command(update=values, goto="validate"), config, durability="exit")
+        if out["status"] != AnalyzeStatus.needs_more_info:
+            await graph.checkpointer.adelete_thread(token)
+            self._owned.pop(token, None)
+        return out
+
+
+SESSIONS = Sessions(SESSION_DB, SESSION_MAX, SESSION_TTL_S)
@@ -4,23 +4,26 @@ from typing import TypedDict, Optional, List, Dict, Any
 
 from api.schemas import (
     CultureReportRequest,
-    ParsedReport,
-    RankedOption,
     RecommendationPackage,
     AnalyzeStatus,
 )
+from services.records import OptionRecord, ReportRecord
 
 class GraphState(TypedDict, total=False):
     # Input
     payload: CultureReportRequest
 
     # Outputs from nodes
-    parsed_report: ParsedReport
-    ranked_options: List[RankedOption]
+    # Internal records (services/records.py); to_schema() at the API boundary
+    parsed_report: ReportRecord
+    ranked_options: List[OptionRecord]
     missing_info: List[str]
 
     status: AnalyzeStatus
     recommendation: RecommendationPackage
 
+    # Set when an optional step (explain) was skipped; such results aren't cached
+    degraded: bool
+
     # Optional debug
     debug: Dict[str, Any]
@@ -2,20 +2,63 @@
 from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 
-from fastapi import FastAPI
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import ValidationError
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 
 
-from api.schemas import CultureReportRequest, AnalyzeResponse
+from api.responses import analyze_document, dumps
+from api.schemas import CultureReportRequest, AnalyzeResponse, AnalyzeStatus, PatientInfoUpdate
+from api.settings import BATCH_MAX_ITEMS
 from agent.graph import build_graph, GraphState
+from agent.batch import run_batch
+from agent.sessions import SESSIONS
+from agent.warmup import warm_up
+from services.logs import configure_logging
+from services.metrics import ANALYZE_STATUS, CONTENT_TYPE, RESPONSE_CACHE as RESPONSE_CACHE_METRIC, render_latest
+from services.ranker import start_model_watcher, stop_model_watcher
+from services.response_cache import RESPONSE_CACHE, request_key
+from services.shadow import SHADOW
+
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Readiness is separate from liveness: /health answers as soon as the
+# process is up, /ready only once warm-up has loaded everything.
+READINESS: Dict[str, Any] = {"ready": False, "warmup_ms": None, "error": None}
 
-from api.schemas import (
-    CultureReportRequest,
-    AnalyzeResponse,
-)
 
+async def _warm():
+    try:
+        READINESS["warmup_ms"] = await asyncio.to_thread(warm_up)
+        READINESS["ready"] = True
+    except Exception as e:
+        READINESS["error"] = f"{type(e).__name__}: {e}"
+        logger.exception("warm-up failed")
 
-app = FastAPI(title="AURA", version="1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in the background so /health is live while the model loads
+    task = asyncio.create_task(_warm())
+    start_model_watcher()
+    yield
+    task.cancel()
+    stop_model_watcher()
+    SHADOW.close()
+    await SESSIONS.close()
+
+
+app = FastAPI(title="AURA", version="1.0", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -36,17 +79,164 @@ GRAPH = build_graph()
 def health():
     return {"ok": True}
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(payload: CultureReportRequest):
-    # Run graph
-    state = GraphState(payload=payload, debug={})
-    out = GRAPH.invoke(state)
-    
+@app.get("/ready")
+def ready():
+    """
+    Load-balancer readiness probe: 503 until the startup warm-up is done.
+    """
+    if not READINESS["ready"]:
+        return JSONResponse(status_code=503, content=READINESS)
+    return READINESS
+
+@app.get("/metrics")
+def metrics():
+    return Response(render_latest(), media_type=CONTENT_TYPE)
+
+# Response size options shared by the JSON endpoints (see api/responses.py)
+EVIDENCE_QUERY = Query(True, description="Include each AST row's evidence_line (raw report line)")
+AST_QUERY = Query("rows", description="AST results as one object per row, or as parallel arrays per organism")
+
+# These endpoints write JSON bytes themselves (response_class=Response), so the
+# schema is only documented here; FastAPI doesn't validate against it.
+_FORMATS = (
+    " The default body is an AnalyzeResponse whose parsed_report organisms carry `ast` as a list of"
+    " {drug, sir, mic, evidence_line} objects. With `evidence=false` each AST object omits `evidence_line`."
+    " With `ast=columns` each organism's `ast` is instead one object of parallel arrays,"
+    " {\"drug\": [...], \"sir\": [...], \"mic\": [...], \"evidence_line\": [...]}"
+    " (`evidence_line` omitted with `evidence=false`)."
+)
+ANALYZE_DOC = {200: {"model": AnalyzeResponse, "description": "Analysis result." + _FORMATS}}
+BATCH_DOC = {200: {"model": List[AnalyzeResponse], "description": "One analysis result per report, in input order." + _FORMATS}}
+
+
+def _count_status(out: GraphState) -> None:
+    ANALYZE_STATUS.inc(status=getattr(out["status"], "value", out["status"]))
+
+
+def _to_response(out: GraphState, payload: CultureReportRequest) -> AnalyzeResponse:
+    _count_status(out)
     return AnalyzeResponse(
         status=out["status"],
-        parsed_report=out["parsed_report"].model_dump(),
-        ranked_options=out.get("ranked_options", []),
+        parsed_report=out["parsed_report"].to_schema().model_dump(),
+        ranked_options=[o.to_schema() for o in out.get("ranked_options", [])],
         recommendation=out["recommendation"].model_dump(),
         safety_note=out.get("safety_note"),
         debug=out.get("debug") if payload.debug else None,
-    )
\ No newline at end of file
+    )
+
+
+def _document(
+    out: GraphState, payload: CultureReportRequest, resume_token: Optional[str], evidence: bool, ast: str
+) -> Dict[str, Any]:
+    _count_status(out)
+    return analyze_document(out, payload.debug, resume_token, evidence, columns=ast == "columns")
+
+
+def _json(document: Any) -> Response:
+    # Already-validated models serialized once; FastAPI's response_model round-trip is skipped
+    return Response(dumps(document), media_type="application/json")
+
+
+@app.post("/analyze", response_class=Response, responses=ANALYZE_DOC)
+async def analyze(
+    payload: CultureReportRequest,
+    evidence: bool = EVIDENCE_QUERY,
+    ast: Literal["rows", "columns"] = AST_QUERY,
+):
+    # Replays of an identical request skip the graph (debug requests never cached)
+    key = None
+    if not payload.debug and RESPONSE_CACHE.enabled:
+        variant = "" if (evidence and ast == "rows") else f"{ast}:{evidence}"
+        key = RESPONSE_CACHE.key(request_key(payload, variant=variant))  # under the loaded model/tables
+        hit = RESPONSE_CACHE.get(key)
+        RESPONSE_CACHE_METRIC.inc(result="miss" if hit is None else "hit")
+        if hit is not None:
+            status, body = hit
+            ANALYZE_STATUS.inc(status=status)
+            return Response(body, media_type="application/json")
+
+    # Run graph (explain step is bounded by EXPLAIN_TIMEOUT_S)
+    state = GraphState(payload=payload, debug={})
+    out = await GRAPH.ainvoke(state)
+
+    resume_token = None
+    if out["status"] == AnalyzeStatus.needs_more_info:
+        # Resumable: the follow-up only sends the missing fields (not cached: tokens are per-client)
+        resume_token = await SESSIONS.open(out)
+    body = dumps(_document(out, payload, resume_token, evidence, ast))
+
+    # A skipped explanation shouldn't be replayed for the whole TTL
+    if key is not None and resume_token is None and not out.get("degraded"):
+        RESPONSE_CACHE.set(key, getattr(out["status"], "value", out["status"]), body)
+    return Response(body, media_type="application/json")
+
+@app.post("/analyze/{token}/continue", response_class=Response, responses=ANALYZE_DOC)
+async def analyze_continue(
+    token: str,
+    update: PatientInfoUpdate,
+    evidence: bool = EVIDENCE_QUERY,
+    ast: Literal["rows", "columns"] = AST_QUERY,
+):
+    """
+    Second step of a needs_more_info analysis: merges the supplied
+    PatientInfo fields and resumes the checkpointed run at validate,
+    reusing the already-parsed report.
+    """
+    try:
+        out = await SESSIONS.continue_(token, update.model_dump(exclude_unset=True))
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=jsonable_encoder(e.errors(include_url=False)))
+    if out is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session token.")
+
+    # Still incomplete: same session, next attempt
+    resume_token = token if out["status"] == AnalyzeStatus.needs_more_info else None
+    return _json(_document(out, out["payload"], resume_token, evidence, ast))
+
+def _ndjson(obj) -> bytes:
+    return (json.dumps(jsonable_encoder(obj)) + "\n").encode("utf-8")
+
+@app.post("/analyze/stream")
+async def analyze_stream(payload: CultureReportRequest):
+    """
+    NDJSON variant of /analyze: one line per graph node as it finishes
+    ({"event": "node", "node": ..., "data": ...}), then the full
+    AnalyzeResponse as {"event": "result", "data": ...}.
+    Deterministic stages arrive before the (slow) explain step.
+    """
+    async def events():
+        out = GraphState(payload=payload, debug={})
+        try:
+            async for chunk in GRAPH.astream(out, stream_mode="updates"):
+                for node, update in chunk.items():
+                    update = dict(update or {})
+                    out.update(update)
+                    if not payload.debug:
+                        update.pop("debug", None)
+                    yield _ndjson({"event": "node", "node": node, "data": update})
+
+            yield _ndjson({"event": "result", "data": _to_response(out, payload)})
+        except Exception as e:
+            # Headers are already sent; report the failure in-band
+            yield _ndjson({"event": "error", "detail": f"{type(e).__name__}: {e}"})
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/analyze/batch", response_class=Response, responses=BATCH_DOC)
+def analyze_batch(
+    payloads: List[CultureReportRequest],
+    evidence: bool = EVIDENCE_QUERY,
+    ast: Literal["rows", "columns"] = AST_QUERY,
+):
+    """
+    Many reports in one call; results are returned in input order,
+    each with its own status. Explanations are not generated in batch mode.
+    """
+    if len(payloads) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(payloads)} items (max {BATCH_MAX_ITEMS}).",
+        )
+
+    outs = run_batch(payloads)
+    return _json([_document(out, p, None, evidence, ast) for out, p in zip(outs, payloads)])
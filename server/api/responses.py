@@ -0,0 +1,100 @@
+# api/responses.py
+"""
+Serialization of /analyze responses straight to JSON bytes.
+
+The graph's outputs are already validated, so the response is not rebuilt
+as an AnalyzeResponse and re-validated by FastAPI: the parsed report and
+ranked options are written from their records (services/records.py) as
+plain dicts/lists, the recommendation is dumped once by pydantic-core and
+embedded as an orjson.Fragment, and orjson writes the document. The
+document is the same as AnalyzeResponse's (tests/test_responses.py checks
+this), with two opt-in reductions for high-volume clients:
+
+- evidence=False drops ASTResult.evidence_line (the raw report line);
+- columns=True returns each organism's AST results as parallel arrays,
+  {"drug": [...], "sir": [...], "mic": [...], "evidence_line": [...]},
+  instead of one object per row.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from agent.state import GraphState
+from services.records import ASTRecord, OptionRecord, ReportRecord
+
+
+def _default(obj: Any) -> Any:
+    # Debug payloads can hold models or other values orjson doesn't know
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def ast_rows(ast: Sequence[ASTRecord], evidence: bool = True) -> List[Dict[str, Any]]:
+    if evidence:
+        return [{"drug": r.drug, "sir": r.sir.value, "mic": r.mic, "evidence_line": r.evidence_line} for r in ast]
+    return [{"drug": r.drug, "sir": r.sir.value, "mic": r.mic} for r in ast]
+
+
+def ast_columns(ast: Sequence[ASTRecord], evidence: bool = True) -> Dict[str, list]:
+    columns = {
+        "drug": [r.drug for r in ast],
+        "sir": [r.sir.value for r in ast],
+        "mic": [r.mic for r in ast],
+    }
+    if evidence:
+        columns["evidence_line"] = [r.evidence_line for r in ast]
+    return columns
+
+
+def ranked_options(ranked: Sequence[OptionRecord]) -> List[Dict[str, Any]]:
+    return [
+        {"drug": o.drug, "score": o.score, "why": o.why, "sir_summary": o.sir_summary,
+         "mic_summary": o.mic_summary, "warnings": o.warnings}
+        for o in ranked
+    ]
+
+
+def _parsed_report(parsed: ReportRecord, evidence: bool, columns: bool) -> Dict[str, Any]:
+    # Built from the records directly: cheaper than a schema model's
+    # model_dump_json for large AST tables (and than its exclude= for evidence=False)
+    ast = ast_columns if columns else ast_rows
+    return {
+        "specimen": parsed.specimen.value,
+        "organisms": [
+            {"organism": o.organism, "ast": ast(o.ast, evidence), "notes": o.notes}
+            for o in parsed.organisms
+        ],
+        "overall_notes": parsed.overall_notes,
+    }
+
+
+def analyze_document(
+    out: GraphState,
+    debug: bool = False,
+    resume_token: Optional[str] = None,
+    evidence: bool = True,
+    columns: bool = False,
+) -> Dict[str, Any]:
+    """
+    The AnalyzeResponse document for a finished graph state, ready for
+    orjson (the recommendation embedded as a pre-serialized fragment).
+    """
+    status = out["status"]
+    return {
+        "status": getattr(status, "value", status),
+        "parsed_report": _parsed_report(out["parsed_report"], evidence, columns),
+        "ranked_options": ranked_options(out.get("ranked_options", [])),
+        "recommendation": orjson.Fragment(out["recommendation"].model_dump_json()),
+        "safety_note": out.get("safety_note"),
+        "debug": out.get("debug") if debug else None,
+        "resume_token": resume_token,
+    }
+
+
+def dumps(document: Any) -> bytes:
+    return orjson.dumps(document, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -75,6 +75,26 @@ class PatientInfo(BaseModel):
     interactions: Optional[List[str]] = Field(default=None, description="Known interacting meds if provided")
 
 
+class PatientInfoUpdate(BaseModel):
+    """
+    Body of /analyze/{token}/continue: only the PatientInfo fields being
+    supplied (typically the ones listed in missing_info).
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    age_years: Optional[int] = Field(None, ge=18)
+    sex: Optional[str] = None
+    syndrome: Optional[str] = None
+    severity: Optional[Severity] = None
+    egfr_ml_min: Optional[float] = Field(None, ge=0)
+    renal_bucket: Optional[RenalBucket] = None
+    beta_lactam_allergy: Optional[bool] = None
+    other_allergies: Optional[List[str]] = None
+    pregnancy: Optional[bool] = None
+    hepatic_impairment: Optional[bool] = None
+    interactions: Optional[List[str]] = None
+
+
 class CultureReportRequest(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -88,9 +108,11 @@ class CultureReportRequest(BaseModel):
 # ---------------------------
 # Parsed Report Models
 # ---------------------------
+# Frozen, with tuples for sequences: parse results are cached and shared
+# between requests (services/parser.py), so nodes must not be able to mutate them.
 
 class ASTResult(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
     drug: str
     sir: SIR
@@ -99,19 +121,19 @@ class ASTResult(BaseModel):
 
 
 class OrganismResult(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
     organism: str
-    ast: List[ASTResult] = Field(default_factory=list)
-    notes: Optional[List[str]] = None  # ESBL/CRE/MRSA flags if present
+    ast: Tuple[ASTResult, ...] = ()
+    notes: Optional[Tuple[str, ...]] = None  # ESBL/CRE/MRSA flags if present
 
 
 class ParsedReport(BaseModel):
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
     specimen: SpecimenType
-    organisms: List[OrganismResult] = Field(default_factory=list)
-    overall_notes: Optional[List[str]] = None
+    organisms: Tuple[OrganismResult, ...] = ()
+    overall_notes: Optional[Tuple[str, ...]] = None
 
 
 # ---------------------------
@@ -168,3 +190,6 @@ class AnalyzeResponse(BaseModel):
     recommendation: dict
     safety_note: Optional[str] = None
     debug: Optional[dict] = None
+    resume_token: Optional[str] = Field(
+        None, description="Set on needs_more_info: POST the missing fields to /analyze/{token}/continue"
+    )
@@ -9,3 +9,54 @@ LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "tr
 LANGCHAIN_PROJECT = os.getenv("LANGCHAIN_PROJECT", "AURA")
 LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY", "")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
+
+# Upper bound on reports accepted by POST /analyze/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+# How often (seconds) services/dosing.py checks dosing_table.csv for edits; 0 = every call
+DOSING_RELOAD_INTERVAL_S = float(os.getenv("DOSING_RELOAD_INTERVAL_S", "2.0"))
+
+# How often (seconds) the ranker's background watcher checks ml/models/current.json for a newly published model
+MODEL_RELOAD_INTERVAL_S = float(os.getenv("MODEL_RELOAD_INTERVAL_S", "2.0"))
+
+# Deadline (seconds) for the LLM explanation; on expiry the deterministic recommendation is returned as-is
+EXPLAIN_TIMEOUT_S = float(os.getenv("EXPLAIN_TIMEOUT_S", "8.0"))
+
+# Explanation cache (services/explain_cache.py); EXPLAIN_CACHE_DB enables the SQLite tier
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", "1024"))
+EXPLAIN_CACHE_TTL_S = float(os.getenv("EXPLAIN_CACHE_TTL_S", "86400"))
+EXPLAIN_CACHE_DB = os.getenv("EXPLAIN_CACHE_DB", "")
+
+# parse_report cache entries, keyed on normalized report text; 0 disables
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "1024"))
+
+# /analyze response cache (services/response_cache.py); size 0 disables, debug=True requests always bypass it
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL_S = float(os.getenv("RESPONSE_CACHE_TTL_S", "600"))
+
+# needs_more_info sessions (agent/sessions.py): SESSION_DB = SQLite checkpoint file (shared by workers), empty = in-memory
+SESSION_DB = os.getenv("SESSION_DB", "")
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+
+# Logging (services/logs.py): base level, per-module overrides "name=LEVEL,...", 1-in-N sampling
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "100"))
+
+# Multi-process serving: directory built by `python -m services.shared_tables`; empty = load model/CSV directly
+SHARED_TABLES_DIR = os.getenv("SHARED_TABLES_DIR", "")
+
+# Local antibiogram (services/antibiogram.py): directory built by `python -m services.antibiogram ingest`; empty = off.
+# WEIGHT blends the local %S into ranker scores: score = (1 - w) * score + w * local %S
+ANTIBIOGRAM_DIR = os.getenv("ANTIBIOGRAM_DIR", "")
+ANTIBIOGRAM_WINDOW_DAYS = int(os.getenv("ANTIBIOGRAM_WINDOW_DAYS", "365"))
+ANTIBIOGRAM_MIN_ISOLATES = int(os.getenv("ANTIBIOGRAM_MIN_ISOLATES", "30"))
+ANTIBIOGRAM_WEIGHT = float(os.getenv("ANTIBIOGRAM_WEIGHT", "0.5"))
+
+# Shadow ranking (services/shadow.py): CANDIDATE = "rules" or "model:N" (registry version), empty = off.
+# SAMPLE_RATE of ranked reports are re-ranked by the candidate in a background thread; results go to SHADOW_DB
+SHADOW_CANDIDATE = os.getenv("SHADOW_CANDIDATE", "")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.1"))
+SHADOW_DB = os.getenv("SHADOW_DB", "data/shadow.db")
+SHADOW_QUEUE_SIZE = int(os.getenv("SHADOW_QUEUE_SIZE", "1000"))
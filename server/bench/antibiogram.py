@@ -0,0 +1,139 @@
+# bench/antibiogram.py
+"""
+Cost of the local antibiogram engine (services/antibiogram.py) as the store grows.
+
+Run from server/:
+    python -m bench.antibiogram                          # 1M and 5M results
+    python -m bench.antibiogram --rows 100000 1000000 10000000 --lookups 200000
+
+For each size: ingest time, store size, time to rebuild the window from the
+store (as after a window_days change), best_rate() lookup latency over random
+keys (with rollup fallbacks and misses), one day of window advance, and, for
+contrast, one rate computed by scanning the columnar store with numpy.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.antibiogram import Antibiogram, _day_now
+
+N_ORGANISMS, N_DRUGS, N_WARDS = 40, 120, 40
+SPECIMENS = ["blood", "urine", "sputum", "wound", "other"]
+HISTORY_DAYS = 3 * 365
+
+
+def synthetic(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    n results over HISTORY_DAYS, skewed like real data (few organisms dominate).
+    Columns are object arrays over small pools of str, as a CSV reader yields.
+    """
+    rng = np.random.default_rng(seed)
+    organisms = np.array([f"organism {i}" for i in range(N_ORGANISMS)], dtype=object)
+    drugs = np.array([f"drug {i}" for i in range(N_DRUGS)], dtype=object)
+    wards = np.array([f"ward {i}" for i in range(N_WARDS)], dtype=object)
+    org_p = 1.0 / np.arange(1, N_ORGANISMS + 1)
+    return {
+        "organism": organisms[rng.choice(N_ORGANISMS, n, p=org_p / org_p.sum())],
+        "drug": drugs[rng.integers(0, N_DRUGS, n)],
+        "sir": np.array(["S", "I", "R"], dtype=object)[rng.choice(3, n, p=[0.7, 0.05, 0.25])],
+        "day": (_day_now() - rng.integers(0, HISTORY_DAYS, n)).astype(np.int32),
+        "specimen": np.array(SPECIMENS, dtype=object)[rng.integers(0, len(SPECIMENS), n)],
+        "ward": wards[rng.integers(0, N_WARDS, n)],
+    }
+
+
+def _timed(fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+def scan_rate(engine: Antibiogram, organism: str, drug: str, specimen: str) -> Optional[float]:
+    """
+    The per-request alternative: filter the whole store with numpy.
+    """
+    o, d, s = (engine.names[c].index(v) for c, v in (("organism", organism), ("drug", drug), ("specimen", specimen)))
+    start = engine.window_start
+    n_s = n_t = 0
+    for seg in engine.segments:
+        m = (seg["organism"] == o) & (seg["drug"] == d) & (seg["specimen"] == s) & (seg["day"] >= start)
+        n_t += int(m.sum())
+        n_s += int((seg["sir"][m] == 0).sum())
+    return n_s / n_t if n_t else None
+
+
+def run(n: int, lookups: int, window_days: int) -> Dict[str, float]:
+    data = synthetic(n)
+    engine = Antibiogram(window_days=window_days, min_isolates=30)
+    ingest_s = _timed(lambda: engine.ingest(
+        data["organism"], data["drug"], data["sir"], data["day"], data["specimen"], data["ward"]
+    ))
+    store_mb = sum(a.nbytes for seg in engine.segments for a in seg.values()) / 1e6
+    rebuild_s = _timed(engine.rebuild)
+
+    rng = np.random.default_rng(1)
+    keys = [
+        (f"organism {o}", f"drug {d}", SPECIMENS[s], f"ward {w}")
+        for o, d, s, w in zip(
+            rng.integers(0, N_ORGANISMS + 5, lookups),  # a few unknown organisms: misses
+            rng.integers(0, N_DRUGS, lookups),
+            rng.integers(0, len(SPECIMENS), lookups),
+            rng.integers(0, N_WARDS, lookups),
+        )
+    ]
+    best_rate = engine.best_rate
+    samples: List[int] = []
+    for key in keys:
+        t0 = time.perf_counter_ns()
+        best_rate(*key)
+        samples.append(time.perf_counter_ns() - t0)
+    samples.sort()
+    hits = sum(best_rate(*k) is not None for k in keys[:10000]) / min(lookups, 10000)
+
+    advance_s = _timed(lambda: engine.advance(engine.today + 1))
+    scan_s = statistics.median(
+        _timed(lambda: scan_rate(engine, "organism 0", f"drug {i}", "blood")) for i in range(5)
+    )
+    return {
+        "rows": n,
+        "keys": len(engine._key_ids),
+        "ingest_s": ingest_s,
+        "store_mb": store_mb,
+        "rebuild_s": rebuild_s,
+        "lookup_p50_ns": samples[len(samples) // 2],
+        "lookup_p99_ns": samples[int(len(samples) * 0.99)],
+        "hit_rate": hits,
+        "advance_day_ms": advance_s * 1000,
+        "scan_ms": scan_s * 1000,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 5_000_000])
+    ap.add_argument("--lookups", type=int, default=100_000)
+    ap.add_argument("--window-days", type=int, default=365)
+    args = ap.parse_args(argv)
+
+    header = (
+        f"{'rows':>10}{'keys':>9}{'ingest s':>10}{'store MB':>10}{'rebuild s':>11}"
+        f"{'lookup p50 ns':>15}{'p99 ns':>9}{'hit':>6}{'advance ms':>12}{'scan ms':>9}"
+    )
+    print(header)
+    for n in args.rows:
+        r = run(n, args.lookups, args.window_days)
+        print(
+            f"{r['rows']:>10}{r['keys']:>9}{r['ingest_s']:>10.2f}{r['store_mb']:>10.1f}{r['rebuild_s']:>11.2f}"
+            f"{r['lookup_p50_ns']:>15}{r['lookup_p99_ns']:>9}{r['hit_rate']:>6.0%}"
+            f"{r['advance_day_ms']:>12.2f}{r['scan_ms']:>9.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
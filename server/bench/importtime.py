@@ -0,0 +1,83 @@
+# bench/importtime.py
+"""
+Import-time profile of the API process (wraps `python -X importtime`).
+
+Run from server/:
+    python -m bench.importtime                  # top 25 modules by cumulative import time
+    python -m bench.importtime --top 50
+    python -m bench.importtime --module agent.batch
+    python -m bench.importtime --explain        # as if GROQ_API_KEY were set
+
+Exit code 1 if any of the lazily-loaded heavy modules (LLM client, pandas,
+sklearn, ...) is imported at startup; they belong to the explain / ML paths.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SERVER_DIR = Path(__file__).parent.parent
+
+# Must not be imported by `import api.main` (explain disabled)
+LAZY_MODULES = ("langchain_groq", "groq", "pandas", "sklearn", "scipy", "joblib", "numpy")
+
+
+def profile(code: str, env: Optional[Dict[str, str]] = None) -> List[Tuple[str, int, int]]:
+    """
+    Run `code` (e.g. "import api.main") in a fresh interpreter; return
+    (module, self_us, cumulative_us) for every module imported, in order.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SERVER_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code!r} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--module", default="api.main")
+    ap.add_argument("--top", type=int, default=25)
+    ap.add_argument("--explain", action="store_true", help="profile with explain enabled")
+    args = ap.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.explain:
+        env.setdefault("GROQ_API_KEY", "importtime-profile")
+    else:
+        env["GROQ_API_KEY"] = ""  # empty also beats a key from .env (load_dotenv won't override)
+
+    rows = profile(f"import {args.module}", env)
+    total = next((cum for name, _, cum in rows if name == args.module), 0)
+
+    print(f"import {args.module}: {total / 1000:.1f} ms ({len(rows)} modules)\n")
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_us, cum_us in sorted(rows, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"{cum_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    loaded = {name for name, _, _ in rows}
+    eager = [m for m in LAZY_MODULES if m in loaded]
+    if eager and not args.explain:
+        print(f"\nLoaded at import but should be lazy: {', '.join(eager)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
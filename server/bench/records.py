@@ -0,0 +1,87 @@
+# bench/records.py
+"""
+Per-request cost of the parse and rank hot path for large reports.
+
+Run from server/:
+    python -m bench.records
+    python -m bench.records --repeat 2000
+
+For reports of 30+ AST rows and several organisms, times (p50) and traces
+with tracemalloc:
+    parse      services/parser._parse on normalized text (parse cache bypassed)
+    rules      ranker._rules_rank on the parsed report
+    ml         ranker._ml_rank_batch on the parsed report (served model)
+For each stage: peak KiB allocated during one call, and the blocks and KiB
+still held by its result (what the parse cache and graph state keep alive).
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+
+from bench.synthetic import make_report
+
+
+def _median_us(fn: Callable[[], object], repeat: int) -> float:
+    for _ in range(20):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return statistics.median(samples) / 1000
+
+
+def _allocations(fn: Callable[[], object]) -> Tuple[float, int, float]:
+    """
+    (peak KiB allocated during the call, blocks and KiB still held by its result).
+    """
+    fn()  # warm lazily built tables outside the trace
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn()
+    current, peak = tracemalloc.get_traced_memory()
+    kept = sum(s.count_diff for s in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+    del result
+    return (peak - base) / 1024, kept, (current - base) / 1024
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=1000)
+    args = ap.parse_args(argv)
+
+    from api.schemas import PatientInfo
+    from services import parser, ranker
+
+    patient = PatientInfo(age_years=56, syndrome="Empiric sepsis/bacteremia", beta_lactam_allergy=False)
+    active = ranker.current_model()
+    cases = [(f"{n} drugs x {k} org", make_report(n, n_organisms=k, seed=n + k)) for n, k in
+             ((30, 1), (30, 3), (40, 4), (80, 4))]
+
+    print(f"{'report':<18}{'stage':<8}{'p50 us':>9}{'peak KiB':>10}{'kept blocks':>13}{'kept KiB':>10}")
+    for label, text in cases:
+        text = parser.normalize_report_text(text)
+        parsed = parser._parse(text)
+        stages = {
+            "parse": lambda: parser._parse(text),
+            "rules": lambda: ranker._rules_rank(parsed, patient),
+        }
+        if active.model is not None:
+            stages["ml"] = lambda: ranker._ml_rank_batch([parsed], active)[0]
+        for name, fn in stages.items():
+            us = _median_us(fn, args.repeat)
+            peak_kib, kept, kept_kib = _allocations(fn)
+            print(f"{label:<18}{name:<8}{us:>9.1f}{peak_kib:>10.1f}{kept:>13}{kept_kib:>10.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+# bench/run.py
+"""
+Latency benchmarks for the analysis pipeline.
+
+Run from server/:
+    python -m bench.run                      # run, compare against bench/baseline.json
+    python -m bench.run --out results.json   # also write machine-readable results
+    python -m bench.run --update-baseline    # accept current numbers as the new baseline
+    python -m bench.run --only parse --quick
+
+Exit code 1 if any benchmark's p50 regresses by more than --tolerance vs. the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from types import SimpleNamespace
+
+from bench.synthetic import synthetic_requests
+
+BENCH_DIR = Path(__file__).parent
+CASES_DIR = BENCH_DIR.parent / "tests" / "cases"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable[[Any], Any]
+    items: List[Any]
+    repeat: int = 50
+
+
+class _StubLLM:
+    """
+    Stands in for ChatGroq so graph timings exclude the network.
+    """
+    _response = SimpleNamespace(content="Stub explanation for benchmarking.")
+
+    def invoke(self, messages):
+        return self._response
+
+    async def ainvoke(self, messages):
+        return self._response
+
+
+# ---------------------------
+# Corpus
+# ---------------------------
+
+def load_requests() -> Dict[str, List[Dict[str, Any]]]:
+    corpus = []
+    for f in sorted(CASES_DIR.glob("*.json")):
+        with open(f, "r", encoding="utf-8") as fp:
+            corpus.append(json.load(fp)["request"])
+    return {"corpus": corpus, "synthetic": synthetic_requests()}
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+
+def collect() -> List[Benchmark]:
+    import agent.nodes.explain as explain
+    from agent.graph import build_graph
+    from agent.state import GraphState
+    from api.schemas import CultureReportRequest
+    from services import ranker
+    from services.dosing import build_regimen_package
+    from services.explain_cache import ExplanationCache
+    from services.response_cache import ResponseCache
+    from services import parser
+    from services.cache import TTLCache
+    from services.parser import parse_report
+
+    explain.llm = _StubLLM()
+    explain.EXPLANATION_CACHE = ExplanationCache(maxsize=0, ttl_s=None)  # always exercise the LLM path
+    parser._PARSE_CACHE = TTLCache(0)  # always parse; parse_report.cached measures hits
+
+    from fastapi.testclient import TestClient
+    import api.main as api_main
+    client = TestClient(api_main.app)
+    no_cache, replay_cache = ResponseCache(0, None), ResponseCache(4096, None)
+
+    def analyze(r, cache):
+        api_main.RESPONSE_CACHE = cache
+        return client.post("/analyze", json=r)
+    graph = build_graph(use_explain=True)
+
+    benches: List[Benchmark] = []
+    for label, reqs in load_requests().items():
+        payloads = [CultureReportRequest(**r) for r in reqs]
+        texts = [p.report_text for p in payloads]
+        parsed = [(parse_report(p.report_text), p.patient) for p in payloads]
+        ranked = [[o.drug for o in ranker.rank_options(pr, pt)] for pr, pt in parsed]
+
+        def cached_parse(text, cache=TTLCache(1024)):
+            uncached, parser._PARSE_CACHE = parser._PARSE_CACHE, cache
+            try:
+                return parse_report(text)
+            finally:
+                parser._PARSE_CACHE = uncached
+
+        def sklearn_rank(item):
+            active = ranker.current_model()
+            ranker._ACTIVE = active._replace(scorer=None)
+            try:
+                return ranker._ml_rank(*item)
+            finally:
+                ranker._ACTIVE = active
+
+        benches += [
+            Benchmark(f"parse_report[{label}]", parse_report, texts),
+            Benchmark(f"parse_report.cached[{label}]", cached_parse, texts),
+            Benchmark(f"rank_options.ml[{label}]", lambda it: ranker._ml_rank(*it), parsed),
+            Benchmark(f"rank_options.ml_sklearn[{label}]", sklearn_rank, parsed, repeat=10),
+            Benchmark(f"rank_options.rules[{label}]", lambda it: ranker._rules_rank(*it), parsed),
+            Benchmark(
+                f"build_regimen_package[{label}]",
+                lambda it: build_regimen_package(it[0], it[1]),
+                [(drugs, pt) for drugs, (_, pt) in zip(ranked, parsed)],
+            ),
+            Benchmark(
+                f"graph.invoke[{label}]",
+                lambda p: graph.invoke(GraphState(payload=p, debug={})),
+                payloads,
+                repeat=20,
+            ),
+            Benchmark(
+                f"api.analyze[{label}]",
+                lambda r: analyze(r, no_cache),
+                reqs,
+                repeat=10,
+            ),
+            Benchmark(
+                f"api.analyze_replay[{label}]",
+                lambda r: analyze({**r, "debug": False}, replay_cache),
+                reqs,
+                repeat=10,
+            ),
+        ]
+    return benches
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+
+def run_one(bench: Benchmark, repeat_scale: float) -> Dict[str, Any]:
+    repeat = max(2, int(bench.repeat * repeat_scale))
+
+    for item in bench.items:  # warm-up: lazy loads, caches, JIT-free but import-heavy paths
+        bench.fn(item)
+
+    samples: List[int] = []
+    for _ in range(repeat):
+        for item in bench.items:
+            t0 = time.perf_counter_ns()
+            bench.fn(item)
+            samples.append(time.perf_counter_ns() - t0)
+
+    samples.sort()
+    us = [s / 1000 for s in samples]
+    return {
+        "n": len(us),
+        "mean_us": round(statistics.fmean(us), 2),
+        "p50_us": round(us[len(us) // 2], 2),
+        "p95_us": round(us[min(len(us) - 1, int(len(us) * 0.95))], 2),
+        "min_us": round(us[0], 2),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    regressions = []
+    base = baseline.get("benchmarks", {})
+    print(f"\n{'benchmark':<44}{'p50 us':>12}{'baseline':>12}{'ratio':>8}")
+    for name, cur in results["benchmarks"].items():
+        ref = base.get(name)
+        if ref is None:
+            print(f"{name:<44}{cur['p50_us']:>12.1f}{'-':>12}{'new':>8}")
+            continue
+        ratio = cur["p50_us"] / ref["p50_us"] if ref["p50_us"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<44}{cur['p50_us']:>12.1f}{ref['p50_us']:>12.1f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", default=str(BASELINE_PATH))
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.40, help="allowed p50 slowdown (0.40 = +40%%)")
+    ap.add_argument("--only", help="run benchmarks whose name contains this substring")
+    ap.add_argument("--quick", action="store_true", help="fewer repetitions (smoke run)")
+    args = ap.parse_args(argv)
+
+    benches = collect()
+    if args.only:
+        benches = [b for b in benches if args.only in b.name]
+
+    results: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for bench in benches:
+        stats = run_one(bench, 0.2 if args.quick else 1.0)
+        results["benchmarks"][bench.name] = stats
+        print(f"{bench.name:<44}p50 {stats['p50_us']:>10.1f} us   p95 {stats['p95_us']:>10.1f} us")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.update_baseline:
+        Path(args.baseline).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline written: {args.baseline}")
+        return 0
+
+    if not Path(args.baseline).exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond +{args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# bench/serialize.py
+"""
+Per-request cost of turning a finished analysis into /analyze response bytes.
+
+Run from server/:
+    python -m bench.serialize
+    python -m bench.serialize --repeat 2000
+
+Compares, for reports of growing antibiogram size:
+    pydantic   AnalyzeResponse built from model_dump() dicts, then dumped,
+               re-validated and serialized as FastAPI's response_model
+               handling did (the old path)
+    orjson     api/responses.py: records written as plain dicts, the
+               recommendation dumped once by pydantic-core, one orjson document
+plus the opt-in reductions (no evidence lines, columnar AST). Graph time is
+excluded: every variant serializes the same precomputed states.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Callable, List, Optional
+
+from bench.synthetic import make_report, make_request
+
+
+def _median_us(fn: Callable[[], object], repeat: int) -> float:
+    for _ in range(20):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    return statistics.median(samples) / 1000
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    import api.main as api_main
+    from agent.batch import run_batch
+    from api.responses import analyze_document, dumps
+    from pydantic import TypeAdapter
+
+    from api.schemas import AnalyzeResponse, CultureReportRequest
+
+    adapter = TypeAdapter(AnalyzeResponse)
+
+    def pydantic_path(out, payload) -> bytes:
+        response = api_main._to_response(out, payload)
+        return adapter.dump_json(adapter.validate_python(response.model_dump()), by_alias=True)
+
+    cases = [(f"{n} drugs x {k} org", make_report(n, n_organisms=k, seed=n + k)) for n, k in
+             ((10, 1), (40, 1), (80, 1), (40, 3), (80, 3))]
+    variants = {
+        "pydantic": lambda out, p: pydantic_path(out, p),
+        "orjson": lambda out, p: dumps(analyze_document(out)),
+        "orjson -evidence": lambda out, p: dumps(analyze_document(out, evidence=False)),
+        "orjson columns": lambda out, p: dumps(analyze_document(out, columns=True)),
+        "orjson columns -ev": lambda out, p: dumps(analyze_document(out, evidence=False, columns=True)),
+    }
+
+    print(f"{'report':<18}{'variant':<20}{'p50 us':>9}{'speedup':>9}{'bytes':>8}")
+    for label, text in cases:
+        payload = CultureReportRequest(**make_request(text))
+        (out,) = run_batch([payload])
+        base = None
+        for name, fn in variants.items():
+            us = _median_us(lambda: fn(out, payload), args.repeat)
+            base = base or us
+            print(f"{label:<18}{name:<20}{us:>9.1f}{base / us:>8.1f}x{len(fn(out, payload)):>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
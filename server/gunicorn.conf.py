@@ -0,0 +1,60 @@
+# gunicorn.conf.py
+"""
+Multi-process serving: one gunicorn master, N uvicorn workers.
+
+Run from server/ (gunicorn picks this file up automatically):
+    gunicorn api.main:app
+    WEB_CONCURRENCY=8 BIND=0.0.0.0:9000 gunicorn api.main:app
+
+What the master does before forking:
+1. Builds (or refreshes) the shared tables in SHARED_TABLES_DIR
+   (default data/shared): FastScorer weights as .npy, the dosing index as
+   pre-normalized rows. See services/shared_tables.py.
+2. Imports the app (preload_app) and loads the scorer + dosing index once,
+   so workers inherit them copy-on-write; gc.freeze() keeps the GC from
+   touching (and un-sharing) those pages.
+
+Workers never import sklearn/pandas or unpickle model.joblib. Each one still
+runs the lifespan warm-up (dummy inference) before /ready turns 200.
+"""
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("SHARED_TABLES_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "shared"))
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+
+def _preload():
+    import subprocess
+    import sys
+
+    # Build in a child process: it unpickles model.joblib (sklearn), which
+    # the master, and therefore every forked worker, should never import
+    subprocess.run(
+        [sys.executable, "-m", "services.shared_tables", "--dir", os.environ["SHARED_TABLES_DIR"]],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        check=True,
+    )
+
+    from services import dosing, ranker
+
+    ranker._load_model()
+    dosing._load_dosing_table()
+
+
+# Runs when gunicorn reads this file, i.e. before preload_app imports api.main
+_preload()
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the GC's reach so collections
+    # in the workers don't write to (and copy) the inherited pages
+    gc.freeze()
@@ -1,30 +1,49 @@
 # ml/evaluate.py
+"""
+Evaluate ml/model.joblib on the processed susceptibility table.
+
+Run from server/:
+    python -m ml.evaluate              # aggregated (default)
+    python -m ml.evaluate --per-row    # predict every isolate row
+
+The aggregated path scores each (organism, drug) combination once and
+weights the metrics by its isolate counts; the numbers are the same as the
+per-row path.
+"""
+import argparse
+
 import joblib
-import pandas as pd
+import numpy as np
 from sklearn.metrics import (
     roc_auc_score,
     confusion_matrix,
     classification_report,
 )
 
-MODEL_PATH = "ml/model.joblib"
-DATA_PATH = "data/processed/susceptibility.csv"
+from ml.train import FEATURES, MODEL_PATH, aggregate, load_processed, normalize, weighted_rows
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--per-row", action="store_true", help="predict isolate rows instead of aggregated counts")
+    args = ap.parse_args(argv)
 
-def main():
     model = joblib.load(MODEL_PATH)
-    df = pd.read_csv(DATA_PATH)
+    df = normalize(load_processed())
 
-    X = df[["organism", "drug"]]
-    y = df["sir"].map({"S": 1, "I": 0, "R": 0})
+    if args.per_row:
+        X, y, w = df[FEATURES], df["y"], None
+    else:
+        X, y, w = weighted_rows(aggregate(df))
 
     probs = model.predict_proba(X)[:, 1]
     preds = (probs >= 0.5).astype(int)
 
-    print("ROC-AUC:", roc_auc_score(y, probs))
+    print("ROC-AUC:", roc_auc_score(y, probs, sample_weight=w))
     print("\nConfusion Matrix:")
-    print(confusion_matrix(y, preds))
+    print(np.rint(confusion_matrix(y, preds, sample_weight=w)).astype(int))
     print("\nClassification Report:")
-    print(classification_report(y, preds))
+    print(classification_report(y, preds, sample_weight=w))
 
 if __name__ == "__main__":
     main()
@@ -1,11 +1,35 @@
 # ml/prepare_data.py
+"""
+Convert raw BV-BRC AMR exports into the processed susceptibility table
+(organism, drug, sir, mic) used by train.py and evaluate.py.
+
+Run from server/:
+    python -m ml.prepare_data
+    python -m ml.prepare_data data/raw/BVBRC_E.coli_Dataset.csv "data/raw/kleb.csv=klebsiella pneumoniae"
+    python -m ml.prepare_data data/raw/*.csv --out data/processed/susceptibility.parquet
+
+Each input is FILE or FILE=ORGANISM. The organism comes from, in order:
+the =ORGANISM suffix, the export's "Genome Name" column (genus + species),
+--organism (default: escherichia coli).
+
+Files are streamed in --chunksize rows, reading only the needed columns
+as categoricals; normalization runs on the categories rather than on
+every row, and the MIC string is built with vectorized string ops. Each
+chunk is appended to the Parquet output as a row group (a .csv --out is
+also supported), so memory stays flat for multi-GB exports.
+"""
 from __future__ import annotations
 
-import pandas as pd
+import argparse
 from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
 
 RAW_PATH = Path("data/raw/BVBRC_E.coli_Dataset.csv")
-OUT_PATH = Path("data/processed/susceptibility.csv")
+OUT_PATH = Path("data/processed/susceptibility.parquet")
+DEFAULT_ORGANISM = "escherichia coli"
+CHUNKSIZE = 500_000
 
 # Map BV-BRC phenotype strings -> S/I/R
 PHENOTYPE_MAP = {
@@ -17,76 +41,204 @@ PHENOTYPE_MAP = {
     "SUSCEPTIBLE-DOSE DEPENDENT": "I",     # often SDD ~ closer to I in decisions
 }
 
-def main():
-    if not RAW_PATH.exists():
-        raise FileNotFoundError(
-            f"Raw BV-BRC dataset not found at {RAW_PATH}. "
-            f"Put your file there with the exact name: BVBRC_E.coli_Dataset.csv"
-        )
+REQUIRED_COLS = ["Antibiotic", "Resistant Phenotype"]
+MIC_COLS = ["Measurement Sign", "Measurement Value", "Measurement Unit"]
+GENOME_COL = "Genome Name"
+
+# Raw dtypes: low-cardinality columns as categoricals
+RAW_DTYPES = {
+    "Antibiotic": "category",
+    "Resistant Phenotype": "category",
+    "Measurement Sign": "category",
+    "Measurement Value": "str",
+    "Measurement Unit": "category",
+    GENOME_COL: "category",
+}
+
+OUT_COLUMNS = ["organism", "drug", "sir", "mic"]
+
+
+# ---------------------------
+# Transform
+# ---------------------------
+
+def map_categories(col: pd.Series, fn) -> pd.Series:
+    """
+    Apply a vectorized transform to a categorical's categories (one value per
+    distinct string) and expand it back to rows through the codes.
+    """
+    col = col.astype("category")
+    cats = col.cat.categories
+    return col.map(dict(zip(cats, fn(pd.Series(cats, dtype="str")))))
 
-    df = pd.read_csv(RAW_PATH, low_memory=False)
-    print("Original columns:", df.columns.tolist())
-
-    required = ["Antibiotic", "Resistant Phenotype"]
-    for c in required:
-        if c not in df.columns:
-            raise ValueError(f"Missing required column: {c}")
-
-    # Keep only required columns + optional MIC components
-    cols = ["Antibiotic", "Resistant Phenotype"]
-    mic_cols = ["Measurement Sign", "Measurement Value", "Measurement Unit"]
-    for c in mic_cols:
-        if c in df.columns:
-            cols.append(c)
-
-    clean = df[cols].copy()
-
-    # Normalize fields
-    clean["drug"] = clean["Antibiotic"].astype(str).str.strip().str.lower()
-    clean["phenotype"] = clean["Resistant Phenotype"].astype(str).str.strip().str.upper()
-
-    # Map phenotype -> sir
-    clean["sir"] = clean["phenotype"].map(PHENOTYPE_MAP)
-
-    # Drop rows that don't map cleanly
-    clean = clean.dropna(subset=["sir", "drug"]).copy()
-
-    # Force organism constant (this dataset is E. coli)
-    clean["organism"] = "escherichia coli"
-
-    # Optional MIC string (if the dataset has it)
-    if all(c in clean.columns for c in mic_cols):
-        def build_mic(row):
-            sign = str(row.get("Measurement Sign", "")).strip()
-            val = str(row.get("Measurement Value", "")).strip()
-            unit = str(row.get("Measurement Unit", "")).strip()
-
-            if val == "" or val.lower() == "nan":
-                return ""
-            if sign.lower() == "nan":
-                sign = ""
-            if unit.lower() == "nan":
-                unit = ""
-            # Example: "> 32 mg/L"
-            parts = [p for p in [sign, val] if p]
-            mic = " ".join(parts)
-            if unit:
-                mic = f"{mic} {unit}"
-            return mic.strip()
-
-        clean["mic"] = clean.apply(build_mic, axis=1)
-    else:
-        clean["mic"] = ""
 
-    # Output columns in your standard format
-    out = clean[["organism", "drug", "sir", "mic"]].copy()
+def _text(col: pd.Series) -> pd.Series:
+    # Nulls masked explicitly: pandas < 3 casts them to the string "nan"
+    return col.astype("str").where(col.notna(), "").str.strip()
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    out.to_csv(OUT_PATH, index=False)
 
-    print("Saved processed dataset:", OUT_PATH)
-    print(out.head(10))
-    print("sir value counts:\n", out["sir"].value_counts())
+def build_mic(sign: pd.Series, value: pd.Series, unit: pd.Series) -> pd.Series:
+    """
+    Vectorized "sign value unit" (e.g. "> 32 mg/L"); empty when value is missing.
+    """
+    sign, value, unit = _text(sign), _text(value), _text(unit)
+
+    mic = (sign + " " + value).str.strip()
+    mic = mic.where(unit == "", mic + " " + unit)
+    return mic.where(value != "", "")
+
+
+def transform(chunk: pd.DataFrame, organism: Optional[str]) -> pd.DataFrame:
+    """
+    One raw chunk -> (organism, drug, sir, mic) rows with a known S/I/R.
+    """
+    drug = map_categories(chunk["Antibiotic"], lambda s: s.str.strip().str.lower())
+    sir = map_categories(
+        chunk["Resistant Phenotype"], lambda s: s.str.strip().str.upper().map(PHENOTYPE_MAP)
+    )
+
+    if organism is None:
+        # "Escherichia coli strain K-12" -> "escherichia coli"
+        org = map_categories(
+            chunk[GENOME_COL],
+            lambda s: s.str.strip().str.lower().str.split().str[:2].str.join(" "),
+        )
+    else:
+        org = pd.Series(organism, index=chunk.index)
+
+    if all(c in chunk.columns for c in MIC_COLS):
+        mic = build_mic(*(chunk[c] for c in MIC_COLS))
+    else:
+        mic = pd.Series("", index=chunk.index)
+
+    out = pd.DataFrame({"organism": org, "drug": drug, "sir": sir, "mic": mic})
+    out = out.dropna(subset=["organism", "drug", "sir"])
+    for c in ("organism", "drug", "sir"):
+        out[c] = out[c].astype("category")
+    return out
+
+
+# ---------------------------
+# Read / write
+# ---------------------------
+
+def _header(path: Path) -> List[str]:
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def read_chunks(path: Path, organism: Optional[str], chunksize: int = CHUNKSIZE) -> Iterator[pd.DataFrame]:
+    columns = _header(path)
+    for c in REQUIRED_COLS:
+        if c not in columns:
+            raise ValueError(f"{path}: missing required column: {c}")
+    if organism is None and GENOME_COL not in columns:
+        raise ValueError(f"{path}: no {GENOME_COL!r} column; pass FILE=ORGANISM or --organism")
+
+    usecols = [c for c in RAW_DTYPES if c in columns and (c != GENOME_COL or organism is None)]
+    reader = pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={c: RAW_DTYPES[c] for c in usecols},
+        chunksize=chunksize,
+    )
+    for chunk in reader:
+        yield transform(chunk, organism)
+
+
+def parse_input(spec: str, default_organism: Optional[str]) -> Tuple[Path, Optional[str]]:
+    """
+    "FILE" or "FILE=ORGANISM". Without a suffix the organism is taken from the
+    Genome Name column when the file has one, else default_organism.
+    """
+    path, _, organism = spec.partition("=")
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Raw BV-BRC dataset not found at {path}. "
+            f"Put your export there (default name: {RAW_PATH.name})"
+        )
+    if organism:
+        return path, organism.strip().lower()
+    if GENOME_COL in _header(path):
+        return path, None
+    return path, default_organism
+
+
+class _ParquetOut:
+    def __init__(self, path: Path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        cat = pa.dictionary(pa.int32(), pa.string())
+        self.schema = pa.schema([("organism", cat), ("drug", cat), ("sir", cat), ("mic", pa.string())])
+        self.tmp = path.with_name(path.name + ".tmp")
+        self.path = path
+        self._writer = pq.ParquetWriter(self.tmp, self.schema)
+
+    def write(self, df: pd.DataFrame) -> None:
+        self._writer.write_table(self._pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self) -> None:
+        self._writer.close()
+        self.tmp.replace(self.path)  # readers never see a half-written table
+
+
+class _CsvOut:
+    def __init__(self, path: Path):
+        self.tmp = path.with_name(path.name + ".tmp")
+        self.path = path
+        self._header = True
+        self.tmp.unlink(missing_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.tmp, mode="a", header=self._header, index=False)
+        self._header = False
+
+    def close(self) -> None:
+        if self._header:
+            pd.DataFrame(columns=OUT_COLUMNS).to_csv(self.tmp, index=False)
+        self.tmp.replace(self.path)
+
+
+def prepare(
+    inputs: List[Tuple[Path, Optional[str]]],
+    out_path: Path = OUT_PATH,
+    chunksize: int = CHUNKSIZE,
+) -> pd.Series:
+    """
+    Stream all inputs into out_path; returns S/I/R counts.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    sink = _CsvOut(out_path) if out_path.suffix == ".csv" else _ParquetOut(out_path)
+    counts = pd.Series(dtype="int64")
+
+    for path, organism in inputs:
+        rows = 0
+        for df in read_chunks(path, organism, chunksize):
+            sink.write(df)
+            counts = counts.add(df["sir"].value_counts(), fill_value=0)
+            rows += len(df)
+        print(f"{path}: {rows} rows")
+
+    sink.close()
+    return counts.reindex(["S", "I", "R"], fill_value=0).astype("int64")
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("inputs", nargs="*", default=[str(RAW_PATH)], help="FILE or FILE=ORGANISM")
+    ap.add_argument("--out", type=Path, default=OUT_PATH, help=".parquet (default) or .csv")
+    ap.add_argument("--organism", default=DEFAULT_ORGANISM, help="for files without a Genome Name column")
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    args = ap.parse_args(argv)
+
+    inputs = [parse_input(spec, args.organism.strip().lower()) for spec in args.inputs]
+    counts = prepare(inputs, args.out, args.chunksize)
+
+    print("Saved processed dataset:", args.out)
+    print("sir value counts:\n", counts)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,149 @@
+# ml/registry.py
+"""
+Versioned model registry, written by train.py and update.py.
+
+Run from server/:
+    python -m ml.registry list          # versions, newest last; * = current
+    python -m ml.registry promote 12    # serve version 12 (rollback)
+
+Layout of ml/models/:
+    model-NNNN.joblib    the fitted pipeline
+    model-NNNN.json      its metadata: version, created_at, source, data_sha256
+                         of the (organism, drug, n_S, n_total) table it was
+                         trained from, auc (+ auc_on), features, n_isolates
+    current.json         metadata of the version being served
+
+register() writes the artifact and its metadata, copies the artifact to
+ml/model.joblib (read by evaluate.py and services/shared_tables.py), and
+replaces current.json last, atomically. Servers watch current.json
+(services/ranker.py) and swap the model in the background.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+
+from ml.train import FEATURES, MODEL_PATH
+
+REGISTRY_DIR = Path(__file__).parent / "models"
+CURRENT = "current.json"
+
+
+def data_sha256(counts: pd.DataFrame) -> str:
+    """
+    Order-independent hash of an aggregated (organism, drug, n_S, n_total) table.
+    """
+    table = counts[[*FEATURES, "n_S", "n_total"]].astype({"organism": str, "drug": str})
+    table = table.sort_values(FEATURES).reset_index(drop=True)
+    return hashlib.sha256(table.to_csv(index=False).encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _artifact(registry_dir: Path, version: int) -> Path:
+    return registry_dir / f"model-{version:04d}.joblib"
+
+
+def versions(registry_dir: Path = REGISTRY_DIR) -> List[Dict[str, Any]]:
+    """
+    Metadata of every registered version, oldest first.
+    """
+    return sorted(
+        (json.loads(p.read_text(encoding="utf-8")) for p in registry_dir.glob("model-*.json")),
+        key=lambda m: m["version"],
+    )
+
+
+def current(registry_dir: Path = REGISTRY_DIR) -> Optional[Dict[str, Any]]:
+    path = registry_dir / CURRENT
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def next_version(registry_dir: Path = REGISTRY_DIR) -> int:
+    return max((m["version"] for m in versions(registry_dir)), default=0) + 1
+
+
+def promote(version: int, registry_dir: Path = REGISTRY_DIR, model_path: Path = MODEL_PATH) -> Dict[str, Any]:
+    """
+    Make `version` the served model: copy it to model_path, then point current.json at it.
+    """
+    meta_path = registry_dir / f"model-{version:04d}.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"model version {version} is not in {registry_dir}")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+
+    tmp = model_path.with_name(model_path.name + ".tmp")
+    shutil.copyfile(_artifact(registry_dir, version), tmp)
+    os.replace(tmp, model_path)
+    _write_atomic(registry_dir / CURRENT, json.dumps(meta, indent=1))
+    return meta
+
+
+def register(
+    model,
+    counts: pd.DataFrame,
+    source: str,
+    auc: Optional[float] = None,
+    auc_on: Optional[str] = None,
+    registry_dir: Path = REGISTRY_DIR,
+    model_path: Path = MODEL_PATH,
+) -> Dict[str, Any]:
+    """
+    Store a new version with its metadata and promote it. `counts` is the
+    aggregated table the model was trained from (train.aggregate).
+    """
+    registry_dir.mkdir(parents=True, exist_ok=True)
+    version = next_version(registry_dir)
+    meta = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": source,
+        "data_sha256": data_sha256(counts),
+        "auc": auc,
+        "auc_on": auc_on,
+        "features": list(FEATURES),
+        "n_isolates": int(counts["n_total"].sum()),
+    }
+    joblib.dump(model, _artifact(registry_dir, version))
+    _write_atomic(registry_dir / f"model-{version:04d}.json", json.dumps(meta, indent=1))
+    return promote(version, registry_dir, model_path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="registered versions")
+    p = sub.add_parser("promote", help="serve an earlier (or later) version")
+    p.add_argument("version", type=int)
+    args = ap.parse_args(argv)
+
+    if args.command == "promote":
+        meta = promote(args.version)
+        print(f"Serving model-{meta['version']:04d} (created {meta['created_at']})")
+        return
+
+    served = (current() or {}).get("version")
+    for m in versions():
+        auc = "-" if m["auc"] is None else f"{m['auc']:.4f} ({m['auc_on']})"
+        mark = "*" if m["version"] == served else " "
+        print(f"{mark} {m['version']:>4}  {m['created_at']}  {m['source']:<7} auc {auc:<24} "
+              f"n={m['n_isolates']}  data {m['data_sha256'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
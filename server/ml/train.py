@@ -1,8 +1,31 @@
 # ml/train.py
+"""
+Train the susceptibility model: P(S | organism, drug), one-hot + logistic regression.
+
+Run from server/:
+    python -m ml.train              # aggregated (default)
+    python -m ml.train --per-row    # fit on every isolate row (original path)
+
+The only features are organism and drug, so the isolate rows collapse to
+one (organism, drug, n_S, n_total) line per combination. The aggregated
+mode fits two weighted rows per combination (y=1 with weight n_S, y=0 with
+weight n_total - n_S), which is the same log-loss as the per-row fit, and
+reports ROC-AUC with the counts as sample weights. The 80/20 stratified
+split is drawn on the counts (multivariate hypergeometric per class), i.e.
+the same random isolate split without materializing the rows.
+
+The model is registered as a new version in ml/models (ml/registry.py)
+with its holdout AUC and the hash of the training data, and served from
+there.
+"""
 from __future__ import annotations
 
-import os
-import joblib
+import argparse
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
 import pandas as pd
 
 from sklearn.model_selection import train_test_split
@@ -12,39 +35,97 @@ from sklearn.pipeline import Pipeline
 from sklearn.metrics import roc_auc_score, classification_report
 from sklearn.linear_model import LogisticRegression
 
-MODEL_PATH = "ml/model.joblib"
+from ml.prepare_data import map_categories
+
+MODEL_PATH = Path(__file__).parent / "model.joblib"
+DATA_PATH = Path("data/processed/susceptibility.parquet")  # written by ml/prepare_data.py
+LEGACY_DATA_PATH = Path("data/processed/susceptibility.csv")
+FEATURES = ["organism", "drug"]
+
 
-def main():
-    df = pd.read_csv("data/processed/susceptibility.csv")
+def load_processed() -> pd.DataFrame:
+    if DATA_PATH.exists():
+        return pd.read_parquet(DATA_PATH, columns=["organism", "drug", "sir"])
+    return pd.read_csv(LEGACY_DATA_PATH, usecols=["organism", "drug", "sir"])
 
-    # ---- normalize ----
-    df["organism"] = df["organism"].astype(str).str.strip().str.lower()
-    df["drug"] = df["drug"].astype(str).str.strip().str.lower()
-    df["sir"] = df["sir"].astype(str).str.strip().str.upper()
+
+def normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Lower/upper-case the fields, keep S/I/R rows, add y = 1 for S.
+    """
+    df = df.copy()
+    df["organism"] = map_categories(df["organism"], lambda s: s.str.strip().str.lower())
+    df["drug"] = map_categories(df["drug"], lambda s: s.str.strip().str.lower())
+    df["sir"] = map_categories(df["sir"], lambda s: s.str.strip().str.upper())
 
     # ---- label: susceptible vs not ----
     df = df[df["sir"].isin(["S", "R", "I"])].copy()
     df["y"] = df["sir"].map({"S": 1, "I": 0, "R": 0}).astype(int)
+    return df
 
-    X = df[["organism", "drug"]]
-    y = df["y"]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+def aggregate(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalized rows -> one (organism, drug, n_S, n_total) row per combination.
+    """
+    return (
+        df.groupby(FEATURES, observed=True, sort=True)["y"]
+        .agg(n_S="sum", n_total="size")
+        .reset_index()
     )
 
-    # ---- pipeline ----
+
+def weighted_rows(agg: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Counts -> (X, y, sample_weight) with one y=1 and one y=0 row per
+    combination; zero-weight rows are dropped.
+    """
+    X = pd.concat([agg[FEATURES], agg[FEATURES]], ignore_index=True)
+    y = np.r_[np.ones(len(agg), dtype=int), np.zeros(len(agg), dtype=int)]
+    w = np.r_[agg["n_S"].to_numpy(), (agg["n_total"] - agg["n_S"]).to_numpy()].astype(float)
+    keep = w > 0
+    return X[keep].reset_index(drop=True), y[keep], w[keep]
+
+
+def split_counts(agg: pd.DataFrame, test_size: float = 0.2, seed: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Stratified isolate-level split done on the counts: draws round(test_size * n)
+    S isolates and non-S isolates without replacement across combinations.
+    """
+    rng = np.random.default_rng(seed)
+    n_s = agg["n_S"].to_numpy()
+    n_ns = (agg["n_total"] - agg["n_S"]).to_numpy()
+
+    test_s = rng.multivariate_hypergeometric(n_s, int(round(test_size * n_s.sum())))
+    test_ns = rng.multivariate_hypergeometric(n_ns, int(round(test_size * n_ns.sum())))
+
+    test = agg[FEATURES].assign(n_S=test_s, n_total=test_s + test_ns)
+    train = agg[FEATURES].assign(n_S=n_s - test_s, n_total=n_s + n_ns - test_s - test_ns)
+    return train[train["n_total"] > 0], test[test["n_total"] > 0]
+
+
+def build_pipeline() -> Pipeline:
     pre = ColumnTransformer(
         transformers=[
-            ("cat", OneHotEncoder(handle_unknown="ignore"), ["organism", "drug"]),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), FEATURES),
         ],
         remainder="drop",
     )
 
     clf = LogisticRegression(max_iter=200)
 
-    pipe = Pipeline([("pre", pre), ("clf", clf)])
+    return Pipeline([("pre", pre), ("clf", clf)])
+
+
+def train_per_row(df: pd.DataFrame) -> Tuple[Pipeline, float]:
+    X = df[FEATURES]
+    y = df["y"]
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
 
+    pipe = build_pipeline()
     pipe.fit(X_train, y_train)
 
     # ---- eval ----
@@ -54,10 +135,44 @@ def main():
 
     preds = (probs >= 0.5).astype(int)
     print(classification_report(y_test, preds))
+    return pipe, float(auc)
+
+
+def train_aggregated(df: pd.DataFrame) -> Tuple[Pipeline, float]:
+    agg = aggregate(df)
+    print(f"Aggregated {len(df)} rows into {len(agg)} (organism, drug) combinations")
+    train, test = split_counts(agg)
+
+    pipe = build_pipeline()
+    X_train, y_train, w_train = weighted_rows(train)
+    pipe.fit(X_train, y_train, clf__sample_weight=w_train)
+
+    # ---- eval (weighted: each row stands for w isolates) ----
+    X_test, y_test, w_test = weighted_rows(test)
+    probs = pipe.predict_proba(X_test)[:, 1]
+    auc = roc_auc_score(y_test, probs, sample_weight=w_test)
+    print("ROC-AUC:", auc)
+
+    preds = (probs >= 0.5).astype(int)
+    print(classification_report(y_test, preds, sample_weight=w_test))
+    return pipe, float(auc)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--per-row", action="store_true", help="fit on isolate rows instead of aggregated counts")
+    args = ap.parse_args(argv)
+
+    df = normalize(load_processed())
+
+    started = time.perf_counter()
+    pipe, auc = train_per_row(df) if args.per_row else train_aggregated(df)
+    print(f"Trained in {time.perf_counter() - started:.2f}s")
+
+    from ml.registry import register  # imports this module; only needed when run as a script
 
-    os.makedirs("ml", exist_ok=True)
-    joblib.dump(pipe, MODEL_PATH)
-    print("Saved:", MODEL_PATH)
+    meta = register(pipe, aggregate(df), "train", auc, "holdout")
+    print(f"Saved: ml/models/model-{meta['version']:04d}.joblib -> {MODEL_PATH}")
 
 
 if __name__ == "__main__":
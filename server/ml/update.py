@@ -0,0 +1,195 @@
+# ml/update.py
+"""
+Incremental model update from new local susceptibility results.
+
+Run from server/:
+    python -m ml.update data/local/2026-10-17.csv            # fold in a batch, refit, publish
+    python -m ml.update data/local/*.csv --decay 0.98        # down-weight older results per batch
+    python -m ml.update --init                               # (re)seed counts from the full history
+
+A batch is a CSV or Parquet table with organism, drug, sir columns (the
+processed format written by prepare_data.py). The state in ml/counts.json
+holds the sufficient statistics of the model, n_S and n_total per
+(organism, drug), plus the hashes of the batches already applied, so
+re-running on the same file is a no-op. The first run seeds the counts from
+data/processed (train.load_processed).
+
+Each run refits the aggregated model on the updated counts (the same fit
+as train.py, in milliseconds) and publishes it:
+1. a new version in the registry (ml/registry.py), with the AUC of the
+   previous model on the new batches; running servers swap it in within
+   MODEL_RELOAD_INTERVAL_S (services/ranker.py)
+2. ml/counts.json, replaced atomically, last: a crash before this step
+   just re-applies the batch on the next run.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import joblib
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+
+from ml.registry import REGISTRY_DIR, register
+from ml.train import FEATURES, MODEL_PATH, aggregate, build_pipeline, load_processed, normalize, weighted_rows
+
+COUNTS_PATH = Path(__file__).parent / "counts.json"
+
+
+# ---------------------------
+# State
+# ---------------------------
+
+def empty_state() -> Dict[str, Any]:
+    return {"version": 0, "batches": [], "counts": []}
+
+
+def load_state(path: Path = COUNTS_PATH) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_state(state: Dict[str, Any], path: Path = COUNTS_PATH) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def counts_frame(state: Dict[str, Any]) -> pd.DataFrame:
+    return pd.DataFrame(state["counts"], columns=[*FEATURES, "n_S", "n_total"])
+
+
+def seed_state(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Initial state from the full (normalized) history.
+    """
+    state = empty_state()
+    state["counts"] = aggregate(df).astype({"organism": str, "drug": str}).values.tolist()
+    state["batches"].append({"source": "history", "rows": len(df), "applied_at": _now()})
+    return state
+
+
+# ---------------------------
+# Update
+# ---------------------------
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_batch(path: Path) -> pd.DataFrame:
+    cols = ["organism", "drug", "sir"]
+    df = pd.read_parquet(path, columns=cols) if path.suffix == ".parquet" else pd.read_csv(path, usecols=cols)
+    return normalize(df)
+
+
+def merge_counts(counts: pd.DataFrame, batch: pd.DataFrame, decay: float = 1.0) -> pd.DataFrame:
+    """
+    counts * decay + batch counts, outer-joined on (organism, drug).
+    """
+    old = counts.set_index(FEATURES)[["n_S", "n_total"]] * decay
+    new = batch.astype({"organism": str, "drug": str}).set_index(FEATURES)[["n_S", "n_total"]]
+    merged = old.add(new, fill_value=0).reset_index()
+    if decay == 1.0:
+        merged = merged.astype({"n_S": "int64", "n_total": "int64"})
+    return merged
+
+
+def batch_auc(model, batch: pd.DataFrame) -> Optional[float]:
+    """
+    Weighted ROC-AUC of the current model on a batch, before it is folded in.
+    """
+    X, y, w = weighted_rows(batch)
+    if len(set(y)) < 2:
+        return None
+    return float(roc_auc_score(y, model.predict_proba(X)[:, 1], sample_weight=w))
+
+
+def fit(counts: pd.DataFrame):
+    X, y, w = weighted_rows(counts)
+    return build_pipeline().fit(X, y, clf__sample_weight=w)
+
+
+def update(
+    batches: List[Path],
+    decay: float = 1.0,
+    init: bool = False,
+    counts_path: Path = COUNTS_PATH,
+    model_path: Path = MODEL_PATH,
+    registry_dir: Path = REGISTRY_DIR,
+) -> Optional[Dict[str, Any]]:
+    """
+    Apply new batches and publish a refit model. Returns the new state,
+    or None when nothing changed.
+    """
+    state = None if init else load_state(counts_path)
+    changed = state is None
+    if state is None:
+        state = seed_state(normalize(load_processed()))
+
+    applied = {b.get("sha256") for b in state["batches"]}
+    counts = counts_frame(state)
+    current = joblib.load(model_path) if model_path.exists() else None
+    new = counts.iloc[:0]
+
+    for path in batches:
+        digest = _sha256(path)
+        if digest in applied:
+            print(f"{path}: already applied, skipped")
+            continue
+
+        rows = read_batch(path)
+        agg = aggregate(rows)
+        auc = batch_auc(current, agg) if current is not None else None
+        print(f"{path}: {len(rows)} rows, {len(agg)} combinations; AUC of current model on batch: {auc}")
+
+        counts = merge_counts(counts, agg, decay)
+        new = merge_counts(new, agg)
+        state["batches"].append({"source": str(path), "sha256": digest, "rows": len(rows), "applied_at": _now()})
+        applied.add(digest)
+        changed = True
+
+    if not changed:
+        return None
+
+    model = fit(counts)
+    auc = batch_auc(current, new) if current is not None and len(new) else None
+    meta = register(model, counts, "update", auc, "new batches" if auc is not None else None,
+                    registry_dir=registry_dir, model_path=model_path)
+    state["version"] = meta["version"]
+    state["counts"] = counts.values.tolist()
+    save_state(state, counts_path)
+    print(f"Published model-{meta['version']:04d} -> {model_path} ({len(counts)} combinations)")
+    return state
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("batches", nargs="*", type=Path, help="CSV/Parquet with organism, drug, sir")
+    ap.add_argument("--decay", type=float, default=1.0, help="multiply existing counts by this before each batch")
+    ap.add_argument("--init", action="store_true", help="discard ml/counts.json and reseed from data/processed")
+    args = ap.parse_args(argv)
+
+    if not 0.0 < args.decay <= 1.0:
+        ap.error("--decay must be in (0, 1]")
+    if update(args.batches, args.decay, args.init) is None:
+        print("No new batches; model unchanged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+# services/antibiogram.py
+"""
+Local antibiogram engine: the hospital's own susceptibility results, as
+time-windowed %S per (organism, drug, specimen, ward).
+
+Ingest from server/ (CSV columns: organism, drug, sir, date, specimen, ward):
+    python -m services.antibiogram ingest results.csv --dir data/antibiogram
+    python -m services.antibiogram show "escherichia coli" --dir data/antibiogram --specimen blood
+
+Set ANTIBIOGRAM_DIR to make services/ranker.py blend the local rate into
+its scores (ANTIBIOGRAM_WEIGHT).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from api.settings import (
+    ANTIBIOGRAM_DIR,
+    ANTIBIOGRAM_MIN_ISOLATES,
+    ANTIBIOGRAM_WINDOW_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "antibiogram.json"
+TEXT_COLUMNS = ("organism", "drug", "specimen", "ward")
+SIR_CODES = {"S": 0, "I": 1, "R": 2}
+
+# (organism, drug, specimen, ward); None in specimen/ward = all of them
+Key = Tuple[str, str, Optional[str], Optional[str]]
+
+# Bit layout of the composite group key used when counting
+_BITS = {"organism": 13, "drug": 13, "specimen": 8, "ward": 12}
+_DAY_BITS = 16
+
+
+class Rate(NamedTuple):
+    susceptible: int
+    total: int
+
+    @property
+    def pct(self) -> float:
+        return self.susceptible / self.total
+
+
+def _day_now() -> int:
+    return int(time.time() // 86400)
+
+
+def to_day(dates: Sequence[str]) -> np.ndarray:
+    """
+    ISO dates ("2026-10-17", or datetimes) -> days since 1970-01-01.
+    """
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int32)
+
+
+class Antibiogram:
+    """
+    Every ingested result is kept in a columnar store: append-only segments
+    of int32 dictionary codes (organism, drug, specimen, ward), int32 day and
+    int8 S/I/R, 21 bytes per result.
+
+    On top of it, n_S / n_total over the last window_days are kept for the
+    exact (organism, drug, specimen, ward) key and its three rollups
+    (ward=None, specimen=None, both None). Each key has a dense id into two
+    count arrays, so rate() is a dict lookup plus two array reads. The
+    window is maintained incrementally and vectorized: ingest adds the
+    batch's per-(key, day) counts, and when the day changes the per-day
+    buckets that fall out of the window are subtracted. Raw data is never
+    rescanned per request.
+
+    I counts as not susceptible (%S as in a CLSI M39 antibiogram); rates
+    backed by fewer than min_isolates results are not reported.
+    """
+
+    def __init__(self, window_days: int = 365, min_isolates: int = 30, today: Optional[int] = None):
+        """
+        today fixes the window end (days since epoch; move it with advance());
+        by default the window follows the clock.
+        """
+        self.window_days = window_days
+        self.min_isolates = min_isolates
+        self.follow_clock = today is None
+        self.today = _day_now() if today is None else today
+        self.names: Dict[str, List[str]] = {c: [] for c in TEXT_COLUMNS}
+        self._codes: Dict[str, Dict[str, int]] = {c: {} for c in TEXT_COLUMNS}
+        self.segments: List[Dict[str, np.ndarray]] = []
+        self._saved_segments = 0
+
+        self._key_ids: Dict[Key, int] = {}
+        self._combo_levels: Dict[int, List[int]] = {}  # combo code -> key ids of its four levels
+        self._s = np.zeros(1024, dtype=np.int64)  # n_S in window, by key id
+        self._t = np.zeros(1024, dtype=np.int64)  # n_total in window, by key id
+        # Python-list copies of _s/_t for lookups (numpy scalar reads cost more
+        # than the dict lookup); refreshed after every update
+        self._s_list: List[int] = []
+        self._t_list: List[int] = []
+        self._days: Dict[int, List[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = defaultdict(list)
+        self._next_day_at = (self.today + 1) * 86400.0  # time.time() at which the clock passes today
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Lookup
+    # ---------------------------
+
+    @property
+    def window_start(self) -> int:
+        return self.today - self.window_days + 1
+
+    def __len__(self) -> int:
+        return sum(len(s["day"]) for s in self.segments)
+
+    def _roll(self) -> None:
+        if self.follow_clock and time.time() >= self._next_day_at:
+            self.advance(_day_now())
+
+    def _publish(self) -> None:
+        n = len(self._key_ids)
+        self._s_list = self._s[:n].tolist()
+        self._t_list = self._t[:n].tolist()
+
+    def _counts(self, key: Key) -> Optional[Rate]:
+        kid = self._key_ids.get(key)
+        if kid is None:
+            return None
+        total = self._t_list[kid]
+        if total < self.min_isolates:
+            return None
+        return Rate(self._s_list[kid], total)
+
+    def rate(
+        self, organism: str, drug: str, specimen: Optional[str] = None, ward: Optional[str] = None
+    ) -> Optional[Rate]:
+        """
+        %S for exactly this key over the window, or None below min_isolates.
+        """
+        self._roll()
+        return self._counts((organism, drug, specimen, ward))
+
+    def best_rate(
+        self, organism: str, drug: str, specimen: Optional[str] = None, ward: Optional[str] = None
+    ) -> Optional[Tuple[Rate, Key]]:
+        """
+        Most specific key with enough isolates: (specimen, ward), specimen,
+        ward, then all results for the organism/drug. Returns (rate, key).
+        """
+        self._roll()
+        key_ids, s_list, t_list, floor = self._key_ids, self._s_list, self._t_list, self.min_isolates
+        for key in _levels(organism, drug, specimen, ward):
+            kid = key_ids.get(key)
+            if kid is not None and t_list[kid] >= floor:
+                return Rate(s_list[kid], t_list[kid]), key
+        return None
+
+    def table(self, organism: str, specimen: Optional[str] = None, ward: Optional[str] = None) -> List[Tuple[str, Rate]]:
+        """
+        Antibiogram for one organism: (drug, rate) with enough isolates, by %S.
+        """
+        self._roll()
+        rows = []
+        for key in list(self._key_ids):
+            if key[0] == organism and key[2] == specimen and key[3] == ward:
+                rate = self._counts(key)
+                if rate is not None:
+                    rows.append((key[1], rate))
+        return sorted(rows, key=lambda r: r[1].pct, reverse=True)
+
+    # ---------------------------
+    # Ingest / window
+    # ---------------------------
+
+    def _encode(self, column: str, values: Sequence[Optional[str]]) -> np.ndarray:
+        # Factorize in one pass, normalize and code only the distinct values
+        local: Dict[Optional[str], int] = {}
+        idx = np.fromiter((local.setdefault(v, len(local)) for v in values), dtype=np.int32, count=len(values))
+        codes, names = self._codes[column], self.names[column]
+        mapping = []
+        for v in local:
+            name = _norm(v)
+            code = codes.get(name)
+            if code is None:
+                if len(names) >= 1 << _BITS[column]:
+                    raise ValueError(f"too many distinct {column} values (max {1 << _BITS[column]})")
+                code = codes[name] = len(names)
+                names.append(name)
+            mapping.append(code)
+        return np.asarray(mapping, dtype=np.int32)[idx]
+
+    def ingest(
+        self,
+        organism: Sequence[str],
+        drug: Sequence[str],
+        sir: Sequence[str],
+        day: Sequence[int],
+        specimen: Optional[Sequence[Optional[str]]] = None,
+        ward: Optional[Sequence[Optional[str]]] = None,
+    ) -> int:
+        """
+        Append results (parallel sequences; day as from to_day()). Rows whose
+        S/I/R isn't S, I or R are dropped. Returns the number stored.
+        """
+        n = len(organism)
+        local: Dict[str, int] = {}
+        idx = np.fromiter((local.setdefault(v, len(local)) for v in sir), dtype=np.int32, count=n)
+        sir_map = np.asarray([SIR_CODES.get(str(v).strip().upper(), -1) for v in local], dtype=np.int8)
+        sir_codes = sir_map[idx] if n else np.empty(0, dtype=np.int8)
+        keep = sir_codes >= 0
+
+        segment = {
+            "organism": self._encode("organism", organism),
+            "drug": self._encode("drug", drug),
+            "specimen": self._encode("specimen", specimen if specimen is not None else [""] * n),
+            "ward": self._encode("ward", ward if ward is not None else [""] * n),
+            "day": np.asarray(day, dtype=np.int32),
+            "sir": sir_codes,
+        }
+        if not keep.all():
+            segment = {c: a[keep] for c, a in segment.items()}
+        if not len(segment["day"]):
+            return 0
+
+        with self._lock:
+            self.segments.append(segment)
+            self._add_to_window(segment)
+            self._publish()
+        return len(segment["day"])
+
+    def _key_id(self, key: Key) -> int:
+        kid = self._key_ids.get(key)
+        if kid is None:
+            kid = self._key_ids[key] = len(self._key_ids)
+            if kid >= len(self._t):
+                self._s = np.concatenate([self._s, np.zeros_like(self._s)])
+                self._t = np.concatenate([self._t, np.zeros_like(self._t)])
+        return kid
+
+    def _level_ids(self, combo: int) -> List[int]:
+        codes = {}
+        for column in reversed(TEXT_COLUMNS):
+            codes[column] = combo & ((1 << _BITS[column]) - 1)
+            combo >>= _BITS[column]
+        names = self.names
+        ids, seen = [], set()
+        for key in _levels(
+            names["organism"][codes["organism"]],
+            names["drug"][codes["drug"]],
+            names["specimen"][codes["specimen"]] or None,
+            names["ward"][codes["ward"]] or None,
+        ):
+            ids.append(-1 if key in seen else self._key_id(key))
+            seen.add(key)
+        return ids
+
+    def _add_to_window(self, seg: Dict[str, np.ndarray]) -> None:
+        start = self.window_start
+        mask = seg["day"] >= start
+        if not mask.any():
+            return
+
+        # Distinct (organism, drug, specimen, ward) combos via one int64 code
+        combo = np.zeros(int(mask.sum()), dtype=np.int64)
+        for column in TEXT_COLUMNS:
+            combo = (combo << _BITS[column]) | seg[column][mask].astype(np.int64)
+        combos, inverse = np.unique(combo, return_inverse=True)
+
+        # Key ids of each combo's exact key and rollups; -1 where a rollup
+        # is the same key (no specimen/ward) so nothing is counted twice
+        cache = self._combo_levels
+        rows = []
+        for g in combos.tolist():
+            ids = cache.get(g)
+            if ids is None:
+                ids = cache[g] = self._level_ids(g)
+            rows.append(ids)
+        level_ids = np.array(rows, dtype=np.int64).reshape(-1, 4).T
+
+        # Count per (key id, day) across all four levels at once
+        ids = level_ids[:, inverse.ravel()].ravel()
+        offsets = np.tile(np.minimum(seg["day"][mask] - start, (1 << _DAY_BITS) - 1).astype(np.int64), 4)
+        susceptible = np.tile(seg["sir"][mask] == 0, 4)
+        valid = ids >= 0
+        groups, group_of = np.unique((ids[valid] << _DAY_BITS) | offsets[valid], return_inverse=True)
+        totals = np.bincount(group_of, minlength=len(groups))
+        s_counts = np.bincount(group_of, weights=susceptible[valid], minlength=len(groups)).astype(np.int64)
+        key_ids = groups >> _DAY_BITS
+        np.add.at(self._t, key_ids, totals)
+        np.add.at(self._s, key_ids, s_counts)
+
+        # Per-day buckets, for eviction when the window moves
+        days = groups & ((1 << _DAY_BITS) - 1)
+        order = np.argsort(days, kind="stable")
+        bucket_days, first = np.unique(days[order], return_index=True)
+        for day, part in zip(bucket_days.tolist(), np.split(order, first[1:])):
+            self._days[start + day].append((key_ids[part], s_counts[part], totals[part]))
+
+    def advance(self, today: int) -> None:
+        """
+        Move the window end to `today`, subtracting the days that fall out.
+        """
+        with self._lock:
+            if today <= self.today:
+                return
+            self.today = today
+            self._next_day_at = (today + 1) * 86400.0
+            start = self.window_start
+            for day in [d for d in self._days if d < start]:
+                for ids, s_counts, totals in self._days.pop(day):
+                    np.subtract.at(self._s, ids, s_counts)
+                    np.subtract.at(self._t, ids, totals)
+            self._publish()
+
+    def rebuild(self) -> None:
+        """
+        Recompute the window from the store (after changing window_days).
+        """
+        with self._lock:
+            self._s[:] = 0
+            self._t[:] = 0
+            self._days.clear()
+            for segment in self.segments:
+                self._add_to_window(segment)
+            self._publish()
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+
+    def save(self, directory: Path) -> None:
+        """
+        Write new segments as seg-NNNNNN/<column>.npy, then the manifest
+        (vocabulary + segment list) atomically; readers only see complete
+        segments.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        for i in range(self._saved_segments, len(self.segments)):
+            seg_dir = directory / f"seg-{i:06d}"
+            seg_dir.mkdir(exist_ok=True)
+            for column, values in self.segments[i].items():
+                np.save(seg_dir / f"{column}.npy", values)
+        self._saved_segments = len(self.segments)
+
+        manifest = {"names": self.names, "segments": [f"seg-{i:06d}" for i in range(len(self.segments))]}
+        tmp = directory / (MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, directory / MANIFEST)
+
+    @classmethod
+    def load(
+        cls, directory: Path, window_days: int = 365, min_isolates: int = 30, today: Optional[int] = None
+    ) -> "Antibiogram":
+        manifest = json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+        engine = cls(window_days, min_isolates, today)
+        engine.names = {c: list(manifest["names"][c]) for c in TEXT_COLUMNS}
+        engine._codes = {c: {name: i for i, name in enumerate(engine.names[c])} for c in TEXT_COLUMNS}
+        for name in manifest["segments"]:
+            seg_dir = directory / name
+            engine.segments.append({c: np.load(seg_dir / f"{c}.npy") for c in (*TEXT_COLUMNS, "day", "sir")})
+        engine._saved_segments = len(engine.segments)
+        engine.rebuild()
+        return engine
+
+
+def _norm(value: Optional[str]) -> str:
+    if value is None or (isinstance(value, float) and value != value):  # None / NaN
+        return ""
+    return str(value).strip().lower()
+
+
+def _levels(organism: str, drug: str, specimen: Optional[str], ward: Optional[str]) -> Tuple[Key, ...]:
+    # Most specific first
+    return (
+        (organism, drug, specimen, ward),
+        (organism, drug, specimen, None),
+        (organism, drug, None, ward),
+        (organism, drug, None, None),
+    )
+
+
+# -------------------------------------------------
+# Serving instance (ANTIBIOGRAM_DIR)
+# -------------------------------------------------
+
+class ActiveEngine(NamedTuple):
+    engine: Optional[Antibiogram]
+    stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the manifest it was loaded from
+
+
+_ACTIVE = ActiveEngine(None)
+_ENGINE_LOCK = threading.Lock()
+
+
+def manifest_path() -> Optional[Path]:
+    return Path(ANTIBIOGRAM_DIR) / MANIFEST if ANTIBIOGRAM_DIR else None
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def refresh() -> bool:
+    """
+    Load the engine for ANTIBIOGRAM_DIR and swap it in if its manifest
+    changed. Slow on large stores (load + rebuild), so it runs off the
+    request path: at warm-up and from the ranker's watcher thread. On a
+    failed load the previous data stays active. Returns True on a swap.
+    """
+    global _ACTIVE
+
+    path = manifest_path()
+    if path is None:
+        return False
+    with _ENGINE_LOCK:
+        active = _ACTIVE
+        stamp = _stamp(path)
+        if stamp == active.stamp:
+            return False
+        try:
+            engine = None if stamp is None else Antibiogram.load(
+                path.parent, ANTIBIOGRAM_WINDOW_DAYS, ANTIBIOGRAM_MIN_ISOLATES
+            )
+        except Exception:
+            logger.warning("antibiogram reload failed; keeping previous data", exc_info=True)
+            _ACTIVE = active._replace(stamp=stamp)  # don't retry the same files every tick
+            return False
+        if engine is not None:
+            logger.info("antibiogram loaded: %d results", len(engine))
+        _ACTIVE = ActiveEngine(engine, stamp)
+        return True
+
+
+def active() -> ActiveEngine:
+    """
+    The loaded engine and its manifest stamp; only replaced by refresh().
+    """
+    return _ACTIVE
+
+
+def current() -> Optional[Antibiogram]:
+    """
+    The loaded engine for ANTIBIOGRAM_DIR (None if unset or not loaded yet).
+    Only reads the reference that refresh() swaps.
+    """
+    return _ACTIVE.engine
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+
+def _read_csv(path: Path) -> Dict[str, List[str]]:
+    import csv
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    return {c: [r.get(c) for r in rows] for c in ("organism", "drug", "sir", "date", "specimen", "ward")}
+
+
+def _ingest_files(engine: Antibiogram, paths: Iterable[Path]) -> int:
+    n = 0
+    for path in paths:
+        cols = _read_csv(path)
+        n += engine.ingest(
+            cols["organism"], cols["drug"], cols["sir"], to_day(cols["date"]), cols["specimen"], cols["ward"]
+        )
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=["ingest", "show"])
+    ap.add_argument("args", nargs="+", help="ingest: CSV files; show: organism")
+    ap.add_argument("--dir", type=Path, default=Path(ANTIBIOGRAM_DIR or "data/antibiogram"))
+    ap.add_argument("--specimen")
+    ap.add_argument("--ward")
+    args = ap.parse_args(argv)
+
+    exists = (args.dir / MANIFEST).exists()
+    engine = (
+        Antibiogram.load(args.dir, ANTIBIOGRAM_WINDOW_DAYS, ANTIBIOGRAM_MIN_ISOLATES)
+        if exists else Antibiogram(ANTIBIOGRAM_WINDOW_DAYS, ANTIBIOGRAM_MIN_ISOLATES)
+    )
+
+    if args.command == "ingest":
+        n = _ingest_files(engine, [Path(p) for p in args.args])
+        engine.save(args.dir)
+        print(f"ingested {n} results into {args.dir} ({len(engine)} total)")
+        return 0
+
+    organism = _norm(args.args[0])
+    for drug, rate in engine.table(organism, _norm(args.specimen) or None, _norm(args.ward) or None):
+        print(f"{drug:<40}{rate.pct:>7.0%}{rate.total:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,10 +2,16 @@
 from __future__ import annotations
 
 import csv
+import logging
+import os
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
 from api.schemas import Regimen, PatientInfo
+from api.settings import DOSING_RELOAD_INTERVAL_S, SHARED_TABLES_DIR
+from services.metrics import DOSING_MISSES
 
 
 import re
@@ -16,28 +22,137 @@ import re
 
 CSV_PATH = Path(__file__).parent.parent / "knowledge" / "dosing_table.csv"
 
-# Cache rows so we don't reload on every request
-_DOSING_ROWS: List[Dict[str, str]] = []
-DEBUG_MATCH = True
+logger = logging.getLogger(__name__)
+
+# -------------------------------------------------
+# DOSING INDEX
+# -------------------------------------------------
+
+class _DrugRows:
+    """
+    Prepared indication matcher for one canonical drug name.
+    Indications are canonicalized once, at load time.
+    """
+
+    __slots__ = ("indications",)
+
+    def __init__(self) -> None:
+        self.indications: List[Tuple[str, Dict[str, str]]] = []
+
+    def match(self, syndrome_key: str) -> List[Dict[str, str]]:
+        exact_matches = []
+        generic_matches = []
+
+        for indication, row in self.indications:
+            # flexible indication match
+            if indication == syndrome_key or syndrome_key in indication or indication in syndrome_key:
+                exact_matches.append(row)
+            elif not indication:
+                generic_matches.append(row)
+
+        return exact_matches or generic_matches
+
+
+class DosingIndex:
+    """
+    Immutable snapshot of dosing_table.csv keyed by canonical drug name.
+    A reload builds a new index and swaps the module reference, so a request
+    holding an index never sees a half-loaded table.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], stamp: Tuple[int, int]):
+        self.rows = rows
+        self.stamp = stamp  # (mtime_ns, size) of the CSV this was built from
+        self.by_drug: Dict[str, _DrugRows] = {}
+
+        for row in rows:
+            key = _canon(row.get("drug", ""))
+            entry = self.by_drug.get(key)
+            if entry is None:
+                entry = self.by_drug[key] = _DrugRows()
+            entry.indications.append((_canon(row.get("indication", "")), row))
+
+    def match(self, drug: str, syndrome_key: str) -> List[Dict[str, str]]:
+        entry = self.by_drug.get(_canon(drug))
+        if entry is None:
+            return []
+        return entry.match(syndrome_key)
+
+
+_INDEX: Optional[DosingIndex] = None
+_INDEX_LOCK = threading.Lock()
+_NEXT_CHECK = 0.0  # monotonic time of the next mtime check
 
 # -------------------------------------------------
 # CSV LOADER
 # -------------------------------------------------
 
-def _load_dosing_table() -> None:
-    global _DOSING_ROWS
-    if _DOSING_ROWS:
-        return
+def _file_stamp() -> Tuple[int, int]:
+    st = os.stat(CSV_PATH)
+    return st.st_mtime_ns, st.st_size
 
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"dosing_table.csv not found at {CSV_PATH}")
 
+def _read_rows() -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
     with open(CSV_PATH, newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             # normalize keys & values
             normalized = {k.strip(): (v.strip() if v else "") for k, v in row.items()}
-            _DOSING_ROWS.append(normalized)
+            rows.append(normalized)
+    return rows
+
+
+def _rows_for(stamp: Tuple[int, int]) -> List[Dict[str, str]]:
+    # Serving mode: take the pre-normalized rows if they match this exact CSV
+    if SHARED_TABLES_DIR:
+        from services.shared_tables import load_dosing_rows
+
+        rows = load_dosing_rows(Path(SHARED_TABLES_DIR), stamp)
+        if rows is not None:
+            return rows
+    return _read_rows()
+
+
+def _load_dosing_table() -> DosingIndex:
+    """
+    Return the current dosing index, (re)building it when the CSV changed.
+    The file is stat'ed at most once per DOSING_RELOAD_INTERVAL_S.
+    """
+    global _INDEX, _NEXT_CHECK
+
+    index = _INDEX
+    now = time.monotonic()
+    if index is not None and now < _NEXT_CHECK:
+        return index
+
+    with _INDEX_LOCK:
+        index = _INDEX
+        if index is not None and now < _NEXT_CHECK:
+            return index  # another thread just checked
+
+        if not CSV_PATH.exists():
+            if index is not None:
+                _NEXT_CHECK = now + DOSING_RELOAD_INTERVAL_S
+                return index  # keep serving the last good table
+            raise FileNotFoundError(f"dosing_table.csv not found at {CSV_PATH}")
+
+        stamp = _file_stamp()
+        if index is None or stamp != index.stamp:
+            try:
+                index = DosingIndex(_rows_for(stamp), stamp)
+            except (OSError, csv.Error, UnicodeDecodeError):
+                if _INDEX is None:
+                    raise
+                # half-written edit: keep the previous table, retry next check
+                logger.warning("dosing_table.csv reload failed; keeping previous table", exc_info=True)
+                index = _INDEX
+            else:
+                logger.info("dosing_table.csv loaded: %d rows, %d drugs", len(index.rows), len(index.by_drug))
+            _INDEX = index
+
+        _NEXT_CHECK = now + DOSING_RELOAD_INTERVAL_S
+        return index
 
 
 # -------------------------------------------------
@@ -83,26 +198,7 @@ def _canon(s: str) -> str:
     return s
 
 def _match_rows_for_drug(drug: str, syndrome: str) -> List[Dict[str, str]]:
-    drug_key = _canon(drug)
-    syndrome_key = _canon(syndrome)
-
-    exact_matches = []
-    generic_matches = []
-
-    for row in _DOSING_ROWS:
-        row_drug = _canon(row.get("drug", ""))
-        if row_drug != drug_key:
-            continue
-
-        indication = _canon(row.get("indication", ""))
-
-        # flexible indication match
-        if indication == syndrome_key or syndrome_key in indication or indication in syndrome_key:
-            exact_matches.append(row)
-        elif not indication:
-            generic_matches.append(row)
-
-    return exact_matches or generic_matches
+    return _load_dosing_table().match(drug, _canon(syndrome))
 
 
 def _select_best_row(rows: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
@@ -119,24 +215,19 @@ def _select_best_row(rows: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
 # PUBLIC API
 # -------------------------------------------------
 
-def pick_regimen(drug: str, patient: PatientInfo) -> Optional[Regimen]:
-    """
-    Return a Regimen from dosing_table.csv for a single drug.
-    """
-    _load_dosing_table()
-
-    if not patient.syndrome:
-        return None
-
-    rows = _match_rows_for_drug(drug, patient.syndrome)
+def _pick_regimen(index: DosingIndex, drug: str, syndrome_key: str) -> Optional[Regimen]:
+    rows = index.match(drug, syndrome_key)
     chosen = _select_best_row(rows)
 
     # if not chosen:
     #     return None
     if not chosen:
-        if DEBUG_MATCH:
-            print("\n[DOSING DEBUG] No match for drug:", drug, "| syndrome:", patient.syndrome)
-            print("[DOSING DEBUG] Available drugs in dosing table sample:", [r.get("drug","") for r in _DOSING_ROWS[:10]])
+        DOSING_MISSES.inc()
+        logger.debug(
+            "no dosing match for drug=%r syndrome=%r (%d drugs in table)",
+            drug, syndrome_key, len(index.by_drug),
+            extra={"sample": "dosing_miss"},
+        )
         return None
 
 
@@ -151,6 +242,18 @@ def pick_regimen(drug: str, patient: PatientInfo) -> Optional[Regimen]:
     )
 
 
+def pick_regimen(drug: str, patient: PatientInfo) -> Optional[Regimen]:
+    """
+    Return a Regimen from dosing_table.csv for a single drug.
+    """
+    index = _load_dosing_table()
+
+    if not patient.syndrome:
+        return None
+
+    return _pick_regimen(index, drug, _canon(patient.syndrome))
+
+
 def build_regimen_package(
     drugs_ranked: List[str],
     patient: PatientInfo
@@ -159,13 +262,18 @@ def build_regimen_package(
     Primary = first ranked drug with dosing
     Alternatives = next 2 with dosing
     """
-    _load_dosing_table()
+    # One index snapshot for the whole package, even if a reload lands mid-request
+    index = _load_dosing_table()
 
     primary: Optional[Regimen] = None
     alternatives: List[Regimen] = []
 
+    if not patient.syndrome:
+        return primary, alternatives
+
+    syndrome_key = _canon(patient.syndrome)
     for drug in drugs_ranked:
-        regimen = pick_regimen(drug, patient)
+        regimen = _pick_regimen(index, drug, syndrome_key)
         if not regimen:
             continue
 
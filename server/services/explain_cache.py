@@ -0,0 +1,123 @@
+# services/explain_cache.py
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from api.settings import EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_TTL_S, EXPLAIN_CACHE_DB
+from services.cache import TTLCache
+
+
+def explanation_key(model: str, system_prompt: str, explanation_input: str) -> str:
+    """
+    Content address of an explanation: the structured recommendation input
+    plus everything else that shapes the LLM output (model + system prompt).
+    """
+    h = hashlib.sha256()
+    for part in (model, system_prompt, explanation_input):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class _SQLiteStore:
+    """
+    On-disk tier so cached explanations survive restarts.
+    LRU by last_used; rows older than the TTL are treated as misses and pruned.
+    """
+
+    _PRUNE_EVERY = 100  # inserts between prunes
+
+    def __init__(self, path: str, maxsize: int, ttl_s: Optional[float]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s if ttl_s and ttl_s > 0 else None
+        self._lock = threading.Lock()
+        self._inserts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS explanations ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM explanations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_s and created + self.ttl_s <= now:
+                self._conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE explanations SET last_used = ? WHERE key = ?", (now, key))
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO explanations (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._inserts += 1
+            if self._inserts % self._PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        if self.ttl_s:
+            self._conn.execute("DELETE FROM explanations WHERE created <= ?", (now - self.ttl_s,))
+        self._conn.execute(
+            "DELETE FROM explanations WHERE key NOT IN"
+            " (SELECT key FROM explanations ORDER BY last_used DESC LIMIT ?)",
+            (self.maxsize,),
+        )
+
+
+class ExplanationCache:
+    """
+    In-memory LRU/TTL cache in front of an optional SQLite store.
+    Counters: memory hits, disk hits, misses.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: Optional[float], db_path: str = ""):
+        self.memory = TTLCache(maxsize, ttl_s)
+        self.disk = _SQLiteStore(db_path, maxsize * 10, ttl_s) if db_path else None
+        self.disk_hits = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        mem = self.memory.stats()
+        return {
+            "hits": mem["hits"] + self.disk_hits,
+            "memory_hits": mem["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": mem["misses"] - self.disk_hits,
+            "size": mem["size"],
+        }
+
+
+EXPLANATION_CACHE = ExplanationCache(EXPLAIN_CACHE_SIZE, EXPLAIN_CACHE_TTL_S, EXPLAIN_CACHE_DB)
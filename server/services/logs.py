@@ -0,0 +1,97 @@
+# services/logs.py
+"""
+Logging setup for the API process.
+
+- Per-module levels: LOG_LEVEL for everything, LOG_LEVELS to override
+  individual loggers, e.g. LOG_LEVELS="services.dosing=DEBUG,agent=INFO"
+- Non-blocking: records go through a QueueHandler; a QueueListener thread
+  does the actual (slow) stream I/O off the request path
+- Sampling: records logged with extra={"sample": "<key>"} are kept
+  1 in LOG_SAMPLE_EVERY per key, for high-frequency events
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Dict, Optional
+
+from api.settings import LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE_EVERY
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+_HANDLER: Optional[logging.handlers.QueueHandler] = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep the 1st, (N+1)th, (2N+1)th... record per sample key.
+    Records without a "sample" attribute always pass.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample", None)
+        if key is None or self.every == 1:
+            return True
+        with self._lock:
+            n = self._seen.get(key, 0)
+            self._seen[key] = n + 1
+        if n % self.every:
+            return False
+        if n:
+            record.msg = f"{record.msg} (sampled 1/{self.every})"
+        return True
+
+
+def parse_levels(spec: str) -> Dict[str, int]:
+    """
+    "services.dosing=DEBUG, agent=warning" -> {"services.dosing": 10, "agent": 30}
+    """
+    levels: Dict[str, int] = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, level = (x.strip() for x in part.split("=", 1))
+        if name and level:
+            levels[name] = logging.getLevelName(level.upper())
+    return levels
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    module_levels: str = LOG_LEVELS,
+    sample_every: int = LOG_SAMPLE_EVERY,
+) -> None:
+    """
+    Idempotent; safe to call from every entry point.
+    """
+    global _LISTENER, _HANDLER
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    for name, lvl in parse_levels(module_levels).items():
+        logging.getLogger(name).setLevel(lvl)
+
+    if _HANDLER is not None:
+        return
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+    _HANDLER = logging.handlers.QueueHandler(q)
+    _HANDLER.addFilter(SamplingFilter(sample_every))
+    root.addHandler(_HANDLER)
+
+    _LISTENER = logging.handlers.QueueListener(q, stream, respect_handler_level=True)
+    _LISTENER.start()
+    atexit.register(_LISTENER.stop)
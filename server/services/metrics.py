@@ -0,0 +1,177 @@
+# services/metrics.py
+"""
+Minimal in-process metrics with Prometheus text exposition (served at /metrics).
+Counters and histograms only; label sets are kept small and bounded.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, v in items:
+            lines.append(f"{self.name}{_fmt_labels(list(zip(self.labelnames, key)))} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, (list(c), s[0])) for k, (c, s) in self._values.items())
+        for key, (counts, total) in items:
+            base = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = _fmt_value(bound)
+                lines.append(f"{self.name}_bucket{_fmt_labels(base + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(base)} {repr(total)}")
+            lines.append(f"{self.name}_count{_fmt_labels(base)} {cumulative}")
+        return lines
+
+
+def render_latest() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ---------------------------
+# AURA metrics
+# ---------------------------
+
+NODE_LATENCY = Histogram(
+    "aura_node_latency_seconds", "Latency of each graph node.", ["node"]
+)
+ANALYZE_STATUS = Counter(
+    "aura_analyze_status_total", "Analysis outcomes by AnalyzeStatus.", ["status"]
+)
+RANKER_MODE = Counter(
+    "aura_ranker_mode_total", "Reports ranked by the ML model vs. the rules fallback.", ["mode"]
+)
+DOSING_MISSES = Counter(
+    "aura_dosing_misses_total", "Ranked drugs with no matching dosing_table.csv row."
+)
+LLM_LATENCY = Histogram(
+    "aura_llm_latency_seconds", "Latency of explanation LLM calls (successful or not)."
+)
+LLM_ERRORS = Counter(
+    "aura_llm_errors_total", "Explanation LLM calls that failed or hit the deadline.", ["reason"]
+)
+EXPLAIN_CACHE = Counter(
+    "aura_explain_cache_total", "Explanation cache lookups.", ["result"]
+)
+RESPONSE_CACHE = Counter(
+    "aura_response_cache_total", "/analyze response cache lookups (debug requests excluded).", ["result"]
+)
+SHADOW_RANKINGS = Counter(
+    "aura_shadow_rankings_total", "Shadow ranker comparisons by outcome (top-1 agreement, dropped, error).", ["outcome"]
+)
@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from api.schemas import ParsedReport, OrganismResult, ASTResult, SpecimenType, SIR
+from api.schemas import SpecimenType, SIR
+from api.settings import PARSE_CACHE_SIZE
+from services.cache import TTLCache
+from services.records import ASTRecord, OrganismRecord, ReportRecord
 
 
 _SPECIMEN_MAP = [
@@ -14,9 +17,59 @@ _SPECIMEN_MAP = [
     (re.compile(r"\bwound\b", re.I), SpecimenType.wound),
 ]
 
+# -------------------------------------------------
+# LINE PATTERNS (compiled once)
+# -------------------------------------------------
+
+# Literal "\n" sequences (common when pasted into JSON) + real CRLF/CR
+_NEWLINES_RX = re.compile(r"\\r\\n|\\n|\\r|\r\n|\r")
+
+_PLUS_RX = re.compile(r"\s*\+\s*")
+_HYPHEN_RX = re.compile(r"\s*-\s*")
+
+# "Specimen Desc. : BLOOD C/S" / "Specimen Desc : BLOOD C/S"
+_SPECIMEN_RX = re.compile(r"Specimen\s*Desc\.?\s*:\s*(.*)", re.IGNORECASE)
+
+# Start of the free-text "Result :" block; it ends at the ANTIBIOTIC header
+_RESULT_RX = re.compile(r"Result\s*:\s*(.*)", re.IGNORECASE)
+_ANTIBIOTIC_HEADER_RX = re.compile(r"\s*ANTIBIOTIC", re.IGNORECASE)
+
+# "1: E. COLI" / "1 : E COLI" / "1: ESCHERICHIA COLI"
+_ORGANISM_RX = re.compile(r"\s*\d+\s*:\s*(.*)")
+_ECOLI_RX = re.compile(r"^(E\.?\s*COLI|ESCHERICHIA\s+COLI)\b", re.IGNORECASE)
+
+# AST row A: "1    AMIKACIN    S"
+_ROW_A_RX = re.compile(r"\s*(\d{1,3})\s+([A-Z][A-Z0-9\s\+\-\/\.\(\)]{2,}?)\s+([SRI])\s*$")
+# AST row B: "AMIKACIN S" (no index)
+_ROW_B_RX = re.compile(r"\s*([A-Z][A-Z0-9\s\+\-\/\.\(\)]{2,}?)\s+([SRI])\s*$")
+
+# "Legend:" and its "S = Sensitive" lines
+_LEGEND_RX = re.compile(r"\s*(LEGEND\b|[SRI]\s*=)", re.IGNORECASE)
+
+# If an organism line got merged with other sections, cut at these
+_ORGANISM_STOP_TOKENS = (
+    "SENSITIVITIES",
+    "SINGLE BLOOD CULTURE",
+    "ANTIBIOTIC SUSCEPTIBILITY",
+    "ANTIBIOTIC",
+    "LEGEND",
+    "MICROBIOLOGY",
+    "REPORT",
+)
+
+_ROW_B_HEADERS = {"RESULT", "LEGEND", "MICROBIOLOGY", "ANTIBIOTIC", "S.#"}
+_NOTE_HEADERS = {"microbiology", "result"}
+
+_SIR_MAP = {"S": SIR.susceptible, "R": SIR.resistant, "I": SIR.intermediate}
+
+# normalized report text -> ReportRecord. Values are frozen records (see
+# services/records.py), so one instance can be handed to every request.
+_PARSE_CACHE = TTLCache(PARSE_CACHE_SIZE)
+
 
 def _normalize_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    # same as re.sub(r"\s+", " ", s).strip(), without the regex
+    return " ".join(s.split())
 
 
 def _normalize_drug_name(drug: str) -> str:
@@ -24,8 +77,10 @@ def _normalize_drug_name(drug: str) -> str:
     Keep it conservative: remove extra spaces, standardize + and - spacing.
     """
     drug = _normalize_spaces(drug)
-    drug = re.sub(r"\s*\+\s*", " + ", drug)
-    drug = re.sub(r"\s*-\s*", "-", drug)  # keep hyphens tight (e.g., piperacillin-tazobactam)
+    if "+" in drug:
+        drug = _PLUS_RX.sub(" + ", drug)
+    if "-" in drug:
+        drug = _HYPHEN_RX.sub("-", drug)  # keep hyphens tight (e.g., piperacillin-tazobactam)
     return drug.title()
 
 
@@ -37,22 +92,6 @@ def _normalize_organism_name(org: str) -> str:
     return org
 
 
-def _extract_specimen_desc(text: str) -> Optional[str]:
-    """
-    STRICT SPECIMEN ONLY:
-    We only use Specimen Desc line. If it's missing, specimen becomes 'other'.
-    """
-    # Examples seen:
-    # "Specimen Desc. : BLOOD C/S"
-    # "Specimen Desc : BLOOD C/S"
-    m = re.search(r"Specimen\s*Desc\.?\s*:\s*(.+)", text, re.IGNORECASE)
-    if not m:
-        return None
-    # take the line content only
-    line = m.group(1).splitlines()[0].strip()
-    return line
-
-
 def _map_specimen(specimen_desc: Optional[str]) -> SpecimenType:
     if not specimen_desc:
         return SpecimenType.other
@@ -62,187 +101,225 @@ def _map_specimen(specimen_desc: Optional[str]) -> SpecimenType:
     return SpecimenType.other
 
 
-def _extract_overall_notes(text: str) -> List[str]:
-    """
-    Pull notable free-text notes commonly present in Result section.
-    Keep it simple: capture lines after organism listing until 'ANTIBIOTIC' header,
-    and keep non-empty sentences.
-    """
-    notes: List[str] = []
-
-    # Find block after "Result :" up to "ANTIBIOTIC"
-    m = re.search(r"Result\s*:\s*(.+?)\n\s*ANTIBIOTIC", text, re.IGNORECASE | re.DOTALL)
-    if not m:
-        return notes
-
-    block = m.group(1)
+def _clean_organism(raw: str) -> Optional[str]:
+    raw = raw.strip()
 
-    # Remove organism lines like "1: E. COLI"
-    block = re.sub(r"^\s*\d+\s*:\s*.+$", "", block, flags=re.MULTILINE)
+    up = raw.upper()
+    for tok in _ORGANISM_STOP_TOKENS:
+        idx = up.find(tok)
+        if idx != -1 and idx > 0:
+            raw = raw[:idx].strip()
+            break
 
-    # Split into meaningful lines
-    for line in block.splitlines():
-        line = _normalize_spaces(line)
-        if not line:
-            continue
-        # avoid obvious headers
-        if line.lower() in {"microbiology", "result"}:
-            continue
-        notes.append(line)
+    raw = _normalize_spaces(raw)
 
-    return notes
+    # ✅ Special handling: keep "E. coli" intact (do NOT split on '.')
+    if _ECOLI_RX.search(raw):
+        return "E. coli"
 
+    # General cleanup: keep the whole line (no dot splitting)
+    return _normalize_organism_name(raw.title()) or None
 
-def _extract_organisms(text: str) -> List[str]:
-    organisms: List[str] = []
-
-    # Match patterns like:
-    # "1: E. COLI"
-    # "1 : E COLI"
-    # "1: ESCHERICHIA COLI"
-    rx = re.compile(r"^\s*\d+\s*:\s*([^\n\r]+)\s*$", re.MULTILINE | re.IGNORECASE)
-
-    for m in rx.finditer(text):
-        raw = m.group(1).strip()
-
-        # If the line got merged with other sections, cut at known stop tokens
-        stop_tokens = [
-            "SENSITIVITIES",
-            "SINGLE BLOOD CULTURE",
-            "ANTIBIOTIC SUSCEPTIBILITY",
-            "ANTIBIOTIC",
-            "LEGEND",
-            "MICROBIOLOGY",
-            "REPORT",
-        ]
-        up = raw.upper()
-        for tok in stop_tokens:
-            idx = up.find(tok)
-            if idx != -1 and idx > 0:
-                raw = raw[:idx].strip()
-                break
-
-        raw = _normalize_spaces(raw)
-
-        # ✅ Special handling: keep "E. coli" intact (do NOT split on '.')
-        # Normalize common E. coli variants.
-        # Examples: "E. COLI", "E COLI", "ESCHERICHIA COLI"
-        ecoli_rx = re.compile(r"^(E\.?\s*COLI|ESCHERICHIA\s+COLI)\b", re.IGNORECASE)
-        if ecoli_rx.search(raw):
-            organisms.append("E. coli")
-            continue
-
-        # General cleanup: keep the whole line (no dot splitting)
-        org = _normalize_organism_name(raw.title())
-        if org:
-            organisms.append(org)
 
+def _dedup(items: List[str]) -> List[str]:
     # de-dup preserving order
     seen = set()
     out = []
-    for o in organisms:
+    for o in items:
         key = o.lower()
         if key not in seen:
             seen.add(key)
             out.append(o)
-
     return out
 
-def _extract_antibiogram(text: str) -> List[ASTResult]:
-    ast: List[ASTResult] = []
 
-    # Pattern A: "1    AMIKACIN    S"
-    row_rx_a = re.compile(
-        r"^\s*(\d{1,3})\s+([A-Z][A-Z0-9\s\+\-\/\.\(\)]{2,}?)\s+([SRI])\s*$",
-        re.MULTILINE
-    )
+def _scan(text: str):
+    """
+    Single pass over the report lines. Each line is read once for what the
+    reference scans would find in it: specimen, result header, ANTIBIOTIC
+    header, organism, AST row, legend or note.
+    """
+    specimen_desc: Optional[str] = None
+    want_specimen = False   # "Specimen Desc. :" with the value on a later line
+    want_organism = False   # "1:" with the organism on a later line
 
-    # Pattern B: "AMIKACIN S" (no index)
-    row_rx_b = re.compile(
-        r"^\s*([A-Z][A-Z0-9\s\+\-\/\.\(\)]{2,}?)\s+([SRI])\s*$",
-        re.MULTILINE
-    )
+    organisms: List[str] = []
 
-    def add_row(drug_raw: str, sir_raw: str, evidence: str):
-        drug = _normalize_drug_name(drug_raw)
-        sir_raw = sir_raw.upper()
-        sir = SIR.susceptible if sir_raw == "S" else SIR.resistant if sir_raw == "R" else SIR.intermediate
-        ast.append(ASTResult(drug=drug, sir=sir, mic=None, evidence_line=evidence))
-
-    # Try A first
-    for m in row_rx_a.finditer(text):
-        add_row(m.group(2), m.group(3), m.group(0).strip())
-
-    # If nothing found, try B
-    if not ast:
-        for m in row_rx_b.finditer(text):
-            # Avoid matching headers accidentally
-            drug_candidate = m.group(1).strip().upper()
-            if drug_candidate in {"RESULT", "LEGEND", "MICROBIOLOGY", "ANTIBIOTIC", "S.#"}:
+    result_seen = False
+    in_result = False
+    block_empty = True      # the first line of the block never closes it
+    bare_note: Optional[str] = None  # "1:" in the block: dropped with the next line, kept if that closes it
+    notes: List[str] = []
+    notes_closed = False    # notes only count if the block reaches the ANTIBIOTIC header
+
+    # (drug, S/I/R, evidence) — models are only built for the rows we keep
+    rows_a: List[Tuple[str, str, str]] = []
+    rows_b: List[Tuple[str, str, str]] = []
+
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if want_specimen:
+            specimen_desc = stripped
+            want_specimen = False
+
+        # The line after a bare "1:" is that organism; it does not start an
+        # organism of its own but is still read as a row or note below.
+        org_line = _ORGANISM_RX.match(line) if ":" in line and stripped[0].isdigit() else None
+        if want_organism:
+            want_organism = False
+            org = _clean_organism(stripped)
+            if org:
+                organisms.append(org)
+        elif org_line:
+            raw = org_line.group(1).strip()
+            if raw:
+                org = _clean_organism(raw)
+                if org:
+                    organisms.append(org)
+            else:
+                want_organism = True
+
+        if specimen_desc is None and not want_specimen:
+            m = _SPECIMEN_RX.search(line)
+            if m:
+                value = m.group(1).strip()
+                if value:
+                    specimen_desc = value
+                else:
+                    want_specimen = True
+                if not in_result:
+                    continue
+
+        header_rest = False
+        if not result_seen:
+            m = _RESULT_RX.search(line)
+            if m:
+                result_seen = in_result = True
+                # The rest of the header line opens the block: a note candidate only
+                line = m.group(1).strip()
+                if not line:
+                    continue
+                header_rest = True
+                org_line = _ORGANISM_RX.match(line) if line[0].isdigit() and ":" in line else None
+        elif in_result and not block_empty and _ANTIBIOTIC_HEADER_RX.match(line):
+            if bare_note is not None:
+                notes.append(bare_note)
+            in_result = False
+            notes_closed = True
+            continue
+
+        # Organism lines and the rest of the Result header are never AST rows
+        if header_rest or org_line is not None:
+            pass
+        elif stripped[0].isdigit():
+            # Inside the Result block a row-shaped line is also a note
+            m = _ROW_A_RX.match(line)
+            if m:
+                rows_a.append((m.group(2), m.group(3), stripped))
+                if not in_result:
+                    continue
+
+        else:
+            if not in_result and _LEGEND_RX.match(line):
                 continue
-            add_row(m.group(1), m.group(2), m.group(0).strip())
 
-    # De-dup by drug
+            # Un-indexed rows are discarded once any indexed row exists
+            m = _ROW_B_RX.match(line) if not rows_a else None
+            if m:
+                # Avoid matching headers accidentally
+                if m.group(1).strip().upper() not in _ROW_B_HEADERS:
+                    rows_b.append((m.group(1), m.group(2), stripped))
+                if not in_result:
+                    continue
+
+        if in_result:
+            block_empty = False
+            if bare_note is not None:
+                bare_note = None
+            elif org_line is not None:
+                # Organism lines are not notes; a bare "1:" takes the next line with it
+                if not org_line.group(1).strip():
+                    bare_note = _normalize_spaces(line)
+            else:
+                note = _normalize_spaces(line)
+                if note.lower() not in _NOTE_HEADERS:
+                    notes.append(note)
+
+    # Indexed rows win; un-indexed rows are only a fallback. De-dup by drug.
     seen = set()
-    deduped = []
-    for item in ast:
-        key = item.drug.lower()
+    antibiogram = []
+    for drug_raw, sir_raw, evidence in rows_a or rows_b:
+        drug = _normalize_drug_name(drug_raw)
+        key = drug.lower()
         if key in seen:
             continue
         seen.add(key)
-        deduped.append(item)
+        antibiogram.append(ASTRecord(drug, _SIR_MAP[sir_raw], None, evidence))
 
-    return deduped
+    return specimen_desc, _dedup(organisms), (notes if notes_closed else []), antibiogram
 
 
-def parse_report(report_text: str) -> ParsedReport:
+def normalize_report_text(report_text: str) -> str:
     """
-    Main parser: returns ParsedReport per your API schema.
-    STRICT SPECIMEN ONLY: relies on Specimen Desc line.
+    Canonical form of a report for cache keys: unified newlines, each line
+    stripped, blank lines dropped. parse_report gives the same result for
+    any two texts with the same normalized form.
     """
-    text = report_text
+    if "\\" in report_text or "\r" in report_text:
+        report_text = _NEWLINES_RX.sub("\n", report_text)
+    return "\n".join(filter(None, map(str.strip, report_text.split("\n"))))
 
-    # If the input contains literal "\n" sequences (common when pasted into JSON),
-    # convert them into real newlines so MULTILINE regex works.
-    text = text.replace("\\r\\n", "\n").replace("\\n", "\n").replace("\\r", "\n")
 
-    # Also normalize actual CRLF if present
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+def parse_report(report_text: str) -> ReportRecord:
+    """
+    Main parser: returns the ParsedReport of the API schema as a ReportRecord
+    (ReportRecord.to_schema() for the model).
+    STRICT SPECIMEN ONLY: relies on Specimen Desc line.
+    Results are cached by normalized text, so re-analyzing the same report
+    (e.g. with completed patient info) skips the parse.
+    """
+    text = normalize_report_text(report_text)
+    parsed = _PARSE_CACHE.get(text)
+    if parsed is None:
+        parsed = _parse(text)
+        _PARSE_CACHE.set(text, parsed)
+    return parsed
 
 
-    specimen_desc = _extract_specimen_desc(text)
+def _parse(text: str) -> ReportRecord:
+    specimen_desc, organisms, overall_notes, antibiogram = _scan(text)
     specimen = _map_specimen(specimen_desc)
 
-    organisms = _extract_organisms(text)
-    overall_notes = _extract_overall_notes(text)
-
-    antibiogram = _extract_antibiogram(text)
-
-    organism_results: List[OrganismResult] = []
+    # One tuple shared by every organism (records don't copy their fields)
+    ast = tuple(antibiogram)
+    organism_results: List[OrganismRecord] = []
     if organisms:
         # Apply same antibiogram to each organism by default (common in basic reports).
         # Later, if you see organism-specific tables, you can split by sections.
         for org in organisms:
             organism_results.append(
-                OrganismResult(
+                OrganismRecord(
                     organism=org,
-                    ast=antibiogram,
+                    ast=ast,
                     notes=None
                 )
             )
     else:
         # No organism parsed → still return table if available
         organism_results.append(
-            OrganismResult(
+            OrganismRecord(
                 organism="Unknown",
-                ast=antibiogram,
-                notes=["Organism not detected by parser"]
+                ast=ast,
+                notes=("Organism not detected by parser",)
             )
         )
 
-    parsed = ParsedReport(
+    parsed = ReportRecord(
         specimen=specimen,
-        organisms=organism_results,
-        overall_notes=overall_notes if overall_notes else None
+        organisms=tuple(organism_results),
+        overall_notes=tuple(overall_notes) if overall_notes else None
     )
     return parsed
@@ -1,14 +1,45 @@
 # services/ranker.py
 from __future__ import annotations
 
-from typing import List, Optional
+import json
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 from pathlib import Path
-import joblib
 
-from api.schemas import ParsedReport, RankedOption, SIR, PatientInfo
+from api.schemas import SIR, PatientInfo
+
+from api.settings import ANTIBIOGRAM_DIR, ANTIBIOGRAM_WEIGHT, MODEL_RELOAD_INTERVAL_S, SHARED_TABLES_DIR
+from services.metrics import RANKER_MODE
+from services.records import ASTRecord, OptionRecord, ReportRecord
+
+if TYPE_CHECKING:
+    from services.antibiogram import Antibiogram
+    from services.scorer import FastScorer
+
+# joblib/sklearn/numpy/scipy are only imported on the ML path (_read_model),
+# so the rules fallback and plain `import api.main` stay light.
+
+logger = logging.getLogger(__name__)
 
 MODEL_PATH = Path(__file__).parent.parent / "ml" / "model.joblib"
-_MODEL = None
+REGISTRY_DIR = Path(__file__).parent.parent / "ml" / "models"  # written by ml/registry.py
+REGISTRY_CURRENT = REGISTRY_DIR / "current.json"
+
+
+class ActiveModel(NamedTuple):
+    model: Any  # sklearn Pipeline, the FastScorer itself (shared tables), or None = rules
+    scorer: Optional[FastScorer]
+    info: Dict[str, Any]  # registry metadata of the version; {} for a bare model.joblib
+    stamp: Optional[Tuple[str, int, int]] = None  # what the watcher compares against
+
+
+# Swapped as a single reference by refresh_model(); requests read it once
+# and never touch the filesystem.
+_ACTIVE: Optional[ActiveModel] = None
+_MODEL_LOCK = threading.Lock()
+_WATCHER: Optional[Tuple[threading.Thread, threading.Event]] = None
 
 
 # ---- old rules fallback ----
@@ -20,23 +51,174 @@ BROAD_PENALTY = {
 }
 
 
+def _model_stamp() -> Optional[Tuple[str, int, int]]:
+    """
+    (path, mtime_ns, size) of the registry pointer, or of model.joblib when
+    there is no registry yet.
+    """
+    for path in (REGISTRY_CURRENT, MODEL_PATH):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        return str(path), st.st_mtime_ns, st.st_size
+    return None
+
+
+def _read_model(version: Optional[int] = None) -> ActiveModel:
+    """
+    Load registry `version`, by default the one current.json points at
+    (else model.joblib); model is None when there is neither.
+    """
+    info: Dict[str, Any] = {}
+    path = MODEL_PATH
+    if version is not None:
+        info = json.loads((REGISTRY_DIR / f"model-{version:04d}.json").read_text(encoding="utf-8"))
+    elif REGISTRY_CURRENT.exists():
+        info = json.loads(REGISTRY_CURRENT.read_text(encoding="utf-8"))
+    if info:
+        path = REGISTRY_DIR / f"model-{info['version']:04d}.joblib"
+
+    if SHARED_TABLES_DIR and version is None:
+        from services.shared_tables import load_scorer
+
+        scorer = load_scorer(Path(SHARED_TABLES_DIR))
+        if scorer is not None:
+            # Serving mode: memory-mapped weights, sklearn never imported here
+            return ActiveModel(scorer, scorer, info)
+    if info or path.exists():
+        import joblib
+        from services.scorer import FastScorer
+
+        model = joblib.load(path)
+        return ActiveModel(model, FastScorer.from_pipeline(model), info)
+    return ActiveModel(None, None, {})
+
+
+def refresh_model() -> bool:
+    """
+    Load and swap in the published model if it changed since the last
+    check. On a failed load the previous model stays active. Returns True
+    when a new model was swapped in.
+    """
+    global _ACTIVE
+
+    with _MODEL_LOCK:
+        active = _ACTIVE
+        stamp = _model_stamp()
+        if active is not None and stamp == active.stamp:
+            return False
+        try:
+            loaded = _read_model()._replace(stamp=stamp)
+        except Exception:
+            if active is None:
+                raise
+            logger.warning("model reload failed; keeping version %s", active.info.get("version"), exc_info=True)
+            _ACTIVE = active._replace(stamp=stamp)  # don't retry the same file every tick
+            return False
+        if active is not None:
+            logger.info("model swapped: version %s -> %s", active.info.get("version"), loaded.info.get("version"))
+        _ACTIVE = loaded
+        return True
+
+
+def current_model() -> ActiveModel:
+    """
+    The active model; loaded on first use, then only replaced by refresh_model().
+    """
+    active = _ACTIVE
+    if active is None:
+        refresh_model()
+        active = _ACTIVE
+    return active
+
+
 def _load_model():
-    global _MODEL
-    if _MODEL is not None:
-        return _MODEL
-    if MODEL_PATH.exists():
-        _MODEL = joblib.load(MODEL_PATH)
-    else:
-        _MODEL = None
-    return _MODEL
+    return current_model().model
+
+
+def _watch(stop: threading.Event) -> None:
+    while not stop.wait(MODEL_RELOAD_INTERVAL_S):
+        try:
+            refresh_model()
+        except Exception:
+            logger.exception("model watcher check failed")
+        try:
+            refresh_antibiogram()
+        except Exception:
+            logger.exception("antibiogram watcher check failed")
+
+
+def start_model_watcher() -> None:
+    """
+    Check for a newly published model (and antibiogram ingest) every
+    MODEL_RELOAD_INTERVAL_S in a daemon thread, so loading happens off the
+    request path.
+    """
+    global _WATCHER
+    if _WATCHER is not None and _WATCHER[0].is_alive():
+        return
+    stop = threading.Event()
+    thread = threading.Thread(target=_watch, args=(stop,), name="model-watcher", daemon=True)
+    thread.start()
+    _WATCHER = (thread, stop)
+
+
+def stop_model_watcher() -> None:
+    global _WATCHER
+    if _WATCHER is not None:
+        thread, stop = _WATCHER
+        stop.set()
+        thread.join(timeout=5)
+        _WATCHER = None
+
+
+# ---- local antibiogram signal ----
+
+def refresh_antibiogram() -> bool:
+    """
+    Load and swap in the ANTIBIOGRAM_DIR engine if it changed (warm-up and
+    the watcher; never on the request path). Returns True on a swap.
+    """
+    if not ANTIBIOGRAM_DIR:
+        return False
+    from services import antibiogram  # numpy; only when enabled
 
+    return antibiogram.refresh()
 
-def _rules_rank(parsed: ParsedReport, patient: PatientInfo) -> List[RankedOption]:
+
+def _antibiogram() -> Optional[Antibiogram]:
+    if not ANTIBIOGRAM_DIR:
+        return None
+    from services import antibiogram
+
+    return antibiogram.current()  # a reference read; refresh_antibiogram() loads
+
+
+def _blend_local(score: float, why: List[str], engine: Optional[Antibiogram], org: str, drug: str, specimen: str) -> float:
+    """
+    Mix the local %S for (organism, drug, specimen) into score and say so;
+    unchanged when there is no local rate with enough isolates.
+    """
+    found = engine.best_rate(org, drug, specimen) if engine is not None else None
+    if found is None:
+        return score
+    rate, key = found
+    why.append(
+        f"Local antibiogram: {rate.pct:.0%} susceptible "
+        f"(n={rate.total}, {key[2] or 'all specimens'}, last {engine.window_days} days)."
+    )
+    return (1.0 - ANTIBIOGRAM_WEIGHT) * score + ANTIBIOGRAM_WEIGHT * rate.pct
+
+
+def _rules_rank(parsed: ReportRecord, patient: PatientInfo) -> List[OptionRecord]:
     if not parsed.organisms or not parsed.organisms[0].ast:
         return []
 
     ast = parsed.organisms[0].ast
-    ranked: List[RankedOption] = []
+    ranked: List[OptionRecord] = []
+    engine = _antibiogram()
+    org = parsed.organisms[0].organism.strip().lower()
 
     for r in ast:
         drug_key = r.drug.lower()
@@ -56,53 +238,30 @@ def _rules_rank(parsed: ParsedReport, patient: PatientInfo) -> List[RankedOption
 
         if penalty > 0:
             why.append("Spectrum stewardship penalty applied (broader agent).")
+        score = _blend_local(score, why, engine, org, r.drug.strip().lower(), parsed.specimen.value)
 
-        ranked.append(
-            RankedOption(
-                drug=r.drug,
-                score=score,
-                why=why,
-                sir_summary=r.sir.value,
-                mic_summary=r.mic,
-                warnings=[]
-            )
-        )
+        ranked.append(OptionRecord(r.drug, score, why, r.sir.value, r.mic, []))
 
     ranked.sort(key=lambda x: x.score, reverse=True)
     return ranked[:5]
 
 
-def _ml_rank(parsed: ParsedReport, patient: PatientInfo) -> Optional[List[RankedOption]]:
-    model = _load_model()
-    if model is None:
-        return None
-
+def _ml_candidates(parsed: ReportRecord) -> Tuple[str, List[ASTRecord]]:
+    """
+    Organism key + AST rows eligible for ML scoring (never R).
+    """
     if not parsed.organisms or not parsed.organisms[0].ast:
-        return []
+        return "", []
 
     org = parsed.organisms[0].organism.strip().lower()
-    ast = parsed.organisms[0].ast
-
-    # Build candidate rows only from drugs in the report
-    rows = []
-    keep = []
-    for r in ast:
-        # Never recommend R (hard rule)
-        if r.sir == SIR.resistant:
-            continue
+    keep = [r for r in parsed.organisms[0].ast if r.sir != SIR.resistant]
+    return org, keep
 
-        rows.append({"organism": org, "drug": r.drug.strip().lower()})
-        keep.append(r)
 
-    if not rows:
-        return []
-
-    import pandas as pd
-    X = pd.DataFrame(rows)
-
-    probs = model.predict_proba(X)[:, 1]  # P(susceptible)
-
-    ranked: List[RankedOption] = []
+def _ml_options(
+    keep: List[ASTRecord], probs, engine: Optional[Antibiogram] = None, org: str = "", specimen: str = ""
+) -> List[OptionRecord]:
+    ranked: List[OptionRecord] = []
     for r, p in zip(keep, probs):
         why = [f"ML predicted susceptibility probability: {p:.2f}."]
         # also include actual S/I from report for transparency
@@ -110,23 +269,57 @@ def _ml_rank(parsed: ParsedReport, patient: PatientInfo) -> Optional[List[Ranked
             why.append("Culture report shows Sensitive (S).")
         elif r.sir == SIR.intermediate:
             why.append("Culture report shows Intermediate (I).")
+        p = _blend_local(p, why, engine, org, r.drug.strip().lower(), specimen)
 
-        ranked.append(
-            RankedOption(
-                drug=r.drug,
-                score=float(max(0.0, min(1.0, p))),
-                why=why,
-                sir_summary=r.sir.value,
-                mic_summary=r.mic,
-                warnings=[]
-            )
-        )
+        ranked.append(OptionRecord(r.drug, float(max(0.0, min(1.0, p))), why, r.sir.value, r.mic, []))
 
     ranked.sort(key=lambda x: x.score, reverse=True)
     return ranked[:5]
 
 
-def rank_options(parsed: ParsedReport, patient: PatientInfo) -> List[RankedOption]:
+def _ml_rank_batch(
+    parsed_reports: List[ReportRecord], active: Optional[ActiveModel] = None
+) -> Optional[List[List[OptionRecord]]]:
+    """
+    Score candidate rows from every report with a single predict_proba call,
+    with `active` or else the served model. Returns None when no model is
+    available (caller falls back to rules).
+    """
+    active = active or current_model()
+    if active.model is None:
+        return None
+
+    # Build candidate rows only from drugs in each report
+    rows = []
+    spans = []
+    for parsed in parsed_reports:
+        org, keep = _ml_candidates(parsed)
+        spans.append((keep, len(rows), org, parsed.specimen.value))
+        rows.extend((org, r.drug.strip().lower()) for r in keep)
+
+    probs = []
+    if rows:
+        if active.scorer is not None:
+            # Fast path: precomputed weights, no pandas/OneHotEncoder
+            probs = active.scorer.score_pairs(rows)
+        else:
+            import pandas as pd
+            X = pd.DataFrame(rows, columns=["organism", "drug"])
+            probs = active.model.predict_proba(X)[:, 1]  # P(susceptible)
+
+    engine = _antibiogram()
+    return [
+        _ml_options(keep, probs[start:start + len(keep)], engine, org, specimen) if keep else []
+        for keep, start, org, specimen in spans
+    ]
+
+
+def _ml_rank(parsed: ReportRecord, patient: PatientInfo) -> Optional[List[OptionRecord]]:
+    ranked = _ml_rank_batch([parsed])
+    return None if ranked is None else ranked[0]
+
+
+def rank_options(parsed: ReportRecord, patient: PatientInfo) -> List[OptionRecord]:
     """
     ML-first ranking:
     - If model exists: rank by P(S)
@@ -135,5 +328,20 @@ def rank_options(parsed: ParsedReport, patient: PatientInfo) -> List[RankedOptio
     """
     ml = _ml_rank(parsed, patient)
     if ml is not None:
+        RANKER_MODE.inc(mode="ml")
         return ml
+    RANKER_MODE.inc(mode="rules")
     return _rules_rank(parsed, patient)
+
+
+def rank_options_batch(items: List[Tuple[ReportRecord, PatientInfo]]) -> List[List[OptionRecord]]:
+    """
+    Batch variant of rank_options: one model call for all reports.
+    Same rules as rank_options, returned in input order.
+    """
+    ml = _ml_rank_batch([parsed for parsed, _ in items])
+    if ml is not None:
+        RANKER_MODE.inc(len(items), mode="ml")
+        return ml
+    RANKER_MODE.inc(len(items), mode="rules")
+    return [_rules_rank(parsed, patient) for parsed, patient in items]
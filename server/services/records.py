@@ -0,0 +1,90 @@
+# services/records.py
+"""
+Internal records for the parse -> rank hot path.
+
+The parser builds one AST row per drug and the rankers one option per
+candidate; as Pydantic models every one of them was validated on
+construction although the values come from our own code. These slots
+dataclasses carry the same fields under the same names, so nodes read
+them exactly like the schema models. Pydantic is used at the boundaries
+only: to_schema() gives the api/schemas.py model for the JSON responses.
+
+ASTRecord, OrganismRecord and ReportRecord are frozen with tuples for
+sequences, like the models they replace: parse results are cached and
+shared between requests (services/parser.py).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from api.schemas import SIR, ASTResult, OrganismResult, ParsedReport, RankedOption, SpecimenType
+
+
+@dataclass(frozen=True, slots=True)
+class ASTRecord:
+    drug: str
+    sir: SIR
+    mic: Optional[str] = None
+    evidence_line: Optional[str] = None
+
+    def to_schema(self) -> ASTResult:
+        return ASTResult.model_construct(drug=self.drug, sir=self.sir, mic=self.mic, evidence_line=self.evidence_line)
+
+
+@dataclass(frozen=True, slots=True)
+class OrganismRecord:
+    organism: str
+    ast: Tuple[ASTRecord, ...] = ()
+    notes: Optional[Tuple[str, ...]] = None
+
+    def to_schema(self) -> OrganismResult:
+        return OrganismResult.model_construct(
+            organism=self.organism, ast=tuple(r.to_schema() for r in self.ast), notes=self.notes
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ReportRecord:
+    specimen: SpecimenType
+    organisms: Tuple[OrganismRecord, ...] = ()
+    overall_notes: Optional[Tuple[str, ...]] = None
+
+    def to_schema(self) -> ParsedReport:
+        return ParsedReport.model_construct(
+            specimen=self.specimen,
+            organisms=tuple(o.to_schema() for o in self.organisms),
+            overall_notes=self.overall_notes,
+        )
+
+
+@dataclass(slots=True)
+class OptionRecord:
+    drug: str
+    score: float
+    why: List[str] = field(default_factory=list)
+    sir_summary: Optional[str] = None
+    mic_summary: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+
+    def to_schema(self) -> RankedOption:
+        # Validated here (score within [0, 1]), once per served option
+        return RankedOption(
+            drug=self.drug, score=self.score, why=self.why,
+            sir_summary=self.sir_summary, mic_summary=self.mic_summary, warnings=self.warnings,
+        )
+
+
+def refreeze(report: ReportRecord) -> ReportRecord:
+    """
+    A report restored from a session checkpoint with its sequences as
+    tuples again (msgpack hands them back as lists).
+    """
+    return ReportRecord(
+        specimen=report.specimen,
+        organisms=tuple(
+            OrganismRecord(o.organism, tuple(o.ast), None if o.notes is None else tuple(o.notes))
+            for o in report.organisms
+        ),
+        overall_notes=None if report.overall_notes is None else tuple(report.overall_notes),
+    )
@@ -0,0 +1,106 @@
+# services/response_cache.py
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Callable, Hashable, Optional, Tuple
+
+from api.schemas import CultureReportRequest
+from api.settings import ANTIBIOGRAM_DIR, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_S
+from services.cache import TTLCache
+from services.dosing import _load_dosing_table
+from services.parser import normalize_report_text
+from services.ranker import current_model
+
+# PatientInfo fields that can change an /analyze response today (validate gates
+# on all four, dosing matches on syndrome). A field must be added here as soon
+# as any node starts reading it, or cached responses would ignore it.
+KEY_PATIENT_FIELDS = ("syndrome", "beta_lactam_allergy", "egfr_ml_min", "renal_bucket")
+
+
+def request_key(payload: CultureReportRequest, variant: str = "") -> str:
+    """
+    Canonical hash of what determines the response: normalized report text
+    plus KEY_PATIENT_FIELDS, and the response format `variant` if any.
+    Whitespace-only differences and irrelevant patient fields map to the
+    same key.
+    """
+    patient = payload.patient
+    fields = [getattr(patient, f) for f in KEY_PATIENT_FIELDS]
+    canon = [normalize_report_text(payload.report_text), [getattr(v, "value", v) for v in fields]]
+    if variant:
+        canon.append(variant)
+    canon = json.dumps(canon, separators=(",", ":"))
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+def loaded_version() -> Hashable:
+    """
+    Stamps of what the graph will run with: the loaded dosing index (which
+    _load_dosing_table re-checks on its own interval), the active model
+    (swapped by the model watcher) and the loaded local antibiogram.
+    In-memory reads; no file is stat'ed here.
+    """
+    model = current_model()
+    engine_stamp = None
+    if ANTIBIOGRAM_DIR:
+        from services import antibiogram  # numpy; only when enabled
+
+        engine_stamp = antibiogram.active().stamp
+    return _load_dosing_table().stamp, model.stamp, model.info.get("version"), engine_stamp
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of serialized /analyze responses, as (status, body bytes).
+    Entries are keyed on version() as well as the request, so a response is
+    only replayed while the tables and model that built it are still the
+    ones loaded. A version change also drops the whole cache.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: Optional[float], version: Callable[[], Hashable] = loaded_version):
+        self._cache = TTLCache(maxsize, ttl_s)
+        self.version = version
+        self._lock = threading.Lock()
+        self._version: Hashable = None
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.maxsize > 0
+
+    def key(self, request: str) -> Tuple[Hashable, str]:
+        """
+        Cache key for a request_key() under the currently loaded version.
+        Take it before running the graph and use it for both get and set:
+        the graph then runs with this version or a newer one.
+        """
+        version = self.version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    if self._version is not None:
+                        self._cache.clear()
+                        self.invalidations += 1
+                    self._version = version
+        return version, request
+
+    def get(self, key: Tuple[Hashable, str]) -> Optional[Tuple[str, bytes]]:
+        if not self.enabled:
+            return None
+        return self._cache.get(key)
+
+    def set(self, key: Tuple[Hashable, str], status: str, body: bytes) -> None:
+        if not self.enabled:
+            return
+        self._cache.set(key, (status, body))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self):
+        return {**self._cache.stats(), "invalidations": self.invalidations}
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_S)
@@ -0,0 +1,137 @@
+# services/scorer.py
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.special import expit
+
+
+class FastScorer:
+    """
+    Pandas-free scorer for the ranker's (organism, drug) one-hot logistic model.
+
+    The fitted Pipeline is OneHotEncoder(organism, drug) -> LogisticRegression,
+    so the logit of any row is just:
+        intercept + w_organism[organism] + w_drug[drug]
+    (unknown categories contribute 0, matching handle_unknown="ignore").
+    Weights are pulled out once at load time; scoring is dict lookups + expit.
+    """
+
+    def __init__(
+        self,
+        intercept: float,
+        organisms: Sequence[str],
+        organism_coef: np.ndarray,
+        drugs: Sequence[str],
+        drug_coef: np.ndarray,
+    ):
+        """
+        *_coef hold one weight per category, in vocabulary order.
+        They may be read-only memmaps (see save/load).
+        """
+        self.intercept = float(intercept)
+        self.organisms = list(organisms)
+        self.drugs = list(drugs)
+        self.organism_coef = organism_coef
+        self.drug_coef = drug_coef
+        # Per-row scoring is faster through small dicts of Python floats than
+        # through numpy fancy indexing (the model has tens of categories)
+        self.organism_weights: Dict[str, float] = dict(zip(self.organisms, organism_coef.tolist()))
+        self.drug_weights: Dict[str, float] = dict(zip(self.drugs, drug_coef.tolist()))
+
+    @classmethod
+    def from_pipeline(cls, pipe) -> Optional["FastScorer"]:
+        """
+        Extract weights from the Pipeline produced by ml/train.py.
+        Returns None if the pipeline doesn't have that exact shape
+        (caller should keep using predict_proba).
+        """
+        try:
+            pre = pipe.named_steps["pre"]
+            clf = pipe.named_steps["clf"]
+        except (AttributeError, KeyError):
+            return None
+
+        fitted = [t for t in pre.transformers_ if t[0] != "remainder"]
+        if len(fitted) != 1:
+            return None
+        _, enc, cols = fitted[0]
+
+        if type(enc).__name__ != "OneHotEncoder" or list(cols) != ["organism", "drug"]:
+            return None
+        # drop / infrequent-category grouping change the column layout
+        if enc.drop is not None or getattr(enc, "infrequent_categories_", None) is not None:
+            return None
+        if type(clf).__name__ != "LogisticRegression" or len(clf.classes_) != 2:
+            return None
+        if list(clf.classes_) != [0, 1]:
+            return None
+
+        coef = np.asarray(clf.coef_, dtype=np.float64).ravel()
+        org_cats, drug_cats = enc.categories_
+        if coef.shape[0] != len(org_cats) + len(drug_cats):
+            return None
+
+        n_org = len(org_cats)
+        return cls(
+            float(clf.intercept_[0]),
+            [str(c) for c in org_cats],
+            coef[:n_org],
+            [str(c) for c in drug_cats],
+            coef[n_org:],
+        )
+
+    # ---------------------------
+    # Memory-mappable tables
+    # ---------------------------
+
+    def save(self, directory: Path, **meta) -> None:
+        """
+        Write the tables as raw .npy arrays (memory-mappable) plus a small
+        JSON vocabulary. Extra keyword args are stored as metadata.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "organism_coef.npy", np.ascontiguousarray(self.organism_coef, dtype=np.float64))
+        np.save(directory / "drug_coef.npy", np.ascontiguousarray(self.drug_coef, dtype=np.float64))
+        vocab = {"intercept": self.intercept, "organisms": self.organisms, "drugs": self.drugs, "meta": meta}
+        (directory / "scorer.json").write_text(json.dumps(vocab), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> Tuple["FastScorer", Dict]:
+        """
+        Inverse of save(); returns (scorer, meta). With mmap=True the weight
+        arrays are read-only views of the files (shared via the page cache).
+        """
+        vocab = json.loads((directory / "scorer.json").read_text(encoding="utf-8"))
+        mode = "r" if mmap else None
+        org_coef = np.asarray(np.load(directory / "organism_coef.npy", mmap_mode=mode))
+        drug_coef = np.asarray(np.load(directory / "drug_coef.npy", mmap_mode=mode))
+        if org_coef.shape != (len(vocab["organisms"]),) or drug_coef.shape != (len(vocab["drugs"]),):
+            raise ValueError(f"scorer tables in {directory} don't match their vocabulary")
+        scorer = cls(vocab["intercept"], vocab["organisms"], org_coef, vocab["drugs"], drug_coef)
+        return scorer, vocab.get("meta", {})
+
+    def score_pairs(self, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """
+        P(susceptible) for each (organism, drug) pair, in input order.
+        Pairs from many reports can be scored in one call.
+        """
+        if not pairs:
+            return np.empty(0, dtype=np.float64)
+
+        org_w = self.organism_weights
+        drug_w = self.drug_weights
+        # Same summation order as the sparse decision_function:
+        # (w_organism + w_drug) + intercept
+        z = np.array(
+            [org_w.get(org, 0.0) + drug_w.get(drug, 0.0) for org, drug in pairs],
+            dtype=np.float64,
+        )
+        z += self.intercept
+        return expit(z)
+
+    def score(self, organism: str, drug: str) -> float:
+        return float(self.score_pairs([(organism, drug)])[0])
@@ -0,0 +1,249 @@
+# services/shadow.py
+"""
+Shadow ranking: run a candidate ranker on a sample of live requests, off the
+request path, and record how far it agrees with the ranking that was served.
+
+SHADOW_CANDIDATE picks the candidate:
+    rules      the rules fallback
+    model:N    registry version N (ml/models/model-NNNN.joblib), e.g. a new
+               version before `python -m ml.registry promote N`
+
+rank_update() hands each ranked report to SHADOW.submit(), which samples
+SHADOW_SAMPLE_RATE of them into a bounded queue (dropped when full, never
+blocking). One daemon thread per process re-ranks them with the candidate
+and appends top-1 agreement and Kendall tau to the SQLite file SHADOW_DB.
+
+Summary from server/:
+    python -m services.shadow                          # per (candidate, served)
+    python -m services.shadow --since 2026-10-01 --db data/shadow.db
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Tuple
+
+from api.schemas import PatientInfo
+from api.settings import SHADOW_CANDIDATE, SHADOW_DB, SHADOW_QUEUE_SIZE, SHADOW_SAMPLE_RATE
+from services import ranker
+from services.metrics import SHADOW_RANKINGS
+from services.records import OptionRecord, ReportRecord
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def kendall_tau(served: Sequence[str], candidate: Sequence[str]) -> Optional[float]:
+    """
+    Kendall tau between two rankings, over the drugs both contain; None
+    when fewer than two are shared.
+    """
+    position = {drug: i for i, drug in enumerate(candidate)}
+    ranks = [position[drug] for drug in served if drug in position]
+    n = len(ranks)
+    if n < 2:
+        return None
+    score = sum(1 if ranks[j] > ranks[i] else -1 for i in range(n) for j in range(i + 1, n))
+    return score / (n * (n - 1) / 2)
+
+
+class _Store:
+    """
+    Append-only SQLite table of shadow comparisons (WAL: shared by workers).
+    """
+
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS shadow_rankings ("
+            " ts REAL NOT NULL, candidate TEXT NOT NULL, served TEXT NOT NULL, organism TEXT,"
+            " served_top TEXT, candidate_top TEXT, top1_match INTEGER, kendall_tau REAL,"
+            " n_common INTEGER NOT NULL, candidate_ms REAL NOT NULL)"
+        )
+
+    def add(self, rows: List[Tuple[Any, ...]]) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany("INSERT INTO shadow_rankings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def summary(self, since: float = 0.0) -> List[Tuple[Any, ...]]:
+        return self._conn.execute(
+            "SELECT candidate, served, COUNT(*), AVG(top1_match), AVG(kendall_tau), AVG(candidate_ms)"
+            " FROM shadow_rankings WHERE ts >= ? GROUP BY candidate, served ORDER BY candidate, served",
+            (since,),
+        ).fetchall()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ShadowRanker:
+    """
+    Samples ranked reports on the request path and compares them against
+    the candidate in a background thread. The request path only draws a
+    random number and does a put_nowait.
+    """
+
+    def __init__(self, candidate: str, sample_rate: float, db_path: str, queue_size: int = 1000):
+        if candidate and candidate != "rules" and not candidate.startswith("model:"):
+            raise ValueError(f"SHADOW_CANDIDATE must be 'rules' or 'model:N', got {candidate!r}")
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.db_path = db_path
+        self.queue_size = queue_size
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+        self._model: Optional[ranker.ActiveModel] = None  # model:N, loaded by the worker
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.candidate) and self.sample_rate > 0
+
+    # ---------------------------
+    # Request path
+    # ---------------------------
+
+    def submit(self, parsed: ReportRecord, patient: PatientInfo, served: List[OptionRecord]) -> bool:
+        """
+        Queue a sampled report for comparison. Returns True if it was queued.
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+        active = ranker.current_model()
+        version = active.info.get("version")
+        served_by = "rules" if active.model is None else f"model:{version}" if version is not None else "ml"
+        item = (time.time(), parsed, patient, [o.drug for o in served], served_by)
+        try:
+            self._worker_queue().put_nowait(item)
+        except queue.Full:
+            SHADOW_RANKINGS.inc(outcome="dropped")
+            return False
+        return True
+
+    def _worker_queue(self) -> queue.Queue:
+        # The thread is started on first use in each process (forked workers included)
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.queue_size)
+                    self._thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name="shadow-ranker", daemon=True
+                    )
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Finish the queued comparisons and stop the thread.
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread, self._pid = None, 0
+
+    # ---------------------------
+    # Worker
+    # ---------------------------
+
+    def _rank(self, parsed: ReportRecord, patient: PatientInfo) -> List[OptionRecord]:
+        if self.candidate == "rules":
+            return ranker._rules_rank(parsed, patient)
+        if self._model is None:
+            self._model = ranker._read_model(int(self.candidate.split(":", 1)[1]))
+        return ranker._ml_rank_batch([parsed], self._model)[0]
+
+    def compare(self, ts: float, parsed: ReportRecord, patient: PatientInfo, served: List[str], served_by: str):
+        """
+        One shadow_rankings row for a served ranking.
+        """
+        started = time.perf_counter()
+        candidate = [o.drug for o in self._rank(parsed, patient)]
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        top1 = int(served[0] == candidate[0]) if served and candidate else None
+        common = len(set(served) & set(candidate))
+        organism = parsed.organisms[0].organism if parsed.organisms else None
+        return (
+            ts, self.candidate, served_by, organism,
+            served[0] if served else None, candidate[0] if candidate else None,
+            top1, kendall_tau(served, candidate), common, elapsed_ms,
+        )
+
+    def _run(self, items: queue.Queue) -> None:
+        store = _Store(self.db_path)
+        stopping = False
+        while not stopping:
+            batch = [items.get()]
+            while len(batch) < 100:  # write whatever has piled up in one transaction
+                try:
+                    batch.append(items.get_nowait())
+                except queue.Empty:
+                    break
+            rows = []
+            for item in batch:
+                if item is _STOP:
+                    stopping = True
+                    continue
+                try:
+                    row = self.compare(*item)
+                except Exception:
+                    logger.warning("shadow ranking failed", exc_info=True)
+                    SHADOW_RANKINGS.inc(outcome="error")
+                    continue
+                SHADOW_RANKINGS.inc(outcome={1: "top1_match", 0: "top1_mismatch"}.get(row[6], "empty"))
+                rows.append(row)
+            if rows:
+                try:
+                    store.add(rows)
+                except sqlite3.Error:
+                    logger.warning("could not record %d shadow rankings", len(rows), exc_info=True)
+        store.close()
+
+
+SHADOW = ShadowRanker(SHADOW_CANDIDATE, SHADOW_SAMPLE_RATE, SHADOW_DB, SHADOW_QUEUE_SIZE)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=SHADOW_DB)
+    ap.add_argument("--since", help="ISO date; only comparisons from then on")
+    args = ap.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"{args.db}: no shadow rankings recorded")
+        return 1
+    since = 0.0
+    if args.since:
+        since = datetime.fromisoformat(args.since).replace(tzinfo=timezone.utc).timestamp()
+
+    store = _Store(args.db)
+    print(f"{'candidate':<12}{'served':<12}{'samples':>9}{'top-1 agree':>13}{'kendall tau':>13}{'cand ms':>9}")
+    for candidate, served, n, top1, tau, ms in store.summary(since):
+        top1_s = "-" if top1 is None else f"{top1:.1%}"
+        tau_s = "-" if tau is None else f"{tau:.3f}"
+        print(f"{candidate:<12}{served:<12}{n:>9}{top1_s:>13}{tau_s:>13}{ms:>9.2f}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+# services/shared_tables.py
+"""
+Preloaded scoring tables for multi-process serving.
+
+Build once (before starting workers):
+    python -m services.shared_tables                 # -> $SHARED_TABLES_DIR or data/shared
+    python -m services.shared_tables --dir /srv/aura/shared
+
+Workers started with SHARED_TABLES_DIR set then:
+- load the ranker's FastScorer from memory-mappable .npy arrays instead of
+  unpickling model.joblib (no sklearn/pandas import in the worker at all);
+- load the dosing index from pre-normalized rows instead of parsing the CSV.
+
+Every table records the (mtime_ns, size) of its source file; a stale table is
+ignored and the worker falls back to the source, so edits are never masked.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from services import dosing, ranker
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path(__file__).parent.parent / "data" / "shared"
+SCORER_DIR = "scorer"
+DOSING_FILE = "dosing_index.json"
+
+
+def _stamp(path: Path) -> List[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+
+def build(directory: Path) -> Dict[str, object]:
+    """
+    Write the scorer tables and the packed dosing index into `directory`.
+    Returns a short summary.
+    """
+    import joblib
+    from services.scorer import FastScorer
+
+    directory.mkdir(parents=True, exist_ok=True)
+    summary: Dict[str, object] = {"dir": str(directory)}
+
+    if ranker.MODEL_PATH.exists():
+        stamp = _stamp(ranker.MODEL_PATH)
+        scorer = FastScorer.from_pipeline(joblib.load(ranker.MODEL_PATH))
+        if scorer is None:
+            # Unsupported pipeline shape: workers keep unpickling model.joblib
+            logger.warning("model.joblib is not a one-hot + LR pipeline; scorer tables not written")
+        else:
+            scorer.save(directory / SCORER_DIR, model_stamp=stamp)
+            summary["scorer"] = {"organisms": len(scorer.organisms), "drugs": len(scorer.drugs)}
+
+    stamp = _stamp(dosing.CSV_PATH)
+    rows = dosing._read_rows()
+    _write_atomic(directory / DOSING_FILE, json.dumps({"csv_stamp": stamp, "rows": rows}))
+    summary["dosing_rows"] = len(rows)
+    return summary
+
+
+# -------------------------------------------------
+# LOAD (worker side)
+# -------------------------------------------------
+
+def load_scorer(directory: Path):
+    """
+    FastScorer backed by memory-mapped arrays, or None if the tables are
+    missing or were built from a different model.joblib.
+    """
+    from services.scorer import FastScorer
+
+    path = directory / SCORER_DIR
+    if not (path / "scorer.json").exists() or not ranker.MODEL_PATH.exists():
+        return None
+    try:
+        scorer, meta = FastScorer.load(path, mmap=True)
+    except (OSError, ValueError, KeyError):
+        logger.warning("shared scorer tables in %s unreadable; loading model.joblib", path, exc_info=True)
+        return None
+    if meta.get("model_stamp") != _stamp(ranker.MODEL_PATH):
+        logger.info("shared scorer tables are stale; loading model.joblib")
+        return None
+    return scorer
+
+
+def load_dosing_rows(directory: Path, csv_stamp: Tuple[int, int]) -> Optional[List[Dict[str, str]]]:
+    """
+    Pre-normalized dosing rows, or None unless they were built from the
+    dosing_table.csv with this exact (mtime_ns, size).
+    """
+    path = directory / DOSING_FILE
+    try:
+        packed = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if packed.get("csv_stamp") != list(csv_stamp):
+        return None
+    return packed["rows"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from api.settings import SHARED_TABLES_DIR
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", default=SHARED_TABLES_DIR or str(DEFAULT_DIR))
+    args = ap.parse_args(argv)
+
+    print(json.dumps(build(Path(args.dir))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
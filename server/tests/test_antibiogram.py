@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+
+from api.schemas import PatientInfo
+from services import ranker
+from services.antibiogram import Antibiogram, Rate, to_day
+from services.parser import parse_report
+from tests.test_end_to_end import E_COLI_REPORT
+
+TODAY = int(to_day(["2026-10-17"])[0])
+
+
+def _random_results(n, seed=0, days=400):
+    rng = np.random.default_rng(seed)
+    return {
+        "organism": rng.choice(["escherichia coli", "klebsiella pneumoniae"], n).tolist(),
+        "drug": rng.choice(["meropenem", "ampicillin", "amikacin"], n).tolist(),
+        "sir": rng.choice(["S", "S", "I", "R", "U"], n).tolist(),
+        "day": (TODAY - rng.integers(0, days, n)).tolist(),
+        "specimen": rng.choice(["blood", "urine", None], n).tolist(),
+        "ward": rng.choice(["icu", "ward 3", ""], n).tolist(),
+    }
+
+
+def _naive(data, today, window_days, organism, drug, specimen=None, ward=None):
+    s = t = 0
+    for o, d, r, day, sp, w in zip(*(data[c] for c in ("organism", "drug", "sir", "day", "specimen", "ward"))):
+        if r not in ("S", "I", "R") or not (today - window_days < day) or o != organism or d != drug:
+            continue
+        if specimen is not None and sp != specimen:
+            continue
+        if ward is not None and w != ward:
+            continue
+        s += r == "S"
+        t += 1
+    return Rate(s, t) if t else None
+
+
+def _ingest(engine, data):
+    return engine.ingest(data["organism"], data["drug"], data["sir"], data["day"], data["specimen"], data["ward"])
+
+
+@pytest.mark.parametrize("specimen,ward", [(None, None), ("blood", None), (None, "icu"), ("urine", "ward 3")])
+def test_windowed_rates_match_a_scan(specimen, ward):
+    data = _random_results(5000)
+    engine = Antibiogram(window_days=180, min_isolates=1, today=TODAY)
+    # Two batches: counts accumulate incrementally
+    half = {c: v[:2500] for c, v in data.items()}
+    rest = {c: v[2500:] for c, v in data.items()}
+    assert _ingest(engine, half) + _ingest(engine, rest) == sum(r != "U" for r in data["sir"])
+
+    for today in (TODAY, TODAY + 30, TODAY + 179):
+        engine.advance(today)
+        for org in ("escherichia coli", "klebsiella pneumoniae"):
+            for drug in ("meropenem", "ampicillin", "amikacin"):
+                got = engine.rate(org, drug, specimen, ward)
+                assert got == _naive(data, today, 180, org, drug, specimen, ward)
+
+
+def test_min_isolates_and_fallback():
+    engine = Antibiogram(window_days=365, min_isolates=30, today=TODAY)
+    engine.ingest(["E. coli "] * 40, ["Meropenem"] * 40, ["S"] * 36 + ["R"] * 4, [TODAY] * 40,
+                  ["blood"] * 10 + ["urine"] * 30, ["icu"] * 40)
+
+    assert engine.rate("e. coli", "meropenem", "blood") is None  # only 10 isolates
+    assert engine.rate("e. coli", "meropenem", "urine") == Rate(26, 30)
+    rate, key = engine.best_rate("e. coli", "meropenem", "blood")
+    assert key == ("e. coli", "meropenem", None, None) and rate == Rate(36, 40)
+    assert engine.table("e. coli") == [("meropenem", Rate(36, 40))]
+
+
+def test_window_drops_old_results():
+    engine = Antibiogram(window_days=7, min_isolates=1, today=TODAY)
+    engine.ingest(["e. coli"] * 2, ["meropenem"] * 2, ["S", "R"], [TODAY - 6, TODAY])
+    assert engine.rate("e. coli", "meropenem") == Rate(1, 2)
+    engine.advance(TODAY + 1)
+    assert engine.rate("e. coli", "meropenem") == Rate(0, 1)
+    engine.advance(TODAY + 7)
+    assert engine.rate("e. coli", "meropenem") is None
+
+
+def test_save_load_roundtrip(tmp_path):
+    data = _random_results(3000, seed=3)
+    engine = Antibiogram(window_days=365, min_isolates=1, today=TODAY)
+    _ingest(engine, {c: v[:1000] for c, v in data.items()})
+    engine.save(tmp_path)
+    _ingest(engine, {c: v[1000:] for c, v in data.items()})
+    engine.save(tmp_path)  # appends the second segment only
+
+    loaded = Antibiogram.load(tmp_path, window_days=365, min_isolates=1, today=TODAY)
+    assert len(loaded) == len(engine)
+    for key in engine._key_ids:
+        assert loaded.rate(*key) == engine.rate(*key)
+
+
+def test_ranker_blends_local_rate(monkeypatch):
+    parsed = parse_report(E_COLI_REPORT)
+    patient = PatientInfo(age_years=60, syndrome="Empiric sepsis/bacteremia")
+    org = parsed.organisms[0].organism.strip().lower()
+    drug = next(r.drug for r in parsed.organisms[0].ast if r.sir.value == "S")
+
+    monkeypatch.setattr(ranker, "_antibiogram", lambda: None)
+    base = {o.drug: o.score for o in ranker.rank_options(parsed, patient)}
+
+    engine = Antibiogram(window_days=365, min_isolates=30, today=TODAY)
+    engine.ingest([org] * 50, [drug.lower()] * 50, ["S"] * 10 + ["R"] * 40, [TODAY] * 50, [parsed.specimen.value] * 50)
+    monkeypatch.setattr(ranker, "_antibiogram", lambda: engine)
+    monkeypatch.setattr(ranker, "ANTIBIOGRAM_WEIGHT", 0.5)
+
+    ranked = {o.drug: o for o in ranker.rank_options(parsed, patient)}
+    assert ranked[drug].score == pytest.approx(0.5 * base[drug] + 0.5 * 0.2)
+    assert any("Local antibiogram: 20% susceptible (n=50" in w for w in ranked[drug].why)
+    others = [d for d in ranked if d != drug]
+    assert all(ranked[d].score == pytest.approx(base[d]) for d in others)
+
+
+def test_engine_loaded_by_refresh_only(monkeypatch, tmp_path):
+    from services import antibiogram
+
+    monkeypatch.setattr(antibiogram, "ANTIBIOGRAM_DIR", str(tmp_path))
+    monkeypatch.setattr(antibiogram, "_ACTIVE", antibiogram.ActiveEngine(None))
+    engine = Antibiogram(window_days=365, min_isolates=1, today=TODAY)
+    _ingest(engine, _random_results(200))
+    engine.save(tmp_path)
+
+    # The request path only reads the reference
+    assert antibiogram.current() is None
+    assert antibiogram.refresh() is True
+    loaded = antibiogram.current()
+    assert len(loaded) == len(engine) and antibiogram.active().stamp is not None
+    assert antibiogram.refresh() is False and antibiogram.current() is loaded
+
+    # A broken ingest keeps serving the previous data
+    (tmp_path / antibiogram.MANIFEST).write_text("{", encoding="utf-8")
+    assert antibiogram.refresh() is False
+    assert antibiogram.current() is loaded
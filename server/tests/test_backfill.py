@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from agent import backfill
+from tests.test_cases_runner import load_cases
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "reports.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for filename, case in load_cases():
+            f.write(json.dumps({"id": filename, **case["request"]}) + "\n")
+        f.write(json.dumps({"id": "bad", "report_text": "x"}) + "\n")
+    return path
+
+
+def _rows(data: bytes):
+    return sorted((json.loads(line) for line in data.decode("utf-8").splitlines()), key=lambda r: r["id"])
+
+
+def test_backfill_matches_expected_statuses(archive, tmp_path):
+    out = tmp_path / "out.jsonl"
+    stats = backfill.run([archive], out, workers=2, chunk_size=3)
+
+    expected = {filename: case["expected"]["status"] for filename, case in load_cases()}
+    rows = _rows(out.read_bytes())
+    assert stats["reports"] == len(rows) == len(expected) + 1
+    assert stats["errors"] == 1
+    for row in rows:
+        assert row["status"] == expected.get(row["id"], "error"), row["id"]
+
+
+def test_backfill_resumes_after_crash(archive, tmp_path):
+    out = tmp_path / "out.jsonl"
+    backfill.run([archive], out, workers=1, chunk_size=3)
+    full = out.read_bytes()
+
+    # Crash after chunk 0 was recorded, while chunk 1 was half written
+    progress = out.with_name(out.name + ".progress")
+    first = progress.read_text(encoding="utf-8").splitlines()[0]
+    progress.write_text(first + "\n", encoding="utf-8")
+    with open(out, "r+b") as f:
+        f.truncate(json.loads(first)["offset"] + 40)
+
+    stats = backfill.run([archive], out, workers=1, chunk_size=3)
+    assert stats["skipped_chunks"] == 1
+    assert _rows(out.read_bytes()) == _rows(full)
+
+
+def test_backfill_parquet_parts(archive, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out = tmp_path / "parts"
+    backfill.run([archive], out, fmt="parquet", workers=1, chunk_size=4)
+    table = pq.read_table(out)
+    assert table.num_rows == len(load_cases()) + 1
+    assert table.schema.names == list(backfill.COLUMNS)
+
+    stats = backfill.run([archive], out, fmt="parquet", workers=1, chunk_size=4)
+    assert stats["reports"] == 0 and stats["skipped_chunks"] == len(list(out.glob("part-*.parquet")))
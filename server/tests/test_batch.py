@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from agent.batch import run_batch
+from api.main import app
+from services.metrics import NODE_LATENCY
+from services.parser import parse_report
+from api.schemas import CultureReportRequest, PatientInfo
+from services.ranker import rank_options, rank_options_batch
+from tests.test_cases_runner import load_cases
+
+client = TestClient(app)
+
+
+def test_batch_matches_expected_statuses():
+    cases = load_cases()
+    r = client.post("/analyze/batch", json=[case["request"] for _, case in cases])
+    assert r.status_code == 200, r.text
+
+    body = r.json()
+    assert len(body) == len(cases)
+    for (filename, case), item in zip(cases, body):
+        assert item["status"] == case["expected"]["status"], f"{filename} got {item['status']}"
+
+
+def test_rank_options_batch_matches_single():
+    cases = load_cases()
+    items = []
+    for _, case in cases:
+        req = case["request"]
+        items.append((parse_report(req["report_text"]), PatientInfo(**req["patient"])))
+
+    batched = rank_options_batch(items)
+    for (parsed, patient), ranked in zip(items, batched):
+        single = rank_options(parsed, patient)
+        assert [(o.drug, o.score) for o in ranked] == [(o.drug, o.score) for o in single]
+
+
+def test_batch_records_node_latency():
+    payloads = [CultureReportRequest(**case["request"]) for _, case in load_cases()]
+    nodes = ("extract", "validate", "rank", "dose", "respond")
+    before = {n: NODE_LATENCY.count(node=n) for n in nodes}
+
+    states = run_batch(payloads)
+
+    ranked = sum("ranked_options" in s for s in states)
+    assert ranked > 0
+    added = {n: NODE_LATENCY.count(node=n) - before[n] for n in nodes}
+    assert added == {"extract": len(states), "validate": len(states), "rank": ranked, "dose": ranked, "respond": len(states)}
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+import services.dosing as dosing
+from api.schemas import PatientInfo
+
+
+@pytest.fixture
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(dosing, "_INDEX", None)
+    monkeypatch.setattr(dosing, "_NEXT_CHECK", 0.0)
+    monkeypatch.setattr(dosing, "DOSING_RELOAD_INTERVAL_S", 0.0)
+    yield
+
+
+def _linear_match(rows, drug, syndrome):
+    # Reference: the original per-request scan over every row
+    drug_key = dosing._canon(drug)
+    syndrome_key = dosing._canon(syndrome)
+    exact, generic = [], []
+    for row in rows:
+        if dosing._canon(row.get("drug", "")) != drug_key:
+            continue
+        indication = dosing._canon(row.get("indication", ""))
+        if indication == syndrome_key or syndrome_key in indication or indication in syndrome_key:
+            exact.append(row)
+        elif not indication:
+            generic.append(row)
+    return exact or generic
+
+
+def test_index_matches_linear_scan(fresh_index):
+    index = dosing._load_dosing_table()
+    drugs = [r["drug"] for r in index.rows] + ["Some-New-Drug", "PIPERACILLIN + TAZOBACTAM"]
+    syndromes = [r["indication"] for r in index.rows] + ["gn_bacteremia", "bacteremia", ""]
+
+    for drug in drugs:
+        for syndrome in syndromes:
+            expected = _linear_match(index.rows, drug, syndrome)
+            assert dosing._match_rows_for_drug(drug, syndrome) == expected, (drug, syndrome)
+
+
+def test_dosing_table_hot_reload(fresh_index, tmp_path, monkeypatch):
+    csv_path = tmp_path / "dosing_table.csv"
+    shutil.copy(dosing.CSV_PATH, csv_path)
+    monkeypatch.setattr(dosing, "CSV_PATH", csv_path)
+
+    patient = PatientInfo(age_years=40, syndrome="Plague bacteremia", egfr_ml_min=90, beta_lactam_allergy=False)
+    before = dosing._load_dosing_table()
+    assert dosing.pick_regimen("Streptomycin", patient) is None
+
+    with open(csv_path, "a", encoding="utf-8") as f:
+        f.write("\nStreptomycin,Plague bacteremia,IM,1 g, q12h,10 days,adjust per CrCl,,Test row\n")
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    regimen = dosing.pick_regimen("Streptomycin", patient)
+    assert regimen is not None and regimen.route == "IM"
+    # old snapshot untouched (swapped, not mutated)
+    assert "streptomycin" not in before.by_drug
+
+
+def test_missing_csv_keeps_table_and_backs_off(fresh_index, tmp_path, monkeypatch):
+    csv_path = tmp_path / "dosing_table.csv"
+    shutil.copy(dosing.CSV_PATH, csv_path)
+    monkeypatch.setattr(dosing, "CSV_PATH", csv_path)
+    index = dosing._load_dosing_table()
+
+    csv_path.unlink()
+    monkeypatch.setattr(dosing, "_NEXT_CHECK", 0.0)
+    monkeypatch.setattr(dosing, "DOSING_RELOAD_INTERVAL_S", 60.0)
+    assert dosing._load_dosing_table() is index
+    assert dosing._NEXT_CHECK > 0.0  # not stat'ed again on the next request
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+import agent.nodes.explain as explain
+from api.schemas import CultureReportRequest, RecommendationPackage, Regimen
+from services.explain_cache import ExplanationCache
+from services.parser import parse_report
+from tests.test_end_to_end import base_payload
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = ExplanationCache(maxsize=16, ttl_s=60)
+    monkeypatch.setattr(explain, "EXPLANATION_CACHE", cache)
+    return cache
+
+
+class _SlowLLM:
+    async def ainvoke(self, messages):
+        await asyncio.sleep(5)
+        return SimpleNamespace(content="too late")
+
+    def invoke(self, messages):
+        time.sleep(0.5)
+        return SimpleNamespace(content="too late")
+
+
+class _FastLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content="  Explained.  ")
+
+    def invoke(self, messages):
+        self.calls += 1
+        return SimpleNamespace(content="  Explained.  ")
+
+
+def _state():
+    payload = CultureReportRequest(**base_payload())
+    primary = Regimen(drug="Amikacin", route="IV", dose="15 mg/kg", frequency="q24h", duration="5-7 days", source="test")
+    return {
+        "payload": payload,
+        "parsed_report": parse_report(payload.report_text),
+        "ranked_options": [],
+        "recommendation": RecommendationPackage(primary=primary, rationale=["deterministic"]),
+        "debug": {},
+    }
+
+
+def test_explain_deadline_keeps_deterministic_recommendation(monkeypatch):
+    monkeypatch.setattr(explain, "llm", _SlowLLM())
+    monkeypatch.setattr(explain, "EXPLAIN_TIMEOUT_S", 0.05)
+
+    state = _state()
+    out = asyncio.run(explain.aexplain_node(state))
+
+    assert "recommendation" not in out
+    assert state["recommendation"].rationale == ["deterministic"]
+    assert out["debug"]["explain"]["skipped"] == "timeout"
+
+
+def test_sync_explain_has_the_same_deadline(monkeypatch):
+    monkeypatch.setattr(explain, "llm", _SlowLLM())
+    monkeypatch.setattr(explain, "EXPLAIN_TIMEOUT_S", 0.05)
+
+    state = _state()
+    started = time.perf_counter()
+    out = explain.explain_node(state)
+
+    assert time.perf_counter() - started < 0.4
+    assert "recommendation" not in out
+    assert state["recommendation"].rationale == ["deterministic"]
+    assert out["debug"]["explain"]["skipped"] == "timeout"
+
+
+def test_sync_explain_timeout_cancels_queued_call(monkeypatch):
+    fake = _FastLLM()
+    monkeypatch.setattr(explain, "llm", fake)
+    monkeypatch.setattr(explain, "EXPLAIN_TIMEOUT_S", 0.05)
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(explain, "_SYNC_CALLS", pool)
+    release = threading.Event()
+    pool.submit(release.wait)  # the only worker is busy
+
+    out = explain.explain_node(_state())
+    release.set()
+    pool.shutdown(wait=True)
+
+    assert out["debug"]["explain"]["skipped"] == "timeout"
+    assert fake.calls == 0
+
+
+def test_explain_appends_rationale(monkeypatch):
+    monkeypatch.setattr(explain, "llm", _FastLLM())
+
+    out = asyncio.run(explain.aexplain_node(_state()))
+    assert out["recommendation"].rationale == ["deterministic", "Explained."]
+
+
+def test_repeated_case_served_from_cache(monkeypatch, fresh_cache):
+    fake = _FastLLM()
+    monkeypatch.setattr(explain, "llm", fake)
+
+    first = asyncio.run(explain.aexplain_node(_state()))
+    second = asyncio.run(explain.aexplain_node(_state()))
+
+    assert fake.calls == 1
+    assert second["recommendation"].rationale == first["recommendation"].rationale
+    assert second["debug"]["explain"]["cache"] == "hit"
+    assert fresh_cache.stats()["hits"] == 1 and fresh_cache.stats()["misses"] == 1
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    db = str(tmp_path / "explain.sqlite")
+    ExplanationCache(maxsize=4, ttl_s=60, db_path=db).set("k", "cached text")
+
+    restarted = ExplanationCache(maxsize=4, ttl_s=60, db_path=db)
+    assert restarted.get("k") == "cached text"
+    assert restarted.stats()["disk_hits"] == 1
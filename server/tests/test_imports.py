@@ -0,0 +1,14 @@
+import os
+
+from bench.importtime import LAZY_MODULES, profile
+
+
+def test_api_import_does_not_load_llm_or_ml_stack():
+    env = dict(os.environ, GROQ_API_KEY="")
+    loaded = {name for name, _, _ in profile("import api.main", env)}
+    assert not loaded & set(LAZY_MODULES)
+
+
+def test_model_load_pulls_in_ml_stack():
+    loaded = {name for name, _, _ in profile("from services import ranker; ranker._load_model()")}
+    assert {"joblib", "sklearn", "numpy"} <= loaded
@@ -0,0 +1,24 @@
+import logging
+
+from services.logs import SamplingFilter, parse_levels
+
+
+def _record(sample=None):
+    rec = logging.LogRecord("t", logging.DEBUG, __file__, 1, "event", None, None)
+    if sample:
+        rec.sample = sample
+    return rec
+
+
+def test_sampling_keeps_one_in_n_per_key():
+    f = SamplingFilter(every=10)
+    kept = [f.filter(_record("dosing_miss")) for _ in range(25)]
+    assert kept.count(True) == 3  # 1st, 11th, 21st
+    assert all(f.filter(_record()) for _ in range(5))  # unsampled records always pass
+
+
+def test_parse_levels():
+    assert parse_levels("services.dosing=DEBUG, agent = warning,bogus") == {
+        "services.dosing": logging.DEBUG,
+        "agent": logging.WARNING,
+    }
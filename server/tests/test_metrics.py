@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+
+from api.main import app
+from services.metrics import ANALYZE_STATUS, NODE_LATENCY, Counter, Histogram, render_latest
+from tests.test_end_to_end import base_payload
+
+client = TestClient(app)
+
+
+def test_metrics_endpoint_records_pipeline():
+    before_extract = NODE_LATENCY.count(node="extract")
+    before_missing = ANALYZE_STATUS.value(status="needs_more_info")
+
+    p = base_payload()
+    p["patient"]["syndrome"] = None
+    r = client.post("/analyze", json=p)
+    assert r.status_code == 200
+
+    assert NODE_LATENCY.count(node="extract") == before_extract + 1
+    assert ANALYZE_STATUS.value(status="needs_more_info") == before_missing + 1
+    client.post("/analyze", json=base_payload())
+
+    m = client.get("/metrics")
+    assert m.status_code == 200
+    assert m.headers["content-type"].startswith("text/plain")
+    body = m.text
+    for node in ["extract", "validate", "rank", "dose", "respond"]:
+        assert f'aura_node_latency_seconds_count{{node="{node}"}}' in body
+    assert 'aura_ranker_mode_total{mode="ml"}' in body
+    assert "# TYPE aura_dosing_misses_total counter" in body
+
+
+def test_histogram_exposition_is_cumulative():
+    h = Histogram("test_hist_seconds", "test", ["op"], buckets=(0.1, 1.0))
+    h.observe(0.05, op="a")
+    h.observe(0.5, op="a")
+    h.observe(5.0, op="a")
+    c = Counter("test_total", "test")
+    c.inc()
+
+    text = render_latest()
+    assert 'test_hist_seconds_bucket{op="a",le="0.1"} 1' in text
+    assert 'test_hist_seconds_bucket{op="a",le="1"} 2' in text
+    assert 'test_hist_seconds_bucket{op="a",le="+Inf"} 3' in text
+    assert 'test_hist_seconds_count{op="a"} 3' in text
+    assert "test_total 1" in text
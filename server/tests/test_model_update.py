@@ -0,0 +1,164 @@
+import json
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from services import ranker
+from services.scorer import FastScorer
+from tests.test_end_to_end import base_payload
+
+COLUMNS = ["organism", "drug", "sir"]
+HISTORY = pd.DataFrame(
+    [("escherichia coli", "meropenem", "S")] * 40
+    + [("escherichia coli", "meropenem", "R")] * 2
+    + [("escherichia coli", "ampicillin", "S")] * 10
+    + [("escherichia coli", "ampicillin", "R")] * 30,
+    columns=COLUMNS,
+)
+
+
+@pytest.fixture
+def update(monkeypatch):
+    from ml import update
+
+    monkeypatch.setattr(update, "load_processed", lambda: HISTORY)
+    return update
+
+
+@pytest.fixture
+def registry():
+    from ml import registry
+
+    return registry
+
+
+@pytest.fixture
+def served(paths, monkeypatch):
+    """
+    Point services/ranker.py at the temporary registry, with a fast watcher.
+    """
+    monkeypatch.setattr(ranker, "MODEL_PATH", paths["model_path"])
+    monkeypatch.setattr(ranker, "REGISTRY_DIR", paths["registry_dir"])
+    monkeypatch.setattr(ranker, "REGISTRY_CURRENT", paths["registry_dir"] / "current.json")
+    monkeypatch.setattr(ranker, "SHARED_TABLES_DIR", "")
+    monkeypatch.setattr(ranker, "MODEL_RELOAD_INTERVAL_S", 0.01)
+    monkeypatch.setattr(ranker, "_ACTIVE", None)
+    yield
+    ranker.stop_model_watcher()
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return {
+        "counts_path": tmp_path / "counts.json",
+        "model_path": tmp_path / "model.joblib",
+        "registry_dir": tmp_path / "models",
+    }
+
+
+def _write_batch(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+    return path
+
+
+def _coef(model):
+    return model.named_steps["clf"].coef_, model.named_steps["clf"].intercept_
+
+
+def test_update_matches_full_retrain(update, paths, tmp_path):
+    rows = [("Escherichia coli", "Ampicillin", "S")] * 25 + [("klebsiella pneumoniae", "meropenem", "I")] * 5
+    batch = _write_batch(tmp_path / "b1.csv", rows)
+
+    state = update.update([batch], **paths)
+    assert state["version"] == 1
+    assert (paths["registry_dir"] / "model-0001.joblib").exists()
+    meta = json.loads((paths["registry_dir"] / "current.json").read_text())
+    assert meta["version"] == 1 and meta["source"] == "update" and meta["features"] == ["organism", "drug"]
+
+    # Same model as refitting on history + batch from scratch
+    full = update.normalize(pd.concat([HISTORY, pd.DataFrame(rows, columns=COLUMNS)]))
+    expected = update.fit(update.aggregate(full))
+    for got, want in zip(_coef(joblib.load(paths["model_path"])), _coef(expected)):
+        np.testing.assert_allclose(got, want, atol=1e-6)
+
+    # Re-applying the same file is a no-op
+    assert update.update([batch], **paths) is None
+    assert update.load_state(paths["counts_path"])["version"] == 1
+
+
+def test_decay_downweights_existing_counts(update, paths, tmp_path):
+    update.update([], **paths)  # seed from history
+    batch = _write_batch(tmp_path / "b1.csv", [("escherichia coli", "ampicillin", "S")] * 10)
+    state = update.update([batch], decay=0.5, **paths)
+
+    counts = update.counts_frame(state).set_index(["organism", "drug"])
+    assert counts.loc[("escherichia coli", "ampicillin")].tolist() == [15.0, 30.0]
+    assert counts.loc[("escherichia coli", "meropenem")].tolist() == [20.0, 21.0]
+
+
+def test_registry_records_data_hash_and_auc(update, registry, paths, tmp_path):
+    update.update([], **paths)
+    batch = _write_batch(tmp_path / "b1.csv", [("escherichia coli", "ampicillin", "R")] * 5
+                         + [("escherichia coli", "meropenem", "S")] * 5)
+    update.update([batch], **paths)
+
+    first, second = registry.versions(paths["registry_dir"])
+    assert first["auc"] is None and second["auc"] == pytest.approx(1.0) and second["auc_on"] == "new batches"
+    assert first["data_sha256"] != second["data_sha256"]
+    assert first["n_isolates"] == len(HISTORY) and second["n_isolates"] == len(HISTORY) + 10
+
+
+def test_ranker_swaps_only_in_refresh(update, paths, tmp_path, served):
+    update.update([], **paths)
+    first = ranker.current_model()
+    assert first.info["version"] == 1 and isinstance(first.scorer, FastScorer)
+    assert ranker.refresh_model() is False and ranker.current_model() is first
+    p_before = first.scorer.score_pairs([("escherichia coli", "ampicillin")])[0]
+
+    batch = _write_batch(tmp_path / "b1.csv", [("escherichia coli", "ampicillin", "S")] * 200)
+    update.update([batch], **paths)
+    assert ranker.current_model() is first  # the request path never checks the files
+
+    assert ranker.refresh_model() is True
+    second = ranker.current_model()
+    assert second.info["version"] == 2
+    assert second.scorer.score_pairs([("escherichia coli", "ampicillin")])[0] > p_before
+
+
+def test_watcher_swaps_in_background(update, registry, paths, tmp_path, served):
+    update.update([], **paths)
+    assert ranker.current_model().info["version"] == 1
+    ranker.start_model_watcher()
+
+    update.update([_write_batch(tmp_path / "b1.csv", [("escherichia coli", "ampicillin", "S")] * 10)], **paths)
+    deadline = time.monotonic() + 5
+    while ranker.current_model().info["version"] != 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ranker.current_model().info["version"] == 2
+
+    # Rollback: point current.json at version 1 again
+    registry.promote(1, paths["registry_dir"], paths["model_path"])
+    deadline = time.monotonic() + 5
+    while ranker.current_model().info["version"] != 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert ranker.current_model().info["version"] == 1
+
+
+def test_ranker_keeps_model_when_reload_fails(update, paths, served):
+    update.update([], **paths)
+    first = ranker.current_model()
+    (paths["registry_dir"] / "current.json").write_text(json.dumps({"version": 99}))
+    assert ranker.refresh_model() is False
+    assert ranker.current_model().model is first.model and ranker.current_model().info["version"] == 1
+
+
+def test_debug_reports_model_version(update, paths, served):
+    update.update([], **paths)
+    body = TestClient(app).post("/analyze", json=base_payload()).json()
+    assert body["debug"]["rank"]["ranker_used"] == "ml"
+    assert body["debug"]["rank"]["model_version"] == 1
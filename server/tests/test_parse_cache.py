@@ -0,0 +1,52 @@
+from dataclasses import FrozenInstanceError
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from services import parser
+from services.cache import TTLCache
+from services.parser import parse_report
+from tests.test_end_to_end import E_COLI_REPORT, base_payload
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def parse_cache(monkeypatch):
+    cache = TTLCache(16)
+    monkeypatch.setattr(parser, "_PARSE_CACHE", cache)
+    return cache
+
+
+def test_same_normalized_text_shares_one_result(parse_cache):
+    first = parse_report(E_COLI_REPORT)
+    variant = "\r\n".join("  " + line for line in E_COLI_REPORT.split("\n")) + "\n\n"
+    assert parse_report(variant) is first
+    assert parse_cache.stats()["hits"] == 1
+
+    other = parse_report(E_COLI_REPORT.replace("AMIKACIN                           S", "AMIKACIN R"))
+    assert other is not first
+
+
+def test_cached_result_cannot_be_mutated(parse_cache):
+    parsed = parse_report(E_COLI_REPORT)
+    with pytest.raises(FrozenInstanceError):
+        parsed.specimen = "urine"
+    with pytest.raises(FrozenInstanceError):
+        parsed.organisms[0].ast[0].sir = "R"
+    with pytest.raises(AttributeError):
+        parsed.organisms[0].ast.append(None)
+
+
+def test_follow_up_request_reuses_parse(parse_cache):
+    p = base_payload()
+    p["patient"]["beta_lactam_allergy"] = None
+    first = client.post("/analyze", json=p).json()
+    assert first["status"] == "needs_more_info"
+
+    p["patient"]["beta_lactam_allergy"] = False
+    second = client.post("/analyze", json=p).json()
+    assert second["status"] != "needs_more_info"
+    assert second["parsed_report"] == first["parsed_report"]
+    assert parse_cache.stats()["hits"] == 1
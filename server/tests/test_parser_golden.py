@@ -0,0 +1,85 @@
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+from services.parser import parse_report
+from tests import parser_reference
+
+CASES_DIR = Path("tests/cases")
+
+# The reference parser's un-indexed row regex can span lines, so a header
+# line directly above the first row gets glued onto that drug name
+# ("Antibiotic Susceptibility Amikacin"). The line-oriented parser reads
+# each row on its own; see test_unindexed_rows_do_not_absorb_header.
+KNOWN_DIVERGENCES = {"09_no_index_rows.json"}
+
+VARIANTS = {
+    "crlf": "Specimen Desc : URINE C/S\r\nResult :\r\n1 : KLEBSIELLA PNEUMONIAE\r\nANTIBIOTIC SUSCEPTIBILITY\r\n1 MEROPENEM S\r\n2 CEFTRIAXONE R\r\n",
+    "organism_next_line": "Specimen Desc. : BLOOD C/S\nResult :\n1:\nE. COLI\nNOTE: ESBL\nANTIBIOTIC SUSCEPTIBILITY\n1 AMIKACIN S\n",
+    "specimen_next_line": "Specimen Desc. :\n  WOUND SWAB\nResult :\n1: STAPHYLOCOCCUS AUREUS\nANTIBIOTIC\n1 VANCOMYCIN S\n1 VANCOMYCIN R\n",
+    "no_antibiotic_header": "Specimen Desc. : SPUTUM\nResult :\n1: E. COLI\nHEAVY GROWTH\n1 AMIKACIN S\nLegend:\nS = Sensitive\n",
+    "no_organism": "Specimen Desc. : PUS\nANTIBIOTIC SUSCEPTIBILITY\n1 AMIKACIN    S\n2 GENTAMICIN    I\n",
+    # Row-shaped lines in the Result block are notes and AST rows at once
+    "indexed_row_in_result": "Specimen Desc. : BLOOD C/S\nResult :\n1: E. COLI\n1 AMIKACIN S\nANTIBIOTIC SUSCEPTIBILITY\n2 MEROPENEM S\n",
+    "note_ending_in_sir": "Specimen Desc. : BLOOD C/S\nResult :\n1: E. COLI\nMODERATE GROWTH OF GNR I\nANTIBIOTIC SUSCEPTIBILITY\n1 AMIKACIN S\n",
+    "unindexed_note_ending_in_sir": "Specimen Desc. : URINE\nResult :\n1: E. COLI\nMODERATE GROWTH OF GNR I\nANTIBIOTIC SUSCEPTIBILITY:\nAMIKACIN S\n",
+}
+
+
+def _corpus():
+    for f in sorted(CASES_DIR.glob("*.json")):
+        with open(f, "r", encoding="utf-8") as fp:
+            yield f.name, json.load(fp)["request"]["report_text"]
+    for f in sorted(CASES_DIR.glob("*.txt")):
+        yield f.name, f.read_text(encoding="utf-8")
+    yield from VARIANTS.items()
+
+
+@pytest.mark.parametrize("name,text", list(_corpus()))
+def test_matches_reference_parser(name, text):
+    if name in KNOWN_DIVERGENCES:
+        pytest.skip("reference parser merges header line into first drug")
+    assert parse_report(text).to_schema().model_dump() == parser_reference.parse_report(text).model_dump()
+
+
+def test_unindexed_rows_do_not_absorb_header():
+    text = "Specimen Desc. : BLOOD C/S\nResult :\n1: E. COLI\nANTIBIOTIC SUSCEPTIBILITY\nAMIKACIN S\nAMPICILLIN R\n"
+    drugs = [a.drug for a in parse_report(text).organisms[0].ast]
+    assert drugs == ["Amikacin", "Ampicillin"]
+
+
+# One line of each kind the parser tells apart
+LINE_KINDS = {
+    "specimen": "Specimen Desc. : BLOOD C/S",
+    "specimen_empty": "Specimen Desc. :",
+    "result": "Result :",
+    "result_organism": "Result : 1: E. COLI",
+    "result_bare": "Result : 1:",
+    "result_text": "Result : HEAVY GROWTH",
+    "bare": "1:",
+    "organism": "2: KLEBSIELLA PNEUMONIAE",
+    "row_a": "1 AMIKACIN S",
+    "row_b": "CEFTRIAXONE R",
+    "legend": "Legend:",
+    "header": "ANTIBIOTIC SUSCEPTIBILITY",
+}
+
+
+def _glued(report) -> bool:
+    # KNOWN_DIVERGENCES: a reference row spanning two lines
+    return any("\n" in (a.evidence_line or "") for o in report.organisms for a in o.ast)
+
+
+def test_line_kind_combinations_match_reference_parser():
+    mismatches = []
+    for n in range(1, 5):
+        for kinds in itertools.product(LINE_KINDS, repeat=n):
+            text = "\n".join(LINE_KINDS[k] for k in kinds)
+            expected = parser_reference.parse_report(text)
+            if _glued(expected):
+                continue
+            if parse_report(text).to_schema().model_dump() != expected.model_dump():
+                mismatches.append(kinds)
+    assert mismatches == []
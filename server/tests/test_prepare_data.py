@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml import prepare_data
+
+RAW = """Genome ID,Genome Name,Antibiotic,Resistant Phenotype,Measurement Sign,Measurement Value,Measurement Unit
+1,Escherichia coli strain K-12,Meropenem ,Susceptible,<=,0.25,mg/L
+2,Escherichia coli O157:H7,CIPROFLOXACIN,Resistant,>,4,
+3,Klebsiella pneumoniae subsp. pneumoniae,Amikacin,Nonsusceptible,,,mg/L
+4,Klebsiella pneumoniae,Amikacin,Not defined,=,8,mg/L
+5,Escherichia coli,Cefepime,Susceptible-dose dependent,,16,mg/L
+"""
+
+NO_GENOME = """Antibiotic,Resistant Phenotype
+Colistin,Susceptible
+"""
+
+
+@pytest.fixture
+def raw_files(tmp_path):
+    a, b = tmp_path / "multi.csv", tmp_path / "pseudo.csv"
+    a.write_text(RAW, encoding="utf-8")
+    b.write_text(NO_GENOME, encoding="utf-8")
+    return a, b
+
+
+def test_build_mic_vectorized():
+    mic = prepare_data.build_mic(
+        pd.Series(["<=", ">", None, "="]),
+        pd.Series(["0.25", "4", None, "8"]),
+        pd.Series(["mg/L", None, "mg/L", ""]),
+    )
+    assert mic.tolist() == ["<= 0.25 mg/L", "> 4", "", "= 8"]
+
+
+def test_build_mic_missing_values_stay_empty():
+    # As read with RAW_DTYPES: categoricals and strings with NaN
+    mic = prepare_data.build_mic(
+        pd.Series(["<=", np.nan, np.nan], dtype="category"),
+        pd.Series(["0.25", np.nan, "8"], dtype=object),
+        pd.Series(["mg/L", np.nan, np.nan], dtype="category"),
+    )
+    assert mic.tolist() == ["<= 0.25 mg/L", "", "8"]
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".csv"])
+def test_prepare_multiple_organism_files(raw_files, tmp_path, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    a, b = raw_files
+    inputs = [prepare_data.parse_input(str(a), "escherichia coli"), prepare_data.parse_input(f"{b}=Pseudomonas aeruginosa", None)]
+    out = tmp_path / f"susceptibility{suffix}"
+
+    counts = prepare_data.prepare(inputs, out, chunksize=2)
+    df = pd.read_parquet(out) if suffix == ".parquet" else pd.read_csv(out, keep_default_na=False)
+
+    assert df.astype(str).values.tolist() == [
+        ["escherichia coli", "meropenem", "S", "<= 0.25 mg/L"],
+        ["escherichia coli", "ciprofloxacin", "R", "> 4"],
+        ["klebsiella pneumoniae", "amikacin", "R", ""],
+        ["escherichia coli", "cefepime", "I", "16 mg/L"],
+        ["pseudomonas aeruginosa", "colistin", "S", ""],
+    ]
+    assert counts.to_dict() == {"S": 2, "I": 1, "R": 2}
+
+
+def test_file_without_genome_name_needs_organism(raw_files):
+    _, b = raw_files
+    assert prepare_data.parse_input(str(b), "escherichia coli") == (b, "escherichia coli")
+    with pytest.raises(ValueError, match="Genome Name"):
+        next(prepare_data.read_chunks(b, None))
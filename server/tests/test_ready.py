@@ -0,0 +1,70 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import api.main as main
+from agent.warmup import warm_up
+from services import ranker
+from services.metrics import NODE_LATENCY, RANKER_MODE
+from services.shadow import SHADOW
+
+
+def test_warm_up_loads_model_and_runs_pipeline():
+    timings = warm_up()
+    assert {"dosing_table", "model", "dummy_inference"} <= set(timings)
+    assert ranker.current_model().model is not None
+
+
+def test_warm_up_records_no_traffic(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(SHADOW, "submit", lambda *args: submitted.append(args))
+    before = [RANKER_MODE.value(mode=m) for m in ("ml", "rules")] + [NODE_LATENCY.count(node="rank")]
+
+    warm_up()
+
+    assert submitted == []
+    assert [RANKER_MODE.value(mode=m) for m in ("ml", "rules")] + [NODE_LATENCY.count(node="rank")] == before
+
+
+def test_ready_is_503_until_warm_up_finishes(monkeypatch):
+    monkeypatch.setitem(main.READINESS, "ready", False)
+    monkeypatch.setitem(main.READINESS, "error", None)
+
+    def slow_warm_up():
+        time.sleep(0.3)
+        return {"model": 1.0}
+
+    monkeypatch.setattr(main, "warm_up", slow_warm_up)
+
+    # The lifespan (and so warm-up) only runs when TestClient is used as a context manager
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert client.get("/ready").status_code == 503
+
+        deadline = time.monotonic() + 5
+        while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        r = client.get("/ready")
+        assert r.status_code == 200
+        assert r.json()["ready"] is True
+        assert r.json()["warmup_ms"] == {"model": 1.0}
+
+
+def test_ready_reports_warm_up_failure(monkeypatch):
+    monkeypatch.setitem(main.READINESS, "ready", False)
+    monkeypatch.setitem(main.READINESS, "error", None)
+
+    def broken_warm_up():
+        raise RuntimeError("model missing")
+
+    monkeypatch.setattr(main, "warm_up", broken_warm_up)
+
+    with TestClient(main.app) as client:
+        deadline = time.monotonic() + 5
+        while main.READINESS["error"] is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert "model missing" in r.json()["error"]
@@ -0,0 +1,44 @@
+import pytest
+from pydantic import ValidationError
+
+from api.schemas import ParsedReport, PatientInfo, RankedOption
+from bench.synthetic import make_report
+from services.parser import parse_report
+from services.ranker import rank_options
+from services.records import OptionRecord, refreeze
+
+PATIENT = PatientInfo(age_years=56, syndrome="gn_bacteremia", beta_lactam_allergy=False)
+
+
+def test_to_schema_gives_valid_models():
+    parsed = parse_report(make_report(40, n_organisms=3, seed=7))
+    schema = parsed.to_schema()
+    assert ParsedReport.model_validate(schema.model_dump()) == schema
+    assert len(schema.organisms) == 3 and len(schema.organisms[0].ast) == 40
+
+    ranked = rank_options(parsed, PATIENT)
+    assert ranked
+    for option in ranked:
+        assert RankedOption.model_validate(option.to_schema().model_dump()).drug == option.drug
+
+
+def test_organisms_share_one_ast_tuple():
+    parsed = parse_report(make_report(30, n_organisms=3, seed=1))
+    assert parsed.organisms[0].ast is parsed.organisms[2].ast
+    assert isinstance(parsed.organisms[0].ast, tuple)
+
+
+def test_out_of_range_score_rejected_at_boundary():
+    with pytest.raises(ValidationError):
+        OptionRecord("Meropenem", 1.2).to_schema()
+
+
+def test_refreeze_restores_tuples():
+    parsed = parse_report(make_report(10, seed=2))
+    thawed = type(parsed)(
+        parsed.specimen,
+        [type(o)(o.organism, list(o.ast), o.notes) for o in parsed.organisms],
+        parsed.overall_notes,
+    )
+    assert thawed != parsed
+    assert refreeze(thawed) == parsed
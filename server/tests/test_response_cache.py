@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.schemas import CultureReportRequest
+from services import ranker
+from services.metrics import NODE_LATENCY
+from services.response_cache import RESPONSE_CACHE, ResponseCache, request_key
+from tests.test_end_to_end import base_payload
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    RESPONSE_CACHE.clear()
+    yield
+    RESPONSE_CACHE.clear()
+
+
+def _payload(**patient):
+    p = base_payload()
+    p["debug"] = False
+    p["patient"].update(patient)
+    return p
+
+
+def test_replay_skips_the_graph():
+    first = client.post("/analyze", json=_payload())
+    runs = NODE_LATENCY.count(node="extract")
+
+    again = client.post("/analyze", json=_payload())
+    assert again.status_code == 200
+    assert again.json() == first.json()
+    assert NODE_LATENCY.count(node="extract") == runs
+
+
+def test_debug_requests_bypass_the_cache():
+    p = _payload()
+    p["debug"] = True
+    client.post("/analyze", json=p)
+    runs = NODE_LATENCY.count(node="extract")
+
+    r = client.post("/analyze", json=p)
+    assert r.json()["debug"] is not None
+    assert NODE_LATENCY.count(node="extract") == runs + 1
+
+
+def test_key_ignores_whitespace_and_unused_patient_fields():
+    base = CultureReportRequest(**_payload())
+    p = _payload(age_years=80, pregnancy=True)
+    p["report_text"] = "\r\n" + "\n\n".join("  " + line + "   " for line in p["report_text"].split("\n"))
+    assert request_key(CultureReportRequest(**p)) == request_key(base)
+
+    for change in ({"syndrome": "mrsa_bacteremia"}, {"beta_lactam_allergy": True},
+                   {"egfr_ml_min": 20}, {"renal_bucket": "severe"}):
+        assert request_key(CultureReportRequest(**_payload(**change))) != request_key(base), change
+
+
+def test_version_change_invalidates():
+    loaded = {"version": 1}
+    cache = ResponseCache(maxsize=8, ttl_s=None, version=lambda: loaded["version"])
+
+    key = cache.key("k")
+    cache.set(key, "ok", b"{}")
+    assert cache.get(cache.key("k")) == ("ok", b"{}")
+
+    loaded["version"] = 2
+    assert cache.get(cache.key("k")) is None
+    assert cache.stats()["invalidations"] == 1
+
+    # A run that started under version 1 can't refill the cache for version 2
+    cache.set(key, "ok", b"{}")
+    assert cache.get(cache.key("k")) is None
+
+
+def test_replay_stops_once_a_new_model_is_loaded(monkeypatch):
+    client.post("/analyze", json=_payload())
+    runs = NODE_LATENCY.count(node="extract")
+
+    # Files on disk don't matter, only what the ranker actually serves
+    active = ranker.current_model()
+    monkeypatch.setattr(ranker, "_ACTIVE", active._replace(stamp=("swapped", 0, 0)))
+    client.post("/analyze", json=_payload())
+    assert NODE_LATENCY.count(node="extract") == runs + 1
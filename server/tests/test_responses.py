@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as main
+from agent.batch import run_batch
+from api.responses import analyze_document, dumps
+from api.schemas import CultureReportRequest
+from bench.synthetic import synthetic_requests
+from services.response_cache import RESPONSE_CACHE
+from tests.test_end_to_end import base_payload
+
+client = TestClient(main.app)
+
+
+def _requests():
+    missing_renal = base_payload()
+    missing_renal["patient"]["egfr_ml_min"] = None
+    missing_renal["patient"]["renal_bucket"] = "unknown"
+    return [base_payload(), missing_renal, *synthetic_requests()]
+
+
+@pytest.mark.parametrize("i", range(5))
+def test_document_matches_analyze_response(i):
+    payload = CultureReportRequest(**_requests()[i])
+    (out,) = run_batch([payload])
+
+    expected = main._to_response(out, payload).model_dump(mode="json")
+    assert json.loads(dumps(analyze_document(out, debug=payload.debug))) == expected
+
+
+def test_compact_forms():
+    p = base_payload()
+    p["debug"] = False
+    rows = client.post("/analyze", json=p).json()
+    compact = client.post("/analyze?evidence=false&ast=columns", json=p).json()
+
+    for org_rows, org_cols in zip(rows["parsed_report"]["organisms"], compact["parsed_report"]["organisms"]):
+        assert set(org_cols["ast"]) == {"drug", "sir", "mic"}
+        assert org_cols["ast"]["drug"] == [r["drug"] for r in org_rows["ast"]]
+        assert org_cols["ast"]["sir"] == [r["sir"] for r in org_rows["ast"]]
+    assert compact["ranked_options"] == rows["ranked_options"]
+
+    no_evidence = client.post("/analyze?evidence=false", json=p).json()
+    assert all("evidence_line" not in r for o in no_evidence["parsed_report"]["organisms"] for r in o["ast"])
+    assert client.post("/analyze?ast=table", json=p).status_code == 422
+
+
+def test_cached_responses_are_per_format():
+    RESPONSE_CACHE.clear()
+    p = base_payload()
+    p["debug"] = False
+    client.post("/analyze", json=p)
+    columns = client.post("/analyze?ast=columns", json=p).json()
+    assert isinstance(columns["parsed_report"]["organisms"][0]["ast"], dict)
+    assert isinstance(client.post("/analyze", json=p).json()["parsed_report"]["organisms"][0]["ast"], list)
+    RESPONSE_CACHE.clear()
+
+
+def test_batch_columns():
+    p = base_payload()
+    p["debug"] = False
+    body = client.post("/analyze/batch?ast=columns", json=[p, p]).json()
+    assert len(body) == 2 and all(isinstance(b["parsed_report"]["organisms"][0]["ast"], dict) for b in body)
+
+
+def test_openapi_documents_both_formats():
+    paths = main.app.openapi()["paths"]
+    for path in ("/analyze", "/analyze/{token}/continue", "/analyze/batch"):
+        ok = paths[path]["post"]["responses"]["200"]
+        assert "ast=columns" in ok["description"] and "evidence=false" in ok["description"]
+        assert "application/json" in ok["content"]
@@ -0,0 +1,31 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from services.ranker import MODEL_PATH
+from services.scorer import FastScorer
+
+
+def _pipeline_and_scorer():
+    pipe = joblib.load(MODEL_PATH)
+    scorer = FastScorer.from_pipeline(pipe)
+    assert scorer is not None, "model.joblib no longer has the expected one-hot + LR shape"
+    return pipe, scorer
+
+
+def test_fast_scorer_matches_predict_proba():
+    pipe, scorer = _pipeline_and_scorer()
+    enc = pipe.named_steps["pre"].named_transformers_["cat"]
+    orgs = list(enc.categories_[0]) + ["klebsiella pneumoniae"]  # + unknown organism
+    drugs = list(enc.categories_[1]) + ["piperacillin-tazobactam", "some-new-drug"]  # + unknown drugs
+
+    pairs = [(o, d) for o in orgs for d in drugs]
+    expected = pipe.predict_proba(pd.DataFrame(pairs, columns=["organism", "drug"]))[:, 1]
+
+    got = scorer.score_pairs(pairs)
+    np.testing.assert_array_equal(got, expected)
+
+
+def test_fast_scorer_empty_batch():
+    _, scorer = _pipeline_and_scorer()
+    assert scorer.score_pairs([]).shape == (0,)
@@ -0,0 +1,96 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from agent.batch import run_batch
+from agent.sessions import SESSIONS, Sessions
+from api.main import app
+from api.schemas import AnalyzeStatus, CultureReportRequest
+from services.metrics import NODE_LATENCY
+from tests.test_end_to_end import base_payload
+
+client = TestClient(app)
+
+
+def _incomplete(**patient):
+    p = base_payload()
+    p["patient"].update({"beta_lactam_allergy": None, "egfr_ml_min": None, "renal_bucket": "unknown"}, **patient)
+    return p
+
+
+def test_continue_resumes_at_validate_without_reparsing():
+    first = client.post("/analyze", json=_incomplete()).json()
+    assert first["status"] == "needs_more_info"
+    token = first["resume_token"]
+    assert token
+
+    extract_runs = NODE_LATENCY.count(node="extract")
+    validate_runs = NODE_LATENCY.count(node="validate")
+
+    r = client.post(f"/analyze/{token}/continue", json={"beta_lactam_allergy": False, "egfr_ml_min": 85})
+    assert r.status_code == 200
+    done = r.json()
+    assert done["status"] != "needs_more_info"
+    assert done["resume_token"] is None
+    assert done["ranked_options"]
+    assert done["parsed_report"] == first["parsed_report"]
+
+    assert NODE_LATENCY.count(node="extract") == extract_runs
+    assert NODE_LATENCY.count(node="validate") == validate_runs + 1
+
+
+def test_partial_update_keeps_the_session_open():
+    token = client.post("/analyze", json=_incomplete()).json()["resume_token"]
+
+    still = client.post(f"/analyze/{token}/continue", json={"beta_lactam_allergy": True}).json()
+    assert still["status"] == "needs_more_info"
+    assert still["resume_token"] == token
+    assert still["recommendation"]["missing_info"] == ["egfr_ml_min or renal_bucket"]
+
+    done = client.post(f"/analyze/{token}/continue", json={"renal_bucket": "normal"}).json()
+    assert done["status"] != "needs_more_info"
+
+
+def test_finished_session_token_is_gone():
+    token = client.post("/analyze", json=_incomplete()).json()["resume_token"]
+    done = client.post(f"/analyze/{token}/continue", json={"beta_lactam_allergy": False, "egfr_ml_min": 85}).json()
+    assert done["status"] != "needs_more_info"
+
+    # No stale options from the finished run can be replayed through the token
+    assert client.post(f"/analyze/{token}/continue", json={"syndrome": None}).status_code == 404
+
+
+def test_bad_tokens_and_bodies():
+    assert client.post("/analyze/nope/continue", json={"beta_lactam_allergy": False}).status_code == 404
+
+    token = client.post("/analyze", json=_incomplete()).json()["resume_token"]
+    assert client.post(f"/analyze/{token}/continue", json={"report_text": "x"}).status_code == 422
+    assert client.post(f"/analyze/{token}/continue", json={"age_years": 10}).status_code == 422
+
+
+def test_expired_session(monkeypatch):
+    token = client.post("/analyze", json=_incomplete()).json()["resume_token"]
+    monkeypatch.setattr(SESSIONS, "ttl_s", 0)
+    assert client.post(f"/analyze/{token}/continue", json={"beta_lactam_allergy": False}).status_code == 404
+
+
+def test_sqlite_sessions_survive_a_restart(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    out = run_batch([CultureReportRequest(**_incomplete())])[0]
+    assert out["status"] == AnalyzeStatus.needs_more_info
+
+    async def scenario():
+        first = Sessions(db_path=db)
+        token = await first.open(out)
+        await first.close()
+
+        # A fresh instance (another worker, or after a restart) on the same file
+        second = Sessions(db_path=db)
+        try:
+            return await second.continue_(token, {"beta_lactam_allergy": False, "renal_bucket": "normal"})
+        finally:
+            await second.close()
+
+    resumed = asyncio.run(scenario())
+    assert resumed["status"] != AnalyzeStatus.needs_more_info
+    assert resumed["parsed_report"] == out["parsed_report"]
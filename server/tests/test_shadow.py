@@ -0,0 +1,96 @@
+import queue
+import shutil
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.nodes import rank
+from api.main import app
+from api.schemas import PatientInfo
+from services import ranker, shadow
+from services.parser import parse_report
+from tests.test_end_to_end import E_COLI_REPORT, base_payload
+
+PATIENT = PatientInfo(age_years=60, syndrome="gn_bacteremia")
+
+
+def _rows(db):
+    conn = sqlite3.connect(db)
+    conn.row_factory = sqlite3.Row
+    return [dict(r) for r in conn.execute("SELECT * FROM shadow_rankings")]
+
+
+def test_kendall_tau():
+    assert shadow.kendall_tau(["a", "b", "c"], ["a", "b", "c"]) == 1.0
+    assert shadow.kendall_tau(["a", "b", "c"], ["c", "b", "a"]) == -1.0
+    assert shadow.kendall_tau(["a", "b", "c", "x"], ["b", "a", "c", "y"]) == pytest.approx(1 / 3)
+    assert shadow.kendall_tau(["a", "x"], ["a", "y"]) is None
+
+
+def test_rules_candidate_recorded_in_background(tmp_path):
+    db = tmp_path / "shadow.db"
+    shadow_ranker = shadow.ShadowRanker("rules", 1.0, str(db))
+    parsed = parse_report(E_COLI_REPORT)
+    patient = PATIENT
+    served = ranker.rank_options(parsed, patient)
+
+    assert shadow_ranker.submit(parsed, patient, served)
+    shadow_ranker.close()
+
+    (row,) = _rows(db)
+    rules = [o.drug for o in ranker._rules_rank(parsed, patient)]
+    assert row["candidate"] == "rules" and row["served"] in ("ml", "rules")
+    assert row["served_top"] == served[0].drug and row["candidate_top"] == rules[0]
+    assert row["top1_match"] == int(served[0].drug == rules[0])
+    assert row["kendall_tau"] == shadow.kendall_tau([o.drug for o in served], rules)
+
+
+def test_model_version_candidate(tmp_path, monkeypatch):
+    registry = tmp_path / "models"
+    registry.mkdir()
+    shutil.copy(ranker.MODEL_PATH, registry / "model-0007.joblib")
+    (registry / "model-0007.json").write_text('{"version": 7}')
+    monkeypatch.setattr(ranker, "REGISTRY_DIR", registry)
+
+    db = tmp_path / "shadow.db"
+    shadow_ranker = shadow.ShadowRanker("model:7", 1.0, str(db))
+    parsed = parse_report(E_COLI_REPORT)
+    patient = PATIENT
+    served = ranker.rank_options(parsed, patient)
+    shadow_ranker.submit(parsed, patient, served)
+    shadow_ranker.close()
+
+    (row,) = _rows(db)
+    assert row["candidate"] == "model:7"
+    assert row["top1_match"] == 1 and row["kendall_tau"] == 1.0  # same weights as the served model
+
+
+def test_sampling_and_full_queue_never_block(tmp_path, monkeypatch):
+    parsed = parse_report(E_COLI_REPORT)
+    patient = PATIENT
+    assert not shadow.ShadowRanker("rules", 0.0, str(tmp_path / "a.db")).submit(parsed, patient, [])
+    assert not shadow.ShadowRanker("", 1.0, str(tmp_path / "a.db")).submit(parsed, patient, [])
+
+    full = queue.Queue(maxsize=1)
+    full.put(object())
+    shadow_ranker = shadow.ShadowRanker("rules", 1.0, str(tmp_path / "b.db"))
+    monkeypatch.setattr(shadow_ranker, "_worker_queue", lambda: full)
+    dropped = shadow.SHADOW_RANKINGS.value(outcome="dropped")
+    assert not shadow_ranker.submit(parsed, patient, [])
+    assert shadow.SHADOW_RANKINGS.value(outcome="dropped") == dropped + 1
+
+    with pytest.raises(ValueError):
+        shadow.ShadowRanker("bogus", 1.0, str(tmp_path / "c.db"))
+
+
+def test_analyze_feeds_the_shadow_ranker(tmp_path, monkeypatch):
+    db = tmp_path / "shadow.db"
+    shadow_ranker = shadow.ShadowRanker("rules", 1.0, str(db))
+    monkeypatch.setattr(rank, "SHADOW", shadow_ranker)
+
+    body = TestClient(app).post("/analyze", json=base_payload()).json()
+    shadow_ranker.close()
+
+    (row,) = _rows(db)
+    assert row["served_top"] == body["debug"]["rank"]["ranked_drugs"][0]
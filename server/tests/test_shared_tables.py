@@ -0,0 +1,61 @@
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pytest
+
+import services.dosing as dosing
+from services import ranker, shared_tables
+from services.scorer import FastScorer
+
+
+@pytest.fixture
+def tables(tmp_path):
+    shared_tables.build(tmp_path)
+    return tmp_path
+
+
+def test_mmapped_scorer_matches_pipeline_scorer(tables):
+    expected = FastScorer.from_pipeline(joblib.load(ranker.MODEL_PATH))
+    scorer = shared_tables.load_scorer(tables)
+    assert scorer is not None
+    assert isinstance(scorer.drug_coef.base, np.memmap)
+
+    pairs = [(o, d) for o in expected.organisms + ["unknown org"] for d in expected.drugs + ["new-drug"]]
+    np.testing.assert_array_equal(scorer.score_pairs(pairs), expected.score_pairs(pairs))
+
+
+def test_stale_scorer_tables_are_ignored(tables, tmp_path_factory, monkeypatch):
+    model = tmp_path_factory.mktemp("model") / "model.joblib"
+    shutil.copy(ranker.MODEL_PATH, model)
+    monkeypatch.setattr(ranker, "MODEL_PATH", model)
+    assert shared_tables.load_scorer(tables) is None
+
+
+def test_ranker_uses_shared_tables(tables, monkeypatch):
+    monkeypatch.setattr(ranker, "SHARED_TABLES_DIR", str(tables))
+    monkeypatch.setattr(ranker, "_ACTIVE", None)
+
+    model = ranker._load_model()
+    assert isinstance(model, FastScorer) and ranker.current_model().scorer is model
+
+
+def test_dosing_index_from_packed_rows(tables, monkeypatch):
+    monkeypatch.setattr(dosing, "SHARED_TABLES_DIR", str(tables))
+    monkeypatch.setattr(dosing, "_INDEX", None)
+    monkeypatch.setattr(dosing, "_NEXT_CHECK", 0.0)
+    monkeypatch.setattr(dosing, "_read_rows", lambda: pytest.fail("CSV parsed despite packed rows"))
+
+    index = dosing._load_dosing_table()
+    assert index.rows == shared_tables.load_dosing_rows(tables, dosing._file_stamp())
+
+
+def test_packed_rows_ignored_after_csv_edit(tables, tmp_path_factory, monkeypatch):
+    csv_path = tmp_path_factory.mktemp("kb") / "dosing_table.csv"
+    shutil.copy(dosing.CSV_PATH, csv_path)
+    monkeypatch.setattr(dosing, "CSV_PATH", csv_path)
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert shared_tables.load_dosing_rows(tables, dosing._file_stamp()) is None
@@ -0,0 +1,38 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from tests.test_end_to_end import base_payload
+
+client = TestClient(app)
+
+
+def _events(payload):
+    with client.stream("POST", "/analyze/stream", json=payload) as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in r.iter_lines() if line]
+
+
+def test_stream_emits_nodes_then_result():
+    events = _events(base_payload())
+
+    nodes = [e["node"] for e in events if e["event"] == "node"]
+    assert nodes[:4] == ["extract", "validate", "rank", "dose"]
+    assert nodes[-1] == "respond"
+
+    final = events[-1]
+    assert final["event"] == "result"
+    expected = client.post("/analyze", json=base_payload()).json()
+    assert final["data"]["status"] == expected["status"]
+    assert final["data"]["ranked_options"] == expected["ranked_options"]
+
+
+def test_stream_needs_more_info_skips_rank():
+    p = base_payload()
+    p["patient"]["syndrome"] = None
+    events = _events(p)
+
+    assert [e["node"] for e in events if e["event"] == "node"] == ["extract", "validate", "respond"]
+    assert events[-1]["data"]["status"] == "needs_more_info"
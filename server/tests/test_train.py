@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import roc_auc_score
+
+from ml import train
+
+
+def _isolates(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    drugs = np.array(["meropenem", "ampicillin", "ciprofloxacin", "amikacin"])
+    orgs = np.array(["escherichia coli", "klebsiella pneumoniae"])
+    p_s = {"meropenem": 0.95, "ampicillin": 0.3, "ciprofloxacin": 0.6, "amikacin": 0.85}
+    df = pd.DataFrame({"organism": orgs[rng.integers(0, 2, n)], "drug": drugs[rng.integers(0, 4, n)]})
+    s = rng.random(n) < df["drug"].map(p_s).to_numpy()
+    df["sir"] = np.where(s, "S", np.where(rng.random(n) < 0.2, "I", "R"))
+    return train.normalize(df)
+
+
+def test_aggregated_fit_matches_per_row_fit():
+    df = _isolates()
+    per_row = train.build_pipeline().fit(df[train.FEATURES], df["y"])
+
+    agg = train.aggregate(df)
+    assert len(agg) == 8 and agg["n_total"].sum() == len(df) and agg["n_S"].sum() == df["y"].sum()
+    X, y, w = train.weighted_rows(agg)
+    aggregated = train.build_pipeline().fit(X, y, clf__sample_weight=w)
+
+    np.testing.assert_allclose(
+        aggregated.named_steps["clf"].coef_, per_row.named_steps["clf"].coef_, atol=1e-4
+    )
+    row_auc = roc_auc_score(df["y"], per_row.predict_proba(df[train.FEATURES])[:, 1])
+    weighted_auc = roc_auc_score(y, aggregated.predict_proba(X)[:, 1], sample_weight=w)
+    assert weighted_auc == pytest.approx(row_auc, abs=1e-9)
+
+
+def test_split_counts_is_stratified_partition():
+    agg = train.aggregate(_isolates())
+    tr, te = train.split_counts(agg, test_size=0.2, seed=1)
+
+    merged = agg.merge(tr, on=train.FEATURES, how="left", suffixes=("", "_tr")).merge(
+        te, on=train.FEATURES, how="left", suffixes=("", "_te")
+    ).fillna(0)
+    assert (merged["n_S_tr"] + merged["n_S_te"] == merged["n_S"]).all()
+    assert (merged["n_total_tr"] + merged["n_total_te"] == merged["n_total"]).all()
+    assert te["n_S"].sum() == round(0.2 * agg["n_S"].sum())
+    assert (te["n_total"] - te["n_S"]).sum() == round(0.2 * (agg["n_total"] - agg["n_S"]).sum())